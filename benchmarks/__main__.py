@@ -0,0 +1,186 @@
+"""Benchmarks of generating, solving, measuring, rendering, writing and parsing labys of increasing sizes.
+
+Run with ``python -m benchmarks``, see ``--help``. Results are written as JSON, and can be compared to
+those of a previous run given as a baseline, in which case the exit code tells whether some
+benchmark regressed.
+"""
+from __future__ import annotations
+
+import argparse
+from collections.abc import Callable, Iterable, Sequence
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Any
+
+from laby_api import generate, get_metrics, solve
+from laby_api.laby import Laby
+from laby_api.rng import RandomSource
+
+
+SIZES = (16, 64, 256, 1024, 2048)
+ALGORITHMS = ('router', 'kruskal')
+METHODS = ('dfs', 'bfs')
+SEED = 0
+WINDOW_SHAPE = (40, 80)
+"""The shape of the windows rendered, as shown in a terminal."""
+
+_MIN_RUNS_TIME = 1.0
+"""The time after which no further runs of a benchmark are made, in seconds."""
+
+_METRICS = ('time', 'peak_memory', 'retained_blocks')
+
+
+def main(args: Sequence[str] | None = None) -> int:
+    """Run the benchmarks, write the results, and compare them to a baseline if one is given.
+
+    :return: The exit code: 1 if some benchmark regressed compared to the baseline, else 0.
+    """
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help='Sides of the square labys.')
+    parser.add_argument('--ndim', type=int, default=2, help='Number of dimensions of the labys.')
+    parser.add_argument('--algorithms', nargs='+', default=ALGORITHMS, help='Generation algorithms.')
+    parser.add_argument('--methods', nargs='+', default=METHODS, help='Solving methods.')
+    parser.add_argument('--repeat', type=int, default=3, help='Maximum number of timed runs per benchmark.')
+    parser.add_argument('--output', default='benchmarks.json', help='Path of the JSON results to write.')
+    parser.add_argument('--baseline', help='Path of JSON results to compare to.')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Relative increase of a metric over the baseline flagged as a regression.')
+    parsed = parser.parse_args(args)
+
+    results = {}
+    for size in parsed.sizes:
+        for name, setup in get_benchmarks((size, ) * parsed.ndim, parsed.algorithms, parsed.methods):
+            results[name] = measure(setup, parsed.repeat)
+            print(f'{name:40} {_format_metrics(results[name])}', flush=True)
+
+    with open(parsed.output, 'w') as file:
+        json.dump({'environment': get_environment(), 'results': results}, file, indent=2)
+
+    if parsed.baseline is None:
+        return 0
+
+    with open(parsed.baseline) as file:
+        baseline = json.load(file)['results']
+    regressions = compare(results, baseline, parsed.threshold)
+    for name, metric, ratio in regressions:
+        print(f'Regression: {name} {metric} x{ratio:.2f}')
+    return 1 if regressions else 0
+
+
+def get_benchmarks(
+        shape: Sequence[int], algorithms: Iterable[str], methods: Iterable[str],
+) -> Iterable[tuple[str, Callable[[], Callable[[], Any]]]]:
+    """Get the benchmarks for the given shape, each one as a name, and a setup function returning the
+    operation to measure. Setups are not measured. Parsing letters is only measured in 2D.
+    """
+    shape_name = 'x'.join(map(str, shape))
+
+    def get_laby() -> Laby:
+        """Get the laby the operations other than generation work on."""
+        return generate(shape, 'kruskal', seed=SEED)
+
+    def setup_write() -> Callable[[], Any]:
+        laby = get_laby()
+        route = solve(laby, 'bfs')
+        return lambda: laby.write(route, do_walls=False)
+
+    def setup_from_letters() -> Callable[[], Any]:
+        letters = get_laby().to_letters()
+        return lambda: Laby.from_letters(letters)
+
+    for algorithm in algorithms:
+        yield f'generate[{algorithm}] {shape_name}', lambda algorithm_=algorithm: (
+            lambda: generate(shape, algorithm_, seed=SEED)
+        )
+    for method in methods:
+        yield f'solve[{method}] {shape_name}', lambda method_=method: (
+            lambda laby_=get_laby(): solve(laby_, method_, RandomSource(SEED))
+        )
+    yield f'metrics {shape_name}', lambda: (lambda laby_=get_laby(): get_metrics(laby_))
+    yield f'str {shape_name}', lambda: (lambda laby_=get_laby(): str(laby_))
+    yield f'render_window {shape_name}', lambda: (lambda laby_=get_laby(): list(laby_.render_window(
+        slice(WINDOW_SHAPE[0]), slice(WINDOW_SHAPE[1]), (0, ) * (len(shape) - 2),
+    )))
+    yield f'write {shape_name}', setup_write
+    if len(shape) == 2:
+        yield f'from_letters {shape_name}', setup_from_letters
+
+
+def measure(setup: Callable[[], Callable[[], Any]], repeat: int) -> dict[str, float]:
+    """Measure an operation: its best wall time over a few runs, then its peak traced memory and the
+    number of memory blocks it left allocated, its result included, over one more run under tracemalloc.
+    The retained blocks are a net count: blocks allocated then freed during the run only show in the peak
+    memory.
+
+    :param setup: Function returning the operation to measure, called before each run.
+    :param repeat: The maximum number of timed runs. Runs stop earlier once they took long enough.
+    """
+    times = []
+    while len(times) < max(repeat, 1) and sum(times) < _MIN_RUNS_TIME:
+        operation = setup()
+        gc.collect()
+        start_time = time.perf_counter()
+        operation()
+        times.append(time.perf_counter() - start_time)
+
+    operation = setup()
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    result = operation()
+    _, peak_memory = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    del result
+
+    retained_blocks = sum(stat.count_diff for stat in after.compare_to(before, 'filename'))
+    return {'time': min(times), 'peak_memory': peak_memory, 'retained_blocks': retained_blocks}
+
+
+def compare(
+        results: dict[str, dict[str, float]], baseline: dict[str, dict[str, float]], threshold: float,
+) -> list[tuple[str, str, float]]:
+    """Get the regressions of the results compared to the baseline, as the benchmark name, the metric and
+    the ratio of the result to the baseline. Only benchmarks present in both are compared.
+
+    :param threshold: Relative increase of a metric over the baseline flagged as a regression.
+    """
+    regressions = []
+    for name, metrics in results.items():
+        if name not in baseline:
+            continue
+
+        for metric in _METRICS:
+            base_value, value = baseline[name].get(metric), metrics.get(metric)
+            if not base_value or value is None:
+                continue
+
+            ratio = value / base_value
+            if ratio > 1 + threshold:
+                regressions.append((name, metric, ratio))
+    return regressions
+
+
+def get_environment() -> dict[str, str]:
+    """Get a description of the environment the benchmarks run in, to tell whether results are comparable."""
+    return {
+        'python': sys.version,
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'platform': platform.platform(),
+    }
+
+
+def _format_metrics(metrics: dict[str, float]) -> str:
+    """Get a short human-readable str of the given metrics."""
+    return (f'{metrics["time"] * 1000:10.2f} ms {metrics["peak_memory"] / 2 ** 20:10.2f} MiB '
+            f'{metrics["retained_blocks"]:10} blocks')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
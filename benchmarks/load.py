@@ -0,0 +1,113 @@
+"""Load test of a running laby server, see ``python -m laby_api.server``.
+
+Run with ``python -m benchmarks.load``, see ``--help``. Concurrent clients each keep a connection alive and send
+requests one after the other. The throughput, the latency percentiles and the number of failed requests are
+printed.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import Sequence
+from itertools import count
+import json
+import sys
+import time
+
+from laby_api.server import HOST, PORT
+
+
+def main(args: Sequence[str] | None = None) -> int:
+    """Run the load test and print its results.
+
+    :return: The exit code: 1 if some request failed, else 0.
+    """
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.load', description=__doc__.split('\n\n')[0])
+    parser.add_argument('--host', default=HOST, help='Address of the server.')
+    parser.add_argument('--port', type=int, default=PORT, help='Port of the server.')
+    parser.add_argument('--endpoint', default='/generate', help='Endpoint requested.')
+    parser.add_argument('--shape', type=int, nargs='+', default=[64, 64], help='Shape of the labys.')
+    parser.add_argument('--algorithm', default='router', help='Generation algorithm.')
+    parser.add_argument('--method', help='Solving method, for /solve and /render.')
+    parser.add_argument('--concurrency', type=int, default=16, help='Number of concurrent clients.')
+    parser.add_argument('--requests', type=int, default=1000, help='Total number of requests.')
+    parser.add_argument('--distinct', action='store_true',
+                        help='Give each request its own seed, so that no computation is shared.')
+    parsed = parser.parse_args(args)
+
+    params = {'shape': parsed.shape, 'algorithm': parsed.algorithm, 'seed': 0}
+    if parsed.method is not None:
+        params['method'] = parsed.method
+    latencies, errors, elapsed = asyncio.run(run_load(
+        parsed.host, parsed.port, parsed.endpoint, params, parsed.concurrency, parsed.requests, parsed.distinct,
+    ))
+
+    latencies.sort()
+    print(f'{len(latencies) + errors} requests in {elapsed:.2f} s: {len(latencies) / elapsed:.1f} req/s, '
+          f'{errors} errors')
+    if latencies:
+        print(f'latency p50 {_get_percentile(latencies, 50) * 1000:.2f} ms, '
+              f'p99 {_get_percentile(latencies, 99) * 1000:.2f} ms, max {latencies[-1] * 1000:.2f} ms')
+    return 1 if errors else 0
+
+
+async def run_load(
+        host: str, port: int, endpoint: str, params: dict, concurrency: int, n_requests: int, distinct: bool,
+) -> tuple[list[float], int, float]:
+    """Send requests from concurrent clients until the given number is reached.
+
+    :return: The latencies of the successful requests in seconds, the number of failed ones, and the total time.
+    """
+    request_indices = count()
+    latencies = []
+    errors = 0
+
+    async def run_client():
+        nonlocal errors
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            while next(request_indices) < n_requests:
+                if distinct:
+                    params['seed'] += 1
+                body = json.dumps(params).encode()
+                start_time = time.perf_counter()
+                writer.write(
+                    f'POST {endpoint} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n'
+                    f'Content-Length: {len(body)}\r\n\r\n'.encode('latin-1') + body
+                )
+                await writer.drain()
+                if await _read_response(reader) == 200:
+                    latencies.append(time.perf_counter() - start_time)
+                else:
+                    errors += 1
+        finally:
+            writer.close()
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(run_client() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start_time
+
+
+async def _read_response(reader: asyncio.StreamReader) -> int:
+    """Read a whole response, of fixed length or chunked, and get its status."""
+    head = (await reader.readuntil(b'\r\n\r\n')).decode('latin-1').lower()
+    status = int(head.split(' ', 2)[1])
+    if 'transfer-encoding: chunked' in head:
+        while chunk_len := int((await reader.readuntil(b'\r\n')).strip(), 16):
+            await reader.readexactly(chunk_len + 2)
+        await reader.readexactly(2)
+    else:
+        content_len = next(
+            (int(line.split(':', 1)[1]) for line in head.split('\r\n') if line.startswith('content-length:')), 0,
+        )
+        await reader.readexactly(content_len)
+    return status
+
+
+def _get_percentile(sorted_values: Sequence[float], percent: float) -> float:
+    """Get the given percentile of sorted values, by the nearest rank."""
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * percent / 100))]
+
+
+if __name__ == '__main__':
+    sys.exit(main())
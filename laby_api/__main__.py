@@ -2,14 +2,24 @@ from __future__ import annotations
 
 from collections.abc import Sequence
 
+from laby_api.batch import generate_many, measure_many
 from laby_api.dirs import Dirs
+from laby_api.generators import get_generator
 from laby_api.laby import Laby
+from laby_api.metrics import get_distances, get_metrics
+from laby_api.paths import PathIndex
+from laby_api.rng import RandomSource
 from laby_api.router import Router, Route
+from laby_api.solvers import get_solver, RouteNotFoundError
+from laby_api.stats import Stats, RouterStats, phase
+from laby_api.tiled import TiledLaby
 
 
 def main():
     """Generate a random laby, then solve it. Display both the problem and the solution."""
     laby = generate((12, 16))
+    # Cache the strs, so that only the rows the route goes through are rendered again.
+    laby.render_changes()
     print(laby)
     print()
 
@@ -18,74 +28,54 @@ def main():
     print(laby)
 
 
-def generate(shape: Sequence[int]) -> Laby:
-    """Generate a random laby of the given shape."""
-    laby = generate_empty(shape)
-    with laby.reversed():
-        router = Router(pos=laby.start)
-        while True:
-            try:
-                router = _find_route(laby, router)
-            except RouteNotFoundError:
-                break
-
-            router.branch_routes()
-
-    laby.write_all_nodes(Dirs.NONE)
-    for route in router:
-        laby.write(route)
+def generate(
+        shape: Sequence[int], algorithm: str = 'router', seed: int | None = None, rng: RandomSource | None = None,
+        stats: Stats | None = None,
+) -> Laby:
+    """Generate a random laby of the given shape.
 
+    :param shape: The shape of the laby, of 1 to 4 dimensions.
+    :param algorithm: The generation algorithm, among 'router' (tracing routes), 'backtracker', 'kruskal',
+        'prim', 'wilson' and 'eller' (2D only).
+    :param seed: If given, the laby is generated from a random.Random seeded with it, making it reproducible.
+    :param rng: The source of random numbers, if no seed is given. Defaults to one over the global random module.
+    :param stats: If given, the time spent in the phases 'empty' and 'carve' is added to them, along with
+        what the routers involved do.
+    """
+    if seed is not None:
+        rng = RandomSource(seed)
+    elif rng is None:
+        rng = RandomSource()
+
+    with phase(stats, 'empty'):
+        laby = generate_empty(shape)
+    with phase(stats, 'carve'):
+        get_generator(algorithm)(laby, rng, stats)
+    laby.generator = algorithm
+    laby.seed = seed
     return laby
 
 
 def generate_empty(shape: Sequence[int]) -> Laby:
     """Generate an empty laby of the given shape."""
     laby = Laby.ones(shape)
-    laby.start = (0, 0)
+    laby.start = (0, ) * len(shape)
     laby.finish = (index - 1 for index in shape)
     return laby
 
 
-def solve(laby: Laby) -> Route:
-    """Solve the given laby and return the route."""
-    router = _find_route(laby)
-    return router.head
+def solve(laby: Laby, method: str = 'dfs', rng: RandomSource | None = None, stats: Stats | None = None) -> Route:
+    """Solve the given laby and return the route.
 
-
-def _find_route(laby: Laby, router: Router = None) -> Router:
-    """Find a route through the given laby, using the router's current head.
-
-    :param laby: Laby to use as an environment.
-    :param router: Router to use. No routes are added or removed, the head is only advanced / backtracked.
-    :return: The router containing the found route.
+    :param laby: The laby to solve.
+    :param method: The solving method, among 'dfs' (random walk, the route is not necessarily the shortest),
+        'bfs', 'astar' and 'bidirectional' (all giving a shortest route).
+    :param rng: The source of random numbers for the 'dfs' method. Defaults to one over the global random module.
+    :param stats: If given, the time spent in the phase 'search' is added to them, along with what the routers
+        involved do.
     """
-    if router is None:
-        router = Router(pos=laby.start)
-
-    has_advanced = False
-    while router.head.pos != laby.finish:
-        initial_dirs_choices = laby[router.head.pos].dirs
-        dirs_choices = router.get_dirs_choices(initial_dirs_choices)
-        if not dirs_choices:
-            if router.head.pos == laby.start:
-                raise RouteNotFoundError('No route could be found.')
-
-            if not router.is_head_main and has_advanced:
-                return router
-
-            router.backtrack(recreate=not has_advanced)
-            continue
-
-        has_advanced = True
-        dir_ = dirs_choices.choice()
-        router.advance(dir_)
-
-    return router
-
-
-class RouteNotFoundError(Exception):
-    """Exception raised when the whole environment was explored and no further route could be found."""
-    pass
+    with phase(stats, 'search'):
+        return get_solver(method)(laby, rng, stats)
 
 
 if __name__ == '__main__':
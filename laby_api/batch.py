@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Iterable, Sequence
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import os
+
+from laby_api.generators import GeneratorError
+from laby_api.laby import Laby
+from laby_api.metrics import Metrics, get_metrics
+from laby_api.rng import RandomSource
+
+
+_CHUNKS_PER_WORKER = 4
+"""How many chunks of items each worker gets on average, to balance the load while limiting overhead."""
+
+_MAX_CHUNK_LEN = 64
+"""The maximum number of items generated per task, so that results flow back steadily."""
+
+
+def generate_many(
+        shape: Sequence[int], count: int | None = None, *,
+        algorithm: str = 'router',
+        method: str | None = None,
+        workers: int | None = None,
+        seeds: Iterable[int] | None = None,
+) -> Iterable[Laby]:
+    """Generate many random labys across a pool of processes, yielding them as they are completed.
+
+    Each laby is generated from its own seed, so that it is the same as generate(shape, algorithm, seed).
+    Workers send the labys back in the packed binary format, and only a few chunks of items are in flight
+    at a time, so that results can be streamed to disk as they come.
+
+    :param shape: The shape of the labys.
+    :param count: The number of labys. Defaults to the number of seeds.
+    :param algorithm: The generation algorithm, see generate.
+    :param method: If given, the solving method with which to also trace a route through each laby.
+    :param workers: The number of worker processes. Defaults to the number of CPUs.
+    :param seeds: The seed of each laby. Defaults to 0, 1, 2, etc.
+    :return: The labys, in the order they are completed. Their seed tells which is which.
+    """
+    if seeds is None:
+        if count is None:
+            raise GeneratorError('Either a count or seeds must be given.')
+        seeds = range(count)
+    seeds = list(seeds)
+    if count is not None:
+        if count > len(seeds):
+            raise GeneratorError(f'Not enough seeds for {count} labys.')
+        seeds = seeds[:count]
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    chunk_len = max(1, min(_MAX_CHUNK_LEN, len(seeds) // (workers * _CHUNKS_PER_WORKER)))
+    chunks = [seeds[index:index + chunk_len] for index in range(0, len(seeds), chunk_len)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for chunk in chunks:
+            pending.add(executor.submit(_generate_packed, tuple(shape), algorithm, method, chunk))
+            if len(pending) < 2 * workers:
+                continue
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            yield from _unpack_results(done)
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            yield from _unpack_results(done)
+
+
+def measure_many(labys: Iterable[Laby], *, workers: int | None = None) -> Iterable[Metrics]:
+    """Measure the difficulty of many labys across a pool of processes, see metrics.get_metrics, yielding the
+    metrics in the order of the labys. The labys are sent to the workers in the packed binary format, and only a
+    few of them are in flight at a time, so that they can be read lazily, for instance from disk.
+
+    :param labys: The labys to measure.
+    :param workers: The number of worker processes. Defaults to the number of CPUs.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for laby in labys:
+            pending.append(executor.submit(_measure_packed, laby.to_bytes(do_route=False)))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+
+
+def _generate_packed(shape: Sequence[int], algorithm: str, method: str | None, seeds: Sequence[int]) -> list[bytes]:
+    """Generate, and solve if requested, a laby per seed, and get them in the packed binary format."""
+    from laby_api.__main__ import generate, solve
+
+    results = []
+    for seed in seeds:
+        laby = generate(shape, algorithm, seed=seed)
+        if method is not None:
+            laby.write(solve(laby, method, RandomSource(seed)), do_walls=False)
+        results.append(laby.to_bytes(do_route=method is not None))
+    return results
+
+
+def _measure_packed(data: bytes) -> Metrics:
+    """Measure the difficulty of the laby given in the packed binary format."""
+    return get_metrics(Laby.from_bytes(data))
+
+
+def _unpack_results(futures: Iterable) -> Iterable[Laby]:
+    """Get the labys sent back by the given completed futures."""
+    for future in futures:
+        for data in future.result():
+            yield Laby.from_bytes(data)
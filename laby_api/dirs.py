@@ -7,12 +7,20 @@ import random
 
 class Dirs(enum.Flag):
     """Represents a direction, a set of directions, or a composition of directions,
-    from left, right, up and down.
+    from left, right, up and down, and for labys of more dimensions, back, front, kata and ana.
+
+    Each dimension has a pair of simple dirs, counting from the last one: left and right step along the
+    last dimension, up and down along the one before it, back and front along the third to last one,
+    and kata and ana along the fourth to last one. The first dir of each pair steps backwards.
     """
     LEFT = enum.auto()
     RIGHT = enum.auto()
     UP = enum.auto()
     DOWN = enum.auto()
+    BACK = enum.auto()
+    FRONT = enum.auto()
+    KATA = enum.auto()
+    ANA = enum.auto()
 
     NONE = 0
     ALL = LEFT | RIGHT | UP | DOWN
@@ -21,7 +29,8 @@ class Dirs(enum.Flag):
     def from_letters(cls, letters: Iterable[str]) -> Dirs:
         """Get a dirs from a set of letters.
 
-        :param letters: The prescribed directions with the first letters from 'left', 'right', 'up' and 'down'.
+        :param letters: The prescribed directions with the first letters from 'left', 'right', 'up', 'down',
+            'back', 'front', 'kata' and 'ana'.
         """
         dirs = cls.NONE
         for letter in letters:
@@ -33,16 +42,24 @@ class Dirs(enum.Flag):
         return dirs
 
     @classmethod
-    def seq(cls) -> Sequence[Dirs, Dirs, Dirs, Dirs]:
-        """Get the sequence of simple dirs in the order left, right, up and down."""
-        return cls.LEFT, cls.RIGHT, cls.UP, cls.DOWN
+    def seq(cls, ndim: int = 2) -> Sequence[Dirs, ...]:
+        """Get the sequence of simple dirs in the order left, right, up, down, back, front, kata and ana.
+
+        :param ndim: The number of dimensions, each one giving a pair of simple dirs.
+        """
+        return _SIMPLE_DIRS[:2 * ndim]
+
+    @classmethod
+    def all(cls, ndim: int = 2) -> Dirs:
+        """Get the composition of all the simple dirs of the given number of dimensions."""
+        return _MASK_DIRS[ALL_MASKS[ndim]]
 
     def opposite(self) -> Dirs:
         """Get the opposite to this dirs, if it is a simple dir, else raise."""
-        try:
-            return _DIR_OPPOSITES[self]
-        except KeyError:
-            raise DirsError(f"Arbitrary {self.__class__.__name__} compositions don't have opposites.") from None
+        if MASK_POPCOUNTS[self.value] != 1:
+            raise DirsError(f"Arbitrary {self.__class__.__name__} compositions don't have opposites.")
+
+        return _MASK_DIRS[MASK_OPPOSITES[self.value]]
 
     def normal(self) -> Dirs:
         """Get the normal to this dirs, if applicable, else raise."""
@@ -54,28 +71,40 @@ class Dirs(enum.Flag):
 
         raise DirsError(f"{self} doesn't have a normal.")
 
-    def choice(self) -> Dirs:
-        """Get a random simple dir from this dirs."""
-        members = list(self)
-        if not members:
+    def choice(self, rng: 'RandomSource' = None) -> Dirs:
+        """Get a random simple dir from this dirs.
+
+        :param rng: The source of random numbers, defaults to the global random module.
+        """
+        if rng is not None:
+            return _MASK_DIRS[rng.choice_dir(self.value)]
+
+        choices = MASK_MEMBERS[self.value]
+        if not choices:
             return Dirs.NONE
 
-        return random.choice(members)
+        return _MASK_DIRS[random.choice(choices)]
+
+    def delta(self, ndim: int = 2) -> tuple[int, ...]:
+        """Get the delta of this dirs, when applied as a translation in a grid.
+
+        :param ndim: The number of dimensions of the grid.
+        """
+        step = BIT_STEPS[self.value]
+        if step is None:
+            raise DirsError(f'Cannot get delta for an arbitrary {self.__class__.__name__} composition.')
+
+        axis, sign = step
+        if axis + ndim < 0:
+            raise DirsError(f'{self} has no delta in {ndim} dimensions.')
 
-    def delta(self) -> tuple[int, int]:
-        """Get the delta of this dirs, when applied as a translation in a grid."""
-        try:
-            return _DIR_DELTAS[self]
-        except KeyError:
-            raise DirsError(f'Cannot get delta for an arbitrary {self.__class__.__name__} composition.') from None
+        delta = [0] * ndim
+        delta[axis] = sign
+        return tuple(delta)
 
     def __iter__(self) -> Iterable[Dirs]:
         """Iterate through all the simple dirs in this dirs."""
-        for dir_ in self.seq():
-            if not self & dir_:
-                continue
-
-            yield dir_
+        return iter(_MASK_MEMBERS_DIRS[self.value])
 
 
 # Additional regular class attributes
@@ -87,44 +116,85 @@ class DirsError(Exception):
     pass
 
 
-class SymmetricDict(dict):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.update({v: k for k, v in self.items()})
+# Integer core: tables indexed by direction mask, i.e. Dirs.value, for hot loops working on raw masks
+# rather than on Dirs instances. Simple dirs are single bits, in the order of Dirs.seq().
+
+MAX_NDIM = 4
+"""The maximum number of dimensions of a laby, for all its simple dirs to fit in a byte."""
+
+_MASKS_LEN = 1 << 2 * MAX_NDIM
 
+_SIMPLE_BITS = tuple(1 << bit_index for bit_index in range(2 * MAX_NDIM))
 
-_DIR_OPPOSITES = SymmetricDict({
-    Dirs.LEFT: Dirs.RIGHT,
-    Dirs.UP: Dirs.DOWN,
-})
+MASK_MEMBERS = tuple(tuple(bit for bit in _SIMPLE_BITS if mask & bit) for mask in range(_MASKS_LEN))
+"""The bit masks of the simple dirs in each direction mask, in the order of Dirs.seq()."""
 
-_DIR_DELTAS = {
-    Dirs.LEFT: (0, -1),
-    Dirs.RIGHT: (0, 1),
-    Dirs.UP: (-1, 0),
-    Dirs.DOWN: (1, 0),
-}
+MASK_POPCOUNTS = tuple(len(members) for members in MASK_MEMBERS)
+"""The number of simple dirs in each direction mask."""
 
+MASK_OPPOSITES = tuple((mask & 0x55) << 1 | (mask & 0xAA) >> 1 for mask in range(_MASKS_LEN))
+"""The mirror of each direction mask, i.e. the mask of the opposites of its simple dirs."""
 
-_LETTERS_TO_DIRS = {
-    'l': Dirs.LEFT,
-    'r': Dirs.RIGHT,
-    'u': Dirs.UP,
-    'd': Dirs.DOWN,
-}
+ALL_MASKS = tuple((1 << 2 * ndim) - 1 for ndim in range(MAX_NDIM + 1))
+"""The mask of all the simple dirs, indexed by number of dimensions."""
+
+BIT_INDICES = tuple(_SIMPLE_BITS.index(mask) if mask in _SIMPLE_BITS else -1 for mask in range(_MASKS_LEN))
+"""The index in Dirs.seq() of each simple dir's bit mask, -1 for other masks."""
+
+BIT_STEPS = tuple(
+    (-(bit_index // 2) - 1, 1 if bit_index % 2 else -1) if bit_index != -1 else None for bit_index in BIT_INDICES
+)
+"""The step of each simple dir's bit mask, as the axis it goes along, counted negatively from the last one,
+and the sign of the step along it. None for other masks."""
+
+
+def get_mask_offsets(strides: Sequence[int]) -> tuple[int, ...]:
+    """Get the flat index offset of a step in each simple dir's bit mask, 0 for other masks, and for simple
+    dirs beyond the dimensions of the grid.
+
+    :param strides: The strides of the grid.
+    """
+    return tuple(
+        step[1] * strides[step[0]] if step is not None and step[0] + len(strides) >= 0 else 0
+        for step in BIT_STEPS
+    )
+
+
+_MASK_DIRS = tuple(Dirs(mask) for mask in range(_MASKS_LEN))
+"""The dirs of each direction mask, to get them without going through the enum machinery."""
+
+_SIMPLE_DIRS = tuple(_MASK_DIRS[bit] for bit in _SIMPLE_BITS)
+"""The simple dirs, in the order of Dirs.seq()."""
+
+_MASK_MEMBERS_DIRS = tuple(tuple(_MASK_DIRS[bit] for bit in members) for members in MASK_MEMBERS)
+"""The simple dirs in each direction mask, in the order of Dirs.seq()."""
+
+
+LETTERS = 'lrudbfka'
+"""The letters of the simple dirs, in the order of Dirs.seq()."""
+
+_LETTERS_TO_DIRS = dict(zip(LETTERS, _SIMPLE_DIRS))
 
 
 class Pos(tuple):
     """Represents a position in a grid, in a way that adding a dirs returns the position
     translated by the dirs' delta.
     """
-    def __new__(cls, indices: Sequence[int, int]):
+    def __new__(cls, indices: Sequence[int, ...]):
         return ().__new__(cls, indices)
 
     def __add__(self, dir_: Dirs) -> Pos:
         """Return the result of translating this position by the dirs' delta."""
-        delta = dir_.delta()
-        return self.__class__([self[0] + delta[0], self[1] + delta[1]])
+        step = BIT_STEPS[dir_.value]
+        if step is None:
+            raise DirsError(f'Cannot translate by an arbitrary {dir_.__class__.__name__} composition.')
+
+        axis, sign = step
+        axis += len(self)
+        if axis < 0:
+            raise DirsError(f'Cannot translate a position of {len(self)} dimensions by {dir_}.')
+
+        return tuple.__new__(self.__class__, (*self[:axis], self[axis] + sign, *self[axis + 1:]))
 
     def __repr__(self) -> str:
         """Return a representation of this position for debugging."""
@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+from array import array
+from collections.abc import Callable, Iterable, Sequence
+
+from laby_api.dirs import Dirs, MASK_MEMBERS, MASK_OPPOSITES
+from laby_api.laby import Laby
+from laby_api.rng import RandomSource
+from laby_api.router import Router
+from laby_api.stats import Stats
+from laby_api.solvers import find_route, RouteNotFoundError
+
+
+def generate_router(laby: Laby, rng: RandomSource, stats: Stats | None = None):
+    """Carve a random laby by tracing routes: a main one from the finish to the start, then branches grown
+    off the last route until every node is reached.
+    """
+    with laby.reversed():
+        router = Router(
+            pos=laby.start, shape=laby.shape,
+            stats=stats.router if stats is not None else None,
+            on_event=stats.on_event if stats is not None else None,
+        )
+        while True:
+            try:
+                router = find_route(laby, router, rng)
+            except RouteNotFoundError:
+                break
+
+            # A route of a single point, i.e. a laby of a single node, leaves nothing to branch from.
+            if router.head.prev is None:
+                break
+
+            router.branch_routes()
+
+    laby.write_all_nodes(Dirs.NONE)
+    laby.write(router.points())
+
+
+def generate_backtracker(laby: Laby, rng: RandomSource, stats: Stats | None = None):
+    """Carve a random laby with an iterative recursive backtracker: a random walk through unreached nodes,
+    backtracking on an explicit stack whenever it is stuck. This gives long and winding corridors.
+    """
+    storage = laby.storage
+    dirs, inward_dirs, offsets = storage.dirs, storage.inward_dirs, storage.offsets
+    laby.write_all_nodes(Dirs.NONE)
+
+    start = storage.index(laby.start)
+    reached = bytearray(storage.size)
+    reached[start] = 1
+    stack = array('i', [start])
+    while stack:
+        index = stack[-1]
+        choices = [bit for bit in MASK_MEMBERS[inward_dirs[index]] if not reached[index + offsets[bit]]]
+        if not choices:
+            stack.pop()
+            continue
+
+        bit = rng.choice(choices)
+        neighbor_index = index + offsets[bit]
+        dirs[index] |= bit
+        dirs[neighbor_index] |= MASK_OPPOSITES[bit]
+        reached[neighbor_index] = 1
+        stack.append(neighbor_index)
+    storage.dirs_version += 1
+
+
+def generate_kruskal(laby: Laby, rng: RandomSource, stats: Stats | None = None):
+    """Carve a random laby with Kruskal's algorithm: open walls in random order, whenever they separate
+    two parts not yet connected, tracked with a union-find array. This gives many short dead ends.
+    """
+    storage = laby.storage
+    dirs, inward_dirs, offsets, size = storage.dirs, storage.inward_dirs, storage.offsets, storage.size
+    laby.write_all_nodes(Dirs.NONE)
+
+    # Each wall between a node and its next neighbor along some axis, as the node's flat index << 3 | the
+    # bit index of the forward dir.
+    walls = array('q')
+    for bit_index in range(1, 2 * len(laby.shape), 2):
+        bit = 1 << bit_index
+        walls.extend(index << 3 | bit_index for index in range(size) if inward_dirs[index] & bit)
+    rng.shuffle(walls)
+
+    parents = array('i', range(size))
+
+    def find(index_: int) -> int:
+        """Get the representative of the part containing the given node, halving paths on the way."""
+        while parents[index_] != index_:
+            parents[index_] = parents[parents[index_]]
+            index_ = parents[index_]
+        return index_
+
+    parts = size
+    for wall in walls:
+        index, bit = wall >> 3, 1 << (wall & 7)
+        neighbor_index = index + offsets[bit]
+        root, neighbor_root = find(index), find(neighbor_index)
+        if root == neighbor_root:
+            continue
+
+        parents[neighbor_root] = root
+        dirs[index] |= bit
+        dirs[neighbor_index] |= MASK_OPPOSITES[bit]
+        parts -= 1
+        if parts == 1:
+            break
+    storage.dirs_version += 1
+
+
+def generate_prim(laby: Laby, rng: RandomSource, stats: Stats | None = None):
+    """Carve a random laby with a randomized Prim's algorithm: grow from the start by connecting random
+    frontier nodes to the reached part. This gives many short branches radiating from the start.
+    """
+    storage = laby.storage
+    dirs, inward_dirs, offsets = storage.dirs, storage.inward_dirs, storage.offsets
+    laby.write_all_nodes(Dirs.NONE)
+
+    reached = bytearray(storage.size)
+    in_frontier = bytearray(storage.size)
+    frontier = array('i')
+
+    def reach(index_: int):
+        """Mark the given node as reached and add its unreached neighbors to the frontier."""
+        reached[index_] = 1
+        for bit_ in MASK_MEMBERS[inward_dirs[index_]]:
+            neighbor_index_ = index_ + offsets[bit_]
+            if not reached[neighbor_index_] and not in_frontier[neighbor_index_]:
+                in_frontier[neighbor_index_] = 1
+                frontier.append(neighbor_index_)
+
+    reach(storage.index(laby.start))
+    while frontier:
+        frontier_index = rng.randrange(len(frontier))
+        index = frontier[frontier_index]
+        frontier[frontier_index] = frontier[-1]
+        frontier.pop()
+
+        choices = [bit for bit in MASK_MEMBERS[inward_dirs[index]] if reached[index + offsets[bit]]]
+        bit = rng.choice(choices)
+        dirs[index] |= bit
+        dirs[index + offsets[bit]] |= MASK_OPPOSITES[bit]
+        reach(index)
+    storage.dirs_version += 1
+
+
+def generate_wilson(laby: Laby, rng: RandomSource, stats: Stats | None = None):
+    """Carve a random laby with Wilson's algorithm: add loop-erased random walks to the reached part until
+    every node is reached. This samples uniformly among all the possible perfect labys.
+    """
+    storage = laby.storage
+    dirs, inward_dirs, offsets, size = storage.dirs, storage.inward_dirs, storage.offsets, storage.size
+    laby.write_all_nodes(Dirs.NONE)
+    dirs_len = 2 * len(laby.shape)
+
+    reached = bytearray(size)
+    reached[storage.index(laby.start)] = 1
+    # The bit mask of the last dir taken from each node by the current walk.
+    exits = bytearray(size)
+    for walk_start in range(size):
+        if reached[walk_start]:
+            continue
+
+        index = walk_start
+        while not reached[index]:
+            bit = 1 << rng.randrange(dirs_len)
+            if not inward_dirs[index] & bit:
+                continue
+
+            exits[index] = bit
+            index += offsets[bit]
+
+        index = walk_start
+        while not reached[index]:
+            bit = exits[index]
+            neighbor_index = index + offsets[bit]
+            dirs[index] |= bit
+            dirs[neighbor_index] |= MASK_OPPOSITES[bit]
+            reached[index] = 1
+            index = neighbor_index
+    storage.dirs_version += 1
+
+
+def generate_eller(laby: Laby, rng: RandomSource, stats: Stats | None = None):
+    """Carve a random 2D laby with Eller's algorithm, row by row. See generate_rows."""
+    if len(laby.shape) != 2:
+        raise GeneratorError("Eller's algorithm only generates 2D labys.")
+
+    storage = laby.storage
+    cols = laby.shape[1]
+    for i, row in enumerate(generate_rows(laby.shape, rng)):
+        storage.dirs[i * cols:(i + 1) * cols] = row
+    storage.dirs_version += 1
+
+
+def generate_rows(shape: Sequence[int | None], rng: RandomSource | None = None) -> Iterable[array]:
+    """Generate a random laby row by row with Eller's algorithm, only ever holding one row in memory.
+
+    Each node of a row belongs to a set of nodes connected through the rows above. Neighbors from
+    different sets are randomly joined, then each set is randomly continued downwards at least once.
+    The last row joins all the remaining sets.
+
+    :param shape: The number of rows, or None for an endless laby, and the number of columns.
+    :param rng: The source of random numbers, defaults to one over the global random module.
+    :return: The rows, as arrays of direction masks.
+    """
+    if rng is None:
+        rng = RandomSource()
+
+    rows, cols = shape
+    left, right, up, down = (dir_.value for dir_ in Dirs.seq())
+
+    # The set of each node in the current row, as the index of a representative column.
+    sets = array('i', range(cols))
+    # The down connections carried from the row above.
+    up_masks = array('B', bytes(cols))
+
+    def find(j_: int) -> int:
+        """Get the representative column of the set of the given column, halving paths on the way."""
+        while sets[j_] != j_:
+            sets[j_] = sets[sets[j_]]
+            j_ = sets[j_]
+        return j_
+
+    i = 0
+    while rows is None or i < rows:
+        is_last_row = rows is not None and i == rows - 1
+        row = up_masks
+        up_masks = array('B', bytes(cols))
+
+        for j in range(cols - 1):
+            root, right_root = find(j), find(j + 1)
+            if root == right_root or not (is_last_row or rng.coin()):
+                continue
+
+            sets[max(root, right_root)] = min(root, right_root)
+            row[j] |= right
+            row[j + 1] |= left
+
+        if not is_last_row:
+            members: dict[int, list[int]] = {}
+            for j in range(cols):
+                members.setdefault(find(j), []).append(j)
+
+            next_sets = array('i', range(cols))
+            for root, columns in members.items():
+                down_columns = [j for j in columns if rng.coin()] or [rng.choice(columns)]
+                for j in down_columns:
+                    row[j] |= down
+                    up_masks[j] = up
+                    next_sets[j] = down_columns[0]
+            sets = next_sets
+
+        yield row
+        i += 1
+
+
+GENERATORS: dict[str, Callable[[Laby, RandomSource, Stats | None], None]] = {
+    'router': generate_router,
+    'backtracker': generate_backtracker,
+    'kruskal': generate_kruskal,
+    'prim': generate_prim,
+    'wilson': generate_wilson,
+    'eller': generate_eller,
+}
+"""The available generation algorithms, by name. Each one carves the walls of the given laby in place, drawing
+from the given source of random numbers. Those working with routers count what they do in the given stats."""
+
+
+def get_generator(algorithm: str) -> Callable[[Laby, RandomSource, Stats | None], None]:
+    """Get the generator function for the given algorithm name."""
+    try:
+        return GENERATORS[algorithm]
+    except KeyError:
+        raise GeneratorError(f'Unknown generation algorithm: {algorithm !r}. '
+                             f'Possible choices are: {list(GENERATORS.keys())}.') from None
+
+
+class GeneratorError(Exception):
+    pass
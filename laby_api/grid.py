@@ -1,82 +1,244 @@
 from __future__ import annotations
 
-from typing import Any, Sequence, Union
+from typing import Any, MutableSequence, Sequence, Union
+
+from laby_api.storage import get_strides
 
 
 _GridValue = Sequence[Union[Any, '_GridValue']]
 
 
-class Grid(list):
-    """A multidimensional list, with some syntactic sugar. It is meant to be homogenous in types."""
-    def __init__(self, value: _GridValue = ()):
-        try:
-            first_item = value[0]
-        except IndexError:
-            super().__init__(value)
+class Grid:
+    """A multidimensional array of items, with some syntactic sugar. It is meant to be homogenous in types.
+
+    The items are kept in one flat buffer, with a shape and strides. Indexing with as many indices as
+    dimensions gives an item, while indexing with fewer indices or with slices gives a view, sharing the
+    buffer of the grid it comes from.
+    """
+    __slots__ = ('_buffer', '_shape', '_strides', '_offset')
+
+    def __init__(self, value: _GridValue | Grid = ()):
+        shape, buffer = _flatten(value)
+        self._buffer: MutableSequence = buffer
+        """The flat buffer holding the items, possibly shared with other grids."""
+        self._shape: tuple[int, ...] = shape
+        """The dimensions of the grid."""
+        self._strides: tuple[int, ...] = get_strides(shape)
+        """The buffer index offsets corresponding to a step along each dimension."""
+        self._offset: int = 0
+        """The buffer index of the first item."""
+
+    @classmethod
+    def from_buffer(cls, buffer: MutableSequence, shape: Sequence[int]) -> Grid:
+        """Get a grid viewing the given flat buffer, in row-major order, without copying it.
+
+        :param buffer: The flat buffer, for instance a list or an array.
+        :param shape: The dimensions of the grid.
+        """
+        shape = tuple(shape)
+        strides = get_strides(shape)
+        if len(shape) < 1 or len(buffer) != strides[0] * shape[0]:
+            raise GridError(f'Buffer of the wrong size for shape {shape}.')
+
+        return cls._view(buffer, shape, strides, 0)
+
+    @classmethod
+    def _view(cls, buffer: MutableSequence, shape: tuple[int, ...], strides: tuple[int, ...], offset: int) -> Grid:
+        """Get a grid viewing part of the given buffer."""
+        grid = cls.__new__(cls)
+        grid._buffer = buffer
+        grid._shape = shape
+        grid._strides = strides
+        grid._offset = offset
+        return grid
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        """The dimensions of the grid."""
+        return self._shape
+
+    def __len__(self) -> int:
+        return self._shape[0]
+
+    def __iter__(self):
+        for index in range(self._shape[0]):
+            yield self[index]
+
+    def __getitem__(self, index: Sequence[int | slice, ...] | int | slice) -> Grid | Any:
+        if type(index) is tuple and len(index) == len(self._shape):
+            offset = self._offset
+            for axis_index, dim, stride in zip(index, self._shape, self._strides):
+                if type(axis_index) is not int:
+                    break
+                if axis_index < 0:
+                    axis_index += dim
+                if not 0 <= axis_index < dim:
+                    raise IndexError('Grid index out of range.')
+                offset += axis_index * stride
+            else:
+                return self._buffer[offset]
+
+        offset, shape, strides = self._locate(index)
+        if not shape:
+            return self._buffer[offset]
+
+        return self._view(self._buffer, shape, strides, offset)
+
+    def __setitem__(self, index: Sequence[int | slice, ...] | int | slice, item: _GridValue | Any):
+        offset, shape, strides = self._locate(index)
+        if not shape:
+            self._buffer[offset] = item
             return
 
-        if not all(type(item) is type(first_item) for item in value):
-            raise TypeError('Inconsistent types in given Grid value.')
+        item_shape, item_buffer = _flatten(item)
+        if item_shape != shape:
+            raise GridError(f'Cannot assign a value of shape {item_shape} to a sub-grid of shape {shape}.')
+
+        for buffer_index, value in zip(_iter_offsets(offset, shape, strides), item_buffer):
+            self._buffer[buffer_index] = value
+
+    def _locate(self, index: Sequence[int | slice, ...] | int | slice) -> tuple[int, tuple[int, ...], tuple[int, ...]]:
+        """Get the buffer index of the first item, the shape and the strides of what the given index refers to."""
+        if not isinstance(index, tuple):
+            index = (index, )
+        if len(index) > len(self._shape):
+            raise IndexError(f'Too many indices for a grid of {len(self._shape)} dimensions.')
+
+        offset = self._offset
+        shape = []
+        strides = []
+        for axis_index, dim, stride in zip(index, self._shape, self._strides):
+            if isinstance(axis_index, slice):
+                start, stop, step = axis_index.indices(dim)
+                offset += start * stride
+                shape.append(len(range(start, stop, step)))
+                strides.append(stride * step)
+                continue
+
+            if axis_index < 0:
+                axis_index += dim
+            if not 0 <= axis_index < dim:
+                raise IndexError('Grid index out of range.')
+            offset += axis_index * stride
+
+        return offset, (*shape, *self._shape[len(index):]), (*strides, *self._strides[len(index):])
+
+    def tolist(self) -> list:
+        """Get the items of the grid as nested lists."""
+        if len(self._shape) == 1:
+            return [self._buffer[index] for index in _iter_offsets(self._offset, self._shape, self._strides)]
+
+        return [sub_grid.tolist() for sub_grid in self]
 
-        if isinstance(first_item, self.__class__) or not isinstance(first_item, Sequence):
-            super().__init__(value)
-            return
+    def append(self, item: _GridValue | Any):
+        """Append an item, or a sub-grid, along the first dimension. Views cannot be appended to."""
+        if self._offset or self._strides != get_strides(self._shape) or len(self._buffer) != self._size:
+            raise GridError('Cannot append to a view.')
+
+        item_shape, item_buffer = _flatten(item) if len(self._shape) > 1 else ((), [item])
+        if item_shape != self._shape[1:]:
+            raise GridError(f'Cannot append a value of shape {item_shape} to a grid of shape {self._shape}.')
+
+        self._buffer.extend(item_buffer)
+        self._shape = (self._shape[0] + 1, *self._shape[1:])
+        self._strides = get_strides(self._shape)
+
+    @property
+    def _size(self) -> int:
+        """The number of items in the grid."""
+        return self._strides[0] * self._shape[0] if self._shape else 0
+
+    def __add__(self, other: Grid | Sequence) -> Grid:
+        if not isinstance(other, (Grid, Sequence)):
+            return NotImplemented
+
+        other = other.tolist() if isinstance(other, Grid) else list(other)
+        return self.__class__(self.tolist() + other)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Grid):
+            return self._shape == other._shape and self.tolist() == other.tolist()
+        if isinstance(other, list):
+            return self.tolist() == other
+        return NotImplemented
 
-        value = [self.__class__(item) for item in value]
-        super().__init__(value)
+    __hash__ = None
 
     def __repr__(self):
         def repr_class(list_repr=''):
             return f'{self.__class__.__name__}({list_repr})'
 
-        try:
-            first_item = self[0]
-        except IndexError:
+        if not self._shape[0]:
             return repr_class()
 
-        if not isinstance(first_item, self.__class__):
-            return repr_class(super().__repr__())
+        if len(self._shape) == 1:
+            return repr_class(repr(self.tolist()))
 
         repr_items = ['\n'.join([f'  {line}' for line in repr(item).splitlines()]) for item in self]
         repr_items_str = ',\n'.join(repr_items)
         repr_items_str = f'[\n{repr_items_str},\n]'
         return repr_class(repr_items_str)
 
-    def __setitem__(self, index: Sequence[int, ...] | int, item: _GridValue | Any):
-        try:
-            index, *indices = index
-        except TypeError:
-            indices = ()
 
-        if isinstance(item, Sequence):
-            item = self.__class__(item)
-
-        if not indices:
-            super().__setitem__(index, item)
-            return
-
-        self.__getitem__(index).__setitem__(indices, item)
-
-    def __getitem__(self, index: Sequence[int | slice, ...] | int | slice) -> _GridValue | Any:
-        try:
-            index, *indices = index
-        except TypeError:
-            indices = ()
-
-        item = super().__getitem__(index)
-        if isinstance(index, slice):
-            item = self.__class__(item)
-        if not indices:
-            return item
-
-        return item.__getitem__(indices)
-
-    def append(self, item: _GridValue | Any):
-        if isinstance(item, Sequence) and not isinstance(item, self.__class__):
-            item = self.__class__(item)
-        super().append(item)
-
-    def __add__(self, other: Grid | Sequence):
-        if not isinstance(other, self.__class__):
-            other = self.__class__(other)
-        return super().__add__(other)
+def _flatten(value: _GridValue | Grid) -> tuple[tuple[int, ...], list]:
+    """Get the shape of the given nested sequences, and their items in one flat list, in row-major order."""
+    if isinstance(value, Grid):
+        offsets = _iter_offsets(value._offset, value._shape, value._strides)
+        return value.shape, [value._buffer[index] for index in offsets]
+
+    shape = []
+    level = [value]
+    while True:
+        first_item = level[0][0] if level[0] else None
+        if not _is_sequence(first_item):
+            break
+
+        dim = len(level[0])
+        next_level = []
+        for items in level:
+            if len(items) != dim:
+                raise GridError('Inconsistent lengths in given Grid value.')
+            _check_types(items)
+            next_level.extend(items)
+        shape.append(dim)
+        level = next_level
+
+    dim = len(level[0])
+    buffer = []
+    for items in level:
+        if len(items) != dim:
+            raise GridError('Inconsistent lengths in given Grid value.')
+        _check_types(items)
+        buffer.extend(items)
+    shape.append(dim)
+    return tuple(shape), buffer
+
+
+def _is_sequence(item: Any) -> bool:
+    """Whether the given item is a sequence to be turned into a dimension of a grid, rather than an item."""
+    return isinstance(item, (Sequence, Grid)) and not isinstance(item, str)
+
+
+def _check_types(items: Sequence):
+    """Check that all the given items are of the same type."""
+    if not items:
+        return
+
+    first_type = type(items[0])
+    if not all(type(item) is first_type for item in items):
+        raise TypeError('Inconsistent types in given Grid value.')
+
+
+def _iter_offsets(offset: int, shape: Sequence[int], strides: Sequence[int]):
+    """Iterate through the buffer indices of the items of a grid, in row-major order."""
+    if len(shape) == 1:
+        if shape[0]:
+            yield from range(offset, offset + shape[0] * strides[0], strides[0])
+        return
+
+    for index in range(shape[0]):
+        yield from _iter_offsets(offset + index * strides[0], shape[1:], strides[1:])
+
+
+class GridError(Exception):
+    pass
@@ -1,20 +1,28 @@
 from __future__ import annotations
 
+from array import array
 from collections.abc import Sequence, Callable, Iterable
 from contextlib import contextmanager
-from functools import cache, cached_property
-from typing import Any
+import io
+from itertools import permutations, product
+from typing import Any, TextIO
 
 from laby_api.char import Char
 from laby_api.grid import Grid
 from laby_api.node import Node
+from laby_api.packed import Header, open_packed, read_packed, write_packed
+from laby_api.render import (
+    iter_rows_strs, iter_window_rows, iter_window_strs, get_row_strs, get_slice_title, get_through_label,
+)
 from laby_api.router import Route
-from laby_api.dirs import Dirs, Pos
+from laby_api.dirs import Dirs, Pos, LETTERS, MASK_OPPOSITES, MASK_POPCOUNTS
+from laby_api.storage import Storage, get_flat_index, get_slab_slices
 
 
 class Laby:
     """Represents a labyrinth, composed of discrete cartesian positions called nodes, forming a grid.
-    Although primarily designed to be 2D, some parts work for all (strictly positive) dimensions.
+    Labys have from 1 to 4 dimensions, each node having a pair of simple dirs per dimension. The letters
+    format and row strs are 2D only, and labys of more dimensions are rendered 2D slice by 2D slice.
     """
     @classmethod
     def zeros(cls, shape: Sequence[int]):
@@ -24,53 +32,141 @@ class Laby:
     @classmethod
     def ones(cls, shape: Sequence[int]):
         """Return a laby of the requested shape made out of one-nodes, i.e. nodes that are entirely open."""
-        return cls.full(shape, lambda: Node.one())
+        return cls.full(shape, lambda: Node(Dirs.all(len(shape))))
 
     @classmethod
     def full(cls, shape: Sequence[int], fill_value: Callable[[], Node] | Node | Any):
         """Return a laby of the requested shape made out of nodes like the one given."""
-        def get_grid(shape_, fill_value_):
-            if not shape_:
-                try:
-                    return fill_value_()
-                except TypeError:
-                    if isinstance(fill_value_, Node):
-                        return fill_value_
+        try:
+            node = fill_value()
+        except TypeError:
+            node = fill_value if isinstance(fill_value, Node) else Node(fill_value)
 
-                    return Node(fill_value)
-
-            dim, *shape_ = shape_
-            return [get_grid(shape_, fill_value_) for _ in range(dim)]
-
-        return cls(Grid(get_grid(shape, fill_value)))
+        storage = Storage.full(shape, node.dirs.value, node.route_dirs.value)
+        if node.label:
+            storage.labels = dict.fromkeys(range(storage.size), node.label)
+        return cls(storage)
 
     @classmethod
-    def from_letters(cls, letters_grid: str):
+    def from_letters(cls, letters_grid: str | TextIO):
         """Return a laby corresponding to the grid given with the allowed direction letters.
 
-        :param letters_grid: String prescribing the laby. Each line represents a row of nodes,
-            separated by commas. Each node is prescribed through the letters representing its
+        The grid is decoded line by line, straight into the laby's storage, each node through a lookup
+        table. A text file is read incrementally, never holding more than one line besides the nodes.
+
+        :param letters_grid: String or text file prescribing the laby. Each line represents a row of
+            nodes, separated by commas. Each node is prescribed through the letters representing its
             allowed directions, from the first letters of 'left', 'right', 'up' and 'down'.
         """
-        grid = Grid([[Node(Dirs.from_letters(letters.strip().lower())) for letters in row_letters.split(',')]
-                     for row_letters in letters_grid.splitlines()])
-        return cls(grid)
+        lines = letters_grid.splitlines() if isinstance(letters_grid, str) else letters_grid
+        dirs = array('B')
+        rows = 0
+        cols = None
+        for line in lines:
+            cells = line.rstrip('\r\n').split(',')
+            try:
+                row = array('B', map(_LETTERS_MASKS.__getitem__, cells))
+            except KeyError:
+                # Cells with other whitespace around them, upper case letters, or invalid ones.
+                row = array('B', (Dirs.from_letters(letters.strip().lower()).value for letters in cells))
+            dirs.extend(row)
+            if cols is None:
+                cols = len(cells)
+            elif len(cells) != cols:
+                raise LabyError('Inconsistent row lengths in given letters.')
+            rows += 1
+
+        return cls(Storage((rows, cols or 0), dirs))
+
+    def to_letters(self, file: TextIO | None = None) -> str | None:
+        """Get the grid of allowed direction letters prescribing this laby, as accepted by from_letters.
+
+        :param file: Text file to write the grid to, row by row as they are encoded. If not given, the
+            grid is returned as a string instead.
+        """
+        if len(self.shape) != 2:
+            raise LabyError('Only 2D labys can be given as letters.')
+
+        if file is None:
+            file = io.StringIO()
+            self.to_letters(file)
+            return file.getvalue()
+
+        rows, cols = self.shape
+        dirs = self._storage.dirs
+        for i in range(rows):
+            file.write(', '.join(map(_MASKS_LETTERS.__getitem__, dirs[i * cols:(i + 1) * cols])))
+            file.write('\n')
 
     @classmethod
     def from_dirs(cls, dirs: Sequence[Sequence[Dirs]]):
         """Return a laby corresponding to the grid given with the allowed directions."""
-        grid = Grid([[Node(dir_) for dir_ in dirs_row] for dirs_row in dirs])
-        return cls(grid)
+        shape = (len(dirs), len(dirs[0]) if dirs else 0)
+        if any(len(dirs_row) != shape[1] for dirs_row in dirs):
+            raise LabyError('Inconsistent row lengths in given dirs.')
+
+        storage = Storage(shape, array('B', [dir_.value for dirs_row in dirs for dir_ in dirs_row]))
+        return cls(storage)
 
-    def __init__(self, grid: Grid[Grid[Node]]):
-        self._grid = grid
-        """The grid of nodes."""
+    @classmethod
+    def open(cls, path: str, *, writable: bool = False):
+        """Return the laby saved in the given packed file, memory-mapped rather than loaded. Nodes are read
+        from the mapped file on access, so that opening is instant whatever the size of the laby, and the
+        file is shared through the page cache between all the processes opening it.
+
+        :param path: The path of the file, as written by Laby.save.
+        :param writable: Whether modifications of the laby are written through to the file.
+        """
+        return cls._from_packed(*open_packed(path, writable=writable))
+
+    @classmethod
+    def from_bytes(cls, data: bytes):
+        """Return the laby given in the packed binary format, as written by Laby.save or Laby.to_bytes."""
+        return cls._from_packed(*read_packed(data))
+
+    @classmethod
+    def _from_packed(cls, header: Header, storage: Storage):
+        """Return a laby of the given packed storage, set up as described by its header."""
+        laby = cls(storage, enforce_walls=False)
+        if header.start is not None:
+            laby.start = header.start
+        if header.finish is not None:
+            laby.finish = header.finish
+        laby.generator = header.generator
+        laby.seed = header.seed
+        return laby
+
+    def __init__(self, storage: Storage, *, enforce_walls: bool = True):
+        """
+        :param storage: The flat storage of the nodes.
+        :param enforce_walls: Whether to make the outermost nodes into walls.
+        """
+        self._storage = storage
+        """The flat storage of the nodes."""
         self._start = None
         """The start position in the laby."""
         self._finish = None
         """The finish position in the laby."""
-
-        self._enforce_walls()
+        self._validation: tuple[int, list[Pos]] | None = None
+        """The dirs version of the storage when last validated, with the incompatible positions found."""
+        self.generator: str | None = None
+        """The name of the algorithm this laby was generated with, if known."""
+        self.seed: int | None = None
+        """The seed this laby was generated with, if known."""
+        self._rows_strs: list[tuple[str, str]] | None = None
+        """The strs of each row of nodes as last rendered, and of the row closing the laby, once cached, see
+        render_changes."""
+        self._dirty_rows: set[int] = set()
+        """The rows of nodes modified since they were last rendered, while caching their strs."""
+        self._rendered_dirs_version = -1
+        """The dirs version of the storage the cached strs account for."""
+        self._rendered_route_version = -1
+        """The route version of the storage the cached strs account for."""
+        self._changes: dict[int, str] = {}
+        """The visual rows changed since last given by render_changes, by index among the strs."""
+
+        if enforce_walls:
+            self._enforce_walls()
 
     @property
     def start(self) -> Pos:
@@ -78,10 +174,10 @@ class Laby:
         return self._start
 
     @start.setter
-    def start(self, indices: Sequence[int, int]):
+    def start(self, indices: Sequence[int, ...]):
         """The start position in the laby."""
         self._start = Pos(indices)
-        self._grid[self._start].label = Char.START
+        self._set_label(self._start, Char.START)
 
     @property
     def finish(self) -> Pos:
@@ -89,34 +185,27 @@ class Laby:
         return self._finish
 
     @finish.setter
-    def finish(self, indices: Sequence[int, int]):
+    def finish(self, indices: Sequence[int, ...]):
         """The finish position in the laby."""
         self._finish = Pos(indices)
-        self._grid[self._finish].label = Char.FINISH
+        self._set_label(self._finish, Char.FINISH)
 
     def __getitem__(self, indices: Sequence[int, ...] | int) -> Node:
         """Get a node in the laby from its position.
 
         Warning: you cannot get a sub-grid through this method.
         """
-        node = self._grid[indices]
-        if not isinstance(node, Node):
+        if isinstance(indices, int) or len(indices) < len(self.shape):
             raise IndexError('Not enough indices to get a specific Node (cannot get sub-grids).')
 
-        return node
+        return Node.view(self._storage, self._storage.index(indices))
 
     def _enforce_walls(self):
         """Make the outermost nodes into walls, i.e. remove their outward directions."""
-        for i, row in enumerate(self._grid):
-            for j, node in enumerate(row):
-                if i == 0:
-                    node.dirs &= ~Dirs.UP
-                if i == self._shape[0] - 1:
-                    node.dirs &= ~Dirs.DOWN
-                if j == 0:
-                    node.dirs &= ~Dirs.LEFT
-                if j == self._shape[1] - 1:
-                    node.dirs &= ~Dirs.RIGHT
+        storage = self._storage
+        masks = int.from_bytes(storage.dirs.tobytes(), 'little') & int.from_bytes(storage.inward_dirs, 'little')
+        storage.dirs[:] = array('B', masks.to_bytes(storage.size, 'little'))
+        storage.dirs_version += 1
 
     def write_all_nodes(self, dirs: Dirs, *, do_walls=True):
         """Write allowed directions or route directions for all nodes.
@@ -124,30 +213,136 @@ class Laby:
         :param dirs: The new directions.
         :param do_walls: Whether to write directions (creating walls), or else route directions.
         """
-        for row in self._grid:
-            for node in row:
-                if do_walls:
-                    node.dirs = dirs
-                else:
-                    node.route_dirs = dirs
-
-    def write(self, route: Route, *, do_walls=True):
+        masks = array('B', (dirs.value, )) * self._storage.size
+        if do_walls:
+            self._storage.dirs[:] = masks
+            self._storage.dirs_version += 1
+        else:
+            self._storage.route_dirs[:] = masks
+            self._storage.route_version += 1
+        if self._rows_strs is not None:
+            self._dirty_rows.update(range(self.shape[0]))
+
+    def write(self, route: Iterable[Route], *, do_walls=True):
         """Write allowed directions or route directions from a route object.
 
-        :param route: Route used to prescribe directions.
+        :param route: Route used to prescribe directions, or any other iterable of route points.
         :param do_walls: Whether to write directions (creating walls), or else route directions.
         """
+        storage = self._storage
+        strides, offsets, inward_dirs = storage.strides, storage.offsets, storage.inward_dirs
+        layer = storage.dirs if do_walls else storage.route_dirs
+        dirty_rows = self._dirty_rows if self._rows_strs is not None else None
+        is_rendered_version = (
+            self._rendered_dirs_version == storage.dirs_version
+            if do_walls else self._rendered_route_version == storage.route_version
+        )
+        cols = self.shape[-1]
         for route_point in route:
-            if not route_point.dir:
-                continue
-
-            node = self._grid[route_point.pos]
-            neighbors = self._get_neighbors(route_point.pos)
-            if do_walls:
-                node.dirs |= route_point.dir
-                neighbors[route_point.dir].dirs |= route_point.dir.opposite()
+            if isinstance(route_point, Route) and route_point.strides == strides:
+                mask = route_point.dir_mask
+                if not mask:
+                    continue
+                flat_index = route_point.flat_index
             else:
-                node.route_dirs |= route_point.dir
+                mask = route_point.dir.value
+                if not mask:
+                    continue
+                flat_index = storage.index(route_point.pos)
+
+            layer[flat_index] |= mask
+            # Steps leading out of the grid, or along several axes at once, have no neighbor to open towards.
+            if do_walls and MASK_POPCOUNTS[mask] == 1 and inward_dirs[flat_index] & mask == mask:
+                layer[flat_index + offsets[mask]] |= MASK_OPPOSITES[mask]
+            if dirty_rows is not None:
+                dirty_rows.add(flat_index // cols)
+        if do_walls:
+            storage.dirs_version += 1
+            if is_rendered_version:
+                self._rendered_dirs_version = storage.dirs_version
+        else:
+            storage.route_version += 1
+            if is_rendered_version:
+                self._rendered_route_version = storage.route_version
+
+    def validate(self):
+        """Check that the allowed directions of all pairs of neighboring nodes are symmetrical, and that no
+        node is open towards the outside of the laby.
+
+        All the nodes are checked at once, through bitwise operations on whole layers of direction bits.
+        The result is cached until the allowed directions are modified.
+
+        :raise IncompatibleNeighborsError: If some nodes are incompatible with their neighbors.
+        """
+        dirs_version = self._storage.dirs_version
+        if self._validation is None or self._validation[0] != dirs_version:
+            self._validation = dirs_version, self._get_incompatible_positions()
+
+        positions = self._validation[1]
+        if positions:
+            raise IncompatibleNeighborsError(positions)
+
+    def _get_incompatible_positions(self) -> list[Pos]:
+        """Get the positions of the nodes incompatible with their next neighbor along some axis, or open
+        towards the outside of the laby.
+        """
+        storage = self._storage
+        shape, strides, size = storage.shape, storage.strides, storage.size
+        if not size:
+            return []
+
+        masks = storage.dirs.tobytes()
+        incompatible = 0
+        ndim = len(shape)
+        for axis, stride in enumerate(strides):
+            backward_bit_index = 2 * (ndim - 1 - axis)
+            forward = bytearray(masks.translate(_BIT_ONES[backward_bit_index + 1]))
+            backward = bytearray(masks.translate(_BIT_ONES[backward_bit_index]))
+            # The nodes of the first slab open backwards are open outwards, marked with a 2 that the comparison
+            # keeps, rather than compared to the last nodes of the previous block. Those of the last slab open
+            # forwards are compared to nothing, and thus marked by the comparison itself.
+            outward_table = _OUTWARD_TABLES[backward_bit_index]
+            for slab in get_slab_slices(shape, axis, 0):
+                forward[slab] = masks[slab].translate(outward_table)
+                backward[slab] = bytes(len(forward[slab]))
+            incompatible |= int.from_bytes(forward, 'little') ^ int.from_bytes(backward, 'little') >> 8 * stride
+
+        incompatible_bytes = incompatible.to_bytes(size, 'little').translate(_NONZERO_ONES)
+        positions = []
+        flat_index = incompatible_bytes.find(1)
+        while flat_index != -1:
+            positions.append(Pos(storage.indices(flat_index)))
+            flat_index = incompatible_bytes.find(1, flat_index + 1)
+        return positions
+
+    def save(self, path: str, *, do_route: bool | None = None):
+        """Save this laby to a packed binary file: a header with the shape, start, finish, generator and seed,
+        then the allowed directions of each node on 4 bits, then optionally the route directions likewise.
+
+        :param path: The path of the file.
+        :param do_route: Whether to save the route directions. By default, only if some route is traced.
+        """
+        with open(path, 'wb') as file:
+            write_packed(file, self._get_header(do_route), self._storage)
+
+    def to_bytes(self, *, do_route: bool | None = None) -> bytes:
+        """Get this laby in the packed binary format of Laby.save.
+
+        :param do_route: Whether to include the route directions. By default, only if some route is traced.
+        """
+        file = io.BytesIO()
+        write_packed(file, self._get_header(do_route), self._storage)
+        return file.getvalue()
+
+    def _get_header(self, do_route: bool | None) -> Header:
+        """Get the header describing this laby in the packed binary format."""
+        storage = self._storage
+        if do_route is None:
+            do_route = storage.route_dirs.tobytes().count(0) != storage.size
+        return Header(
+            self.shape, start=self._start, finish=self._finish, generator=self.generator, seed=self.seed,
+            has_route=do_route,
+        )
 
     @contextmanager
     def reversed(self):
@@ -162,71 +357,292 @@ class Laby:
 
     @property
     def strs(self) -> Iterable[str]:
-        """The strs visually representing this laby, one per visual row."""
-        for i, row in enumerate(self._display_grid):
-            for strs in zip(*self._get_row_node_strs(i, row)):
-                yield ''.join(strs)
-
-    def _get_row_node_strs(self, i: int, row: Grid[Node]) -> Iterable[Iterable[str]]:
-        """Get the strs visually representing the given row, one iterable per node."""
-        for j, node in enumerate(row):
-            indices = Pos((i, j))
-            neighbors = self._get_neighbors(indices)
-            node.check_neighbors(neighbors)
-            yield node.strs(neighbors)
+        """The strs visually representing this laby, one per visual row. With more than 2 dimensions, each 2D
+        slice is given in turn, after a line telling its indices along the leading dimensions. Once cached, see
+        render_changes, only the rows modified since the last render are rendered again, and the changes are
+        still given by the next call to render_changes.
+        """
+        self.validate()
+        if self._rows_strs is not None:
+            self._update_rows_strs()
+            return [str_ for row_strs in self._rows_strs for str_ in row_strs]
+
+        if len(self.shape) <= 2:
+            return self.slice_strs(())
+
+        return self._iter_slices_strs()
+
+    def _iter_slices_strs(self) -> Iterable[str]:
+        """Get the strs visually representing all the 2D slices of this laby, each one after its indices."""
+        for leading_indices in product(*map(range, self.shape[:-2])):
+            yield get_slice_title(leading_indices)
+            yield from self.slice_strs(leading_indices)
+
+    def slice_strs(self, leading_indices: Sequence[int]) -> Iterable[str]:
+        """Get the strs visually representing a 2D slice of this laby, one per visual row.
+
+        Nodes open along the leading dimensions are labelled with the letters of those directions, capitalized
+        where a route goes, see Dirs.from_letters.
+
+        :param leading_indices: The indices of the slice along all the dimensions but the last two.
+        """
+        self.validate()
+        storage = self._storage
+        ndim = len(self.shape)
+        if len(leading_indices) != max(ndim - 2, 0):
+            raise IndexError(f'Expected {max(ndim - 2, 0)} leading indices, got {len(leading_indices)}.')
+
+        rows, cols = ((1, ) + self.shape)[-2:]
+        base = get_flat_index(leading_indices, storage.strides)
+        labels = {}
+        for flat_index, label in storage.labels.items():
+            indices = storage.indices(flat_index)
+            if indices[:-2] == tuple(leading_indices):
+                labels[((0, ) + indices)[-2:]] = label
+
+        def iter_rows(layer: array) -> Iterable[bytes]:
+            """Iterate through the rows of the slice in the given layer, keeping only the dirs shown in 2D."""
+            for i in range(rows):
+                yield layer[base + i * cols:base + (i + 1) * cols].tobytes().translate(_PLANAR)
+
+        if ndim > 2:
+            for i in range(rows):
+                row_start = base + i * cols
+                for j, mask in enumerate(storage.dirs[row_start:row_start + cols]):
+                    if mask & ~0xF and (i, j) not in labels:
+                        labels[i, j] = get_through_label(mask, storage.route_dirs[row_start + j])
+
+        return iter_rows_strs(
+            iter_rows(storage.dirs), route_rows=iter_rows(storage.route_dirs), labels=labels, check=False,
+        )
+
+    def render_window(
+            self, rows: range | slice, cols: range | slice, leading_indices: Sequence[int] = (),
+    ) -> Iterable[str]:
+        """Get the strs visually representing a window of this laby, or of one of its 2D slices, one per visual
+        row. Its borders are drawn from the nodes just around it, and only those and the nodes of the window
+        are read, so the cost is proportional to the area of the window rather than to the size of the laby.
+        The nodes are not validated, see validate.
+
+        :param rows: The rows of the window, as a range or a slice with a step of 1.
+        :param cols: The columns of the window, likewise.
+        :param leading_indices: The indices of the slice along all the dimensions but the last two.
+        """
+        storage = self._storage
+        ndim = len(self.shape)
+        if len(leading_indices) != max(ndim - 2, 0):
+            raise IndexError(f'Expected {max(ndim - 2, 0)} leading indices, got {len(leading_indices)}.')
+
+        shape = ((1, ) + self.shape)[-2:]
+        rows, cols = (
+            range(dim)[indices] if isinstance(indices, slice) else indices for indices, dim in zip((rows, cols), shape)
+        )
+        for indices, dim in zip((rows, cols), shape):
+            if indices.step != 1:
+                raise LabyError(f'Windows cannot skip nodes, got a step of {indices.step}.')
+            if not 0 <= indices.start <= indices.stop <= dim:
+                raise IndexError(f'Window {indices} out of range for a dimension of {dim}.')
+
+        base = get_flat_index(leading_indices, storage.strides)
+        labels = {}
+        for flat_index, label in storage.labels.items():
+            indices = (0, ) + storage.indices(flat_index)
+            if indices[1:-2] == tuple(leading_indices) and indices[-2] in rows and indices[-1] in cols:
+                labels[indices[-2] - rows.start + 1, indices[-1] - cols.start + 1] = label
+
+        if ndim > 2:
+            for i in rows:
+                row_start = base + i * shape[1]
+                for j in cols:
+                    mask = storage.dirs[row_start + j]
+                    window_pos = (i - rows.start + 1, j - cols.start + 1)
+                    if mask & ~0xF and window_pos not in labels:
+                        labels[window_pos] = get_through_label(mask, storage.route_dirs[row_start + j])
+
+        def iter_rows(layer: array, is_route: bool) -> Iterable[bytes]:
+            """Iterate through the rows of the window and its margin in the given layer, keeping only the dirs
+            shown in 2D.
+            """
+            for row in iter_window_rows(layer, shape, rows, cols, base=base, is_route=is_route):
+                yield row.translate(_PLANAR) if ndim > 2 else row
+
+        return iter_window_strs(
+            iter_rows(storage.dirs, False), route_rows=iter_rows(storage.route_dirs, True), labels=labels,
+        )
+
+    def render_to(self, file: TextIO):
+        """Write the strs visually representing this laby to the given text file, one line per visual row,
+        as they are produced. This never holds the whole representation in memory.
+        """
+        for str_ in self.strs:
+            file.write(str_)
+            file.write('\n')
+
+    def row_strs(self, i: int) -> Iterable[str]:
+        """Get the strs visually representing the given row of nodes, one per visual row.
+
+        :param i: Index of the row. The one past the last row gives the strs closing the laby.
+        """
+        if len(self.shape) != 2:
+            raise LabyError('Row strs are only available for 2D labys, see slice_strs.')
+
+        self.validate()
+        return self._get_row_strs(i, self._get_rows_labels().get(i, {}))
+
+    def render_changes(self) -> list[tuple[int, str]]:
+        """Render again the rows of nodes modified since the last render, and get the visual rows which
+        changed, as their index among the strs and their new str. This gives minimal updates for a display
+        redrawn after each modification.
+
+        The first call renders all the rows and caches their strs, giving all the visual rows. From then on,
+        writing routes or directions, and setting the start or finish, mark the rows they touch as modified.
+        Modifications made otherwise, for instance through node views, make all the rows render again. Rendering
+        the strs in between does not consume the changes.
+        """
+        if len(self.shape) != 2:
+            raise LabyError('Cached strs are only available for 2D labys.')
+
+        self.validate()
+        if self._rows_strs is None:
+            self._rows_strs = [('', '')] * (self.shape[0] + 1)
+        self._update_rows_strs()
+        changes = sorted(self._changes.items())
+        self._changes.clear()
+        return changes
+
+    def _update_rows_strs(self):
+        """Render again the cached strs of the rows of nodes modified since they were last rendered, recording
+        the visual rows which changed. The laby must be validated.
+        """
+        storage = self._storage
+        rows = self.shape[0]
+        dirty_rows = self._dirty_rows
+        if (
+                self._rendered_dirs_version != storage.dirs_version
+                or self._rendered_route_version != storage.route_version
+        ):
+            dirty_rows.update(range(rows))
+        self._rendered_dirs_version = storage.dirs_version
+        self._rendered_route_version = storage.route_version
+
+        # The strs of a row depend on the rows above and below it.
+        rows_to_render = sorted({
+            neighbor_i for i in dirty_rows for neighbor_i in (i - 1, i, i + 1) if 0 <= neighbor_i <= rows
+        })
+        dirty_rows.clear()
+        if not rows_to_render:
+            return
+
+        rows_labels = self._get_rows_labels()
+        changes = self._changes
+        for i in rows_to_render:
+            row_strs = self._get_row_strs(i, rows_labels.get(i, {}))
+            for visual_i, (str_, previous_str) in enumerate(zip(row_strs, self._rows_strs[i]), 2 * i):
+                if str_ != previous_str:
+                    changes[visual_i] = str_
+            self._rows_strs[i] = row_strs
+
+    def _set_label(self, pos: Pos, label: str):
+        """Set the label of the node at the given position, marking its row as modified if the strs are
+        cached.
+        """
+        storage = self._storage
+        is_rendered_version = self._rendered_route_version == storage.route_version
+        self[pos].label = label
+        if self._rows_strs is not None and is_rendered_version:
+            self._dirty_rows.add(storage.index(pos) // self.shape[-1])
+            self._rendered_route_version = storage.route_version
+
+    def _get_rows_labels(self) -> dict[int, dict[int, str]]:
+        """Get the labels of this 2D laby, indexed by row, then by column."""
+        storage = self._storage
+        rows_labels = {}
+        for flat_index, label in storage.labels.items():
+            label_i, label_j = storage.indices(flat_index)
+            rows_labels.setdefault(label_i, {})[label_j] = label
+        return rows_labels
+
+    def _get_row_strs(self, i: int, row_labels: dict[int, str]) -> tuple[str, str]:
+        """Get the strs visually representing the given row of nodes of this 2D laby, without validating it.
+
+        :param i: Index of the row. The one past the last row gives the strs closing the laby.
+        :param row_labels: The labels of the row, indexed by column.
+        """
+        rows, cols = self.shape
+        storage = self._storage
+
+        def get_row(layer: array, i_: int) -> array | None:
+            """Get the requested row of the given layer, if it is inside the laby."""
+            return layer[i_ * cols:(i_ + 1) * cols] if 0 <= i_ < rows else None
+
+        zeros = bytes(cols)
+        return get_row_strs(
+            get_row(storage.dirs, i - 1), get_row(storage.route_dirs, i - 1) or zeros,
+            get_row(storage.dirs, i), get_row(storage.route_dirs, i) or zeros,
+            get_row(storage.route_dirs, i + 1) or zeros,
+            row_labels,
+            check=False,
+        )
 
     @property
-    def _display_grid(self) -> Grid[Grid[Node]]:
-        """A display-specific grid of nodes, with additional ones to properly draw exterior walls."""
-        display_grid = self._grid + [[Node.virtual(Dirs.UP) for _ in range(self._shape[1])]]
-        display_grid = Grid([row + [Node.virtual(Dirs.LEFT)] for row in display_grid])
-        display_grid[self._shape].dirs |= Dirs.ALL
-        return display_grid
-
-    @cache
-    def _get_neighbors(self, indices: Pos) -> dict[Dirs, Node]:
-        """Get the neighbors of the node at the given position, indexed by direction."""
-
-        def get_neighbor(indices_: Pos) -> Node:
-            i_, j_ = indices_
-            wall_dirs = Dirs.NONE
-            if i_ < 0:
-                wall_dirs |= Dirs.DOWN
-            elif i_ >= max_i:
-                wall_dirs |= Dirs.UP
-            if j_ < 0:
-                wall_dirs |= Dirs.RIGHT
-            elif j_ >= max_j:
-                wall_dirs |= Dirs.LEFT
-
-            if wall_dirs:
-                if wall_dirs & Dirs.H and wall_dirs & Dirs.V:
-                    wall_dirs &= Dirs.NONE
-                return Node.virtual(wall_dirs)
-
-            return self._grid[i_, j_]
-
-        max_i, max_j = self._shape
-        return {
-            Dirs.LEFT: get_neighbor(indices + Dirs.LEFT),
-            Dirs.RIGHT: get_neighbor(indices + Dirs.RIGHT),
-            Dirs.UP: get_neighbor(indices + Dirs.UP),
-            Dirs.DOWN: get_neighbor(indices + Dirs.DOWN),
-        }
-
-    @cached_property
-    def _shape(self) -> tuple[int, ...]:
-        """The shape of the laby, i.e. its dimensions."""
-        def get_shape(grid) -> tuple[int, ...]:
-            try:
-                sub_grid = grid[0]
-            except TypeError:
-                return ()
+    def _nodes_grid(self) -> Grid:
+        """A grid of views on all the nodes of the laby."""
+        nodes = [Node.view(self._storage, flat_index) for flat_index in range(self._storage.size)]
+        return Grid.from_buffer(nodes, self.shape)
 
-            return len(grid), *get_shape(sub_grid)
+    @property
+    def storage(self) -> Storage:
+        """The flat storage of the nodes, for low-level algorithms working directly on direction masks."""
+        return self._storage
 
-        return get_shape(self._grid)
+    @property
+    def shape(self) -> tuple[int, ...]:
+        """The shape of the laby, i.e. its dimensions."""
+        return self._storage.shape
 
     def __repr__(self) -> str:
         """Get a simple, abstract representation of the laby for debugging."""
-        return f'{self.__class__.__name__}({self._grid})'
+        return f'{self.__class__.__name__}({self._nodes_grid})'
+
+
+class LabyError(Exception):
+    pass
+
+
+class IncompatibleNeighborsError(LabyError):
+    """Exception raised when some nodes are incompatible with their neighbors."""
+    def __init__(self, positions: list[Pos]):
+        self.positions = positions
+        """The positions of the nodes incompatible with their next neighbor along some axis, or open towards the
+        outside of the laby."""
+
+        shown_positions = ', '.join(str(tuple(pos)) for pos in positions[:10])
+        more = f' and {len(positions) - 10} more' if len(positions) > 10 else ''
+        super().__init__(f'Incompatible neighboring nodes at: {shown_positions}{more}.')
+
+
+_BIT_ONES = tuple(bytes(mask >> bit_index & 1 for mask in range(256)) for bit_index in range(8))
+"""Translation tables from direction masks to 1 where the simple dir of the given bit index is allowed, else 0."""
+
+_OUTWARD_TABLES = tuple(
+    bytes(mask >> bit_index + 1 & 1 | (mask >> bit_index & 1) << 1 for mask in range(256)) for bit_index in range(8)
+)
+"""Translation tables from direction masks to 1 where the forward dir of the given backward dir's bit index is
+allowed, | 2 where the backward dir is allowed."""
+
+_NONZERO_ONES = bytes(1 if byte else 0 for byte in range(256))
+"""Translation table from bytes to 1 where they are not 0."""
+
+_PLANAR = bytes(mask & 0xF for mask in range(256))
+"""Translation table from direction masks to those of their simple dirs shown in 2D."""
+
+_MASKS_LETTERS = tuple(''.join(letter for letter, dir_ in zip(LETTERS, Dirs.seq()) if mask & dir_.value)
+                       for mask in range(16))
+"""The letters of the allowed directions, indexed by direction mask."""
+
+_LETTERS_MASKS = {
+    f'{space}{"".join(permutation)}': mask
+    for mask, letters in enumerate(_MASKS_LETTERS) for permutation in permutations(letters) for space in ('', ' ')
+}
+"""The direction masks, indexed by the letters of the allowed directions, in any order, possibly after the
+single space following commas in letter grids."""
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from array import array
+from collections.abc import Sequence
+from itertools import compress
+
+from laby_api.dirs import MASK_MEMBERS
+from laby_api.laby import Laby
+from laby_api.storage import Storage
+
+
+UNREACHED = -1
+"""The distance of the nodes unreachable from the source, in distance fields."""
+
+_DEGREES = bytes(bin(mask).count('1') for mask in range(256))
+"""Translation table from direction masks to their number of simple dirs."""
+
+_CORRIDOR_ENDS = bytes(degree != 2 for degree in _DEGREES)
+"""Translation table from direction masks to 1 where a node ends corridors, i.e. does not just pass through."""
+
+
+class Metrics:
+    """Measures of the difficulty of a laby, from its distance fields. Those about corridors and the longest path
+    are exact for perfect labys, and follow the breadth-first trees of the distance fields otherwise.
+    """
+    __slots__ = (
+        'reachable', 'solution_len', 'diameter', 'dead_ends', 'branching',
+        'corridors', 'corridor_len_mean', 'corridor_len_max',
+    )
+
+    def __init__(self):
+        self.reachable = 0
+        """The number of nodes reachable from the start, itself included."""
+        self.solution_len: int | None = None
+        """The number of steps of a shortest route from the start to the finish, if there is one."""
+        self.diameter = 0
+        """The number of steps of the longest shortest route between two nodes reachable from the start."""
+        self.dead_ends = 0
+        """The number of nodes with a single allowed direction."""
+        self.branching: list[int] = []
+        """The number of nodes by number of allowed directions, from 0 to 2 per dimension."""
+        self.corridors = 0
+        """The number of corridors, i.e. of paths between two nodes not having exactly two allowed directions,
+        through nodes having exactly two."""
+        self.corridor_len_mean = 0.0
+        """The mean number of steps of the corridors."""
+        self.corridor_len_max = 0
+        """The largest number of steps of a corridor."""
+
+    def as_dict(self) -> dict[str, int | float | list[int] | None]:
+        """Get the measures by name, for export."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        """Get a representation of the measures for debugging."""
+        measures = ', '.join(f'{name}={value}' for name, value in self.as_dict().items())
+        return f'{self.__class__.__name__}({measures})'
+
+
+def get_distances(laby: Laby, source: Sequence[int] | None = None) -> array:
+    """Get the distance field of the given laby: the number of steps of a shortest route from the source to each
+    node, indexed by flat index, or UNREACHED. This is a single breadth-first search over the whole laby.
+
+    :param source: The position the distances are measured from. Defaults to the start of the laby, or else its
+        first node.
+    """
+    laby.validate()
+    storage = laby.storage
+    if source is None:
+        source = laby.start
+    distances, _ = _search(storage, storage.index(source) if source is not None else 0)
+    return distances
+
+
+def get_metrics(laby: Laby, distances: array | None = None) -> Metrics:
+    """Measure the difficulty of the given laby.
+
+    The counts of allowed directions are taken over whole layers at once. Besides the distance field from the
+    start, a single other breadth-first search is made, from the node farthest from the start, giving the
+    diameter, and the corridors along the way.
+
+    :param distances: The distance field from the start, as given by get_distances, if already known.
+    """
+    laby.validate()
+    storage = laby.storage
+    metrics = Metrics()
+    if not storage.size:
+        return metrics
+
+    if distances is None:
+        distances = get_distances(laby)
+    metrics.reachable = storage.size - distances.count(UNREACHED)
+    if laby.finish is not None and distances[storage.index(laby.finish)] != UNREACHED:
+        metrics.solution_len = distances[storage.index(laby.finish)]
+
+    farthest_index = distances.index(max(distances))
+    farthest_distances, runs = _search(storage, farthest_index, do_runs=True)
+    metrics.diameter = max(farthest_distances)
+
+    masks = storage.dirs.tobytes()
+    degrees = masks.translate(_DEGREES)
+    metrics.dead_ends = degrees.count(1)
+    metrics.branching = [degrees.count(degree) for degree in range(2 * len(storage.shape) + 1)]
+
+    corridor_lens = [run for run in compress(runs, masks.translate(_CORRIDOR_ENDS)) if run]
+    if corridor_lens:
+        metrics.corridors = len(corridor_lens)
+        metrics.corridor_len_mean = sum(corridor_lens) / len(corridor_lens)
+        metrics.corridor_len_max = max(corridor_lens)
+    return metrics
+
+
+def _search(storage: Storage, source: int, *, do_runs: bool = False) -> tuple[array, array | None]:
+    """Search the given validated storage breadth first from the source, level by level.
+
+    :param do_runs: Whether to also record, for each node, the number of steps since the last node of its route
+        from the source not having exactly two allowed directions, i.e. since the start of its corridor.
+    :return: The distance field, and the runs if requested.
+    """
+    dirs, offsets = storage.dirs, storage.offsets
+    distances = array('i', [UNREACHED]) * storage.size
+    distances[source] = 0
+    runs = array('i', bytes(4 * storage.size)) if do_runs else None
+    degrees = _DEGREES
+
+    frontier = [source]
+    distance = 0
+    while frontier:
+        distance += 1
+        next_frontier = []
+        for index in frontier:
+            mask = dirs[index]
+            if do_runs:
+                run = runs[index] + 1 if degrees[mask] == 2 else 1
+            for bit in MASK_MEMBERS[mask]:
+                neighbor_index = index + offsets[bit]
+                if distances[neighbor_index] == UNREACHED:
+                    distances[neighbor_index] = distance
+                    next_frontier.append(neighbor_index)
+                    if do_runs:
+                        runs[neighbor_index] = run
+        frontier = next_frontier
+    return distances, runs
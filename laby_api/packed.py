@@ -0,0 +1,313 @@
+from __future__ import annotations
+
+from array import array
+from collections.abc import Sequence, Iterable
+from math import prod
+import mmap
+import struct
+from typing import BinaryIO
+
+from laby_api.storage import Storage
+
+
+MAGIC = b'LABY'
+VERSION = 1
+
+_HAS_ROUTE = 1
+_HAS_START = 2
+_HAS_FINISH = 4
+_HAS_SEED = 8
+
+_FIXED_HEADER = struct.Struct('<4sBBH')
+"""Magic, version, flags and number of dimensions."""
+
+_CHUNK_LEN = 1 << 20
+"""The number of nodes packed or unpacked at once when streaming whole layers."""
+
+_LOW_NIBBLES = bytes(byte & 0xF for byte in range(256))
+_HIGH_NIBBLES = bytes(byte >> 4 for byte in range(256))
+_TO_HIGH_NIBBLES = bytes((byte & 0xF) << 4 for byte in range(256))
+
+
+class PackedLayer:
+    """A layer of direction masks packed as 4 bits per node, two nodes per byte, the first one in the
+    low nibble. It behaves like the byte-per-node arrays of a storage, indexing and slicing giving
+    unpacked masks, so that it can back a storage directly, for instance over a memory-mapped file.
+    """
+    def __init__(self, buffer: mmap.mmap | bytearray, size: int, offset: int = 0):
+        """
+        :param buffer: The buffer holding the packed masks.
+        :param size: The number of nodes in the layer.
+        :param offset: The offset of the layer in the buffer, in bytes.
+        """
+        self._buffer = buffer
+        """The buffer holding the packed masks."""
+        self._size = size
+        """The number of nodes in the layer."""
+        self._offset = offset
+        """The offset of the layer in the buffer, in bytes."""
+
+        if len(buffer) < offset + get_packed_len(size):
+            raise PackedError('Buffer too short for the packed layer.')
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, index: int | slice) -> int | array:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._size)
+            if step != 1:
+                return array('B', (self[item_index] for item_index in range(start, stop, step)))
+            if start >= stop:
+                return array('B')
+
+            first_byte = self._offset + start // 2
+            unpacked = unpack(self._buffer[first_byte:self._offset + (stop + 1) // 2])
+            return array('B', unpacked[start % 2:start % 2 + stop - start])
+
+        index = self._check_index(index)
+        byte = self._buffer[self._offset + index // 2]
+        return byte >> 4 if index % 2 else byte & 0xF
+
+    def __setitem__(self, index: int | slice, value: int | Sequence[int]):
+        if isinstance(index, slice):
+            indices = range(*index.indices(self._size))
+            if len(value) != len(indices):
+                raise ValueError('Cannot resize a packed layer.')
+            if indices.step != 1 or not indices:
+                for item_index, item in zip(indices, value):
+                    self[item_index] = item
+                return
+
+            start, stop = indices.start, indices.stop
+            if start % 2:
+                self[start] = value[0]
+                start += 1
+            if stop % 2 and stop > start:
+                self[stop - 1] = value[-1]
+                stop -= 1
+            if start < stop:
+                values = bytes(value[start - indices.start:stop - indices.start])
+                self._buffer[self._offset + start // 2:self._offset + stop // 2] = pack(values)
+            return
+
+        index = self._check_index(index)
+        byte_index = self._offset + index // 2
+        byte = self._buffer[byte_index]
+        if index % 2:
+            self._buffer[byte_index] = byte & 0xF | (value & 0xF) << 4
+        else:
+            self._buffer[byte_index] = byte & 0xF0 | value & 0xF
+
+    def __iter__(self) -> Iterable[int]:
+        for chunk_start in range(0, self._size, _CHUNK_LEN):
+            yield from self[chunk_start:chunk_start + _CHUNK_LEN]
+
+    def tobytes(self) -> bytes:
+        """Get the unpacked masks, one byte per node."""
+        return unpack(self._buffer[self._offset:self._offset + get_packed_len(self._size)])[:self._size]
+
+    def _check_index(self, index: int) -> int:
+        """Get the given index as a positive one, if it is in range, else raise."""
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError('Packed layer index out of range.')
+        return index
+
+    def __repr__(self) -> str:
+        """Get a small representation of this layer for debugging."""
+        return f'{self.__class__.__name__}({self._size})'
+
+
+class Header:
+    """The header of a packed laby file: the shape, start and finish of the laby, and how it was generated."""
+    def __init__(
+            self, shape: Sequence[int], *,
+            start: Sequence[int] | None = None,
+            finish: Sequence[int] | None = None,
+            generator: str | None = None,
+            seed: int | None = None,
+            has_route: bool = False,
+    ):
+        self.shape: tuple[int, ...] = tuple(shape)
+        """The dimensions of the laby."""
+        self.start: tuple[int, ...] | None = tuple(start) if start is not None else None
+        """The start position in the laby, if any."""
+        self.finish: tuple[int, ...] | None = tuple(finish) if finish is not None else None
+        """The finish position in the laby, if any."""
+        self.generator: str | None = generator
+        """The name of the generation algorithm, if known."""
+        self.seed: int | None = seed
+        """The seed the laby was generated with, if known."""
+        self.has_route: bool = has_route
+        """Whether the file holds a route layer after the dirs layer."""
+
+    @property
+    def is_wide(self) -> bool:
+        """Whether the layers hold one byte per node, for the direction masks of more than 2 dimensions not
+        to fit in 4 bits.
+        """
+        return len(self.shape) > 2
+
+    def get_layer_len(self) -> int:
+        """Get the number of bytes of each layer."""
+        size = prod(self.shape)
+        return size if self.is_wide else get_packed_len(size)
+
+    def to_bytes(self) -> bytes:
+        """Get the binary representation of this header.
+
+        :raise PackedError: If the seed does not fit in a signed 64-bit integer.
+        """
+        if self.seed is not None and not -2 ** 63 <= self.seed < 2 ** 63:
+            raise PackedError(f'Seeds must fit in a signed 64-bit integer to be packed, got {self.seed}.')
+
+        ndim = len(self.shape)
+        flags = (
+            (_HAS_ROUTE if self.has_route else 0)
+            | (_HAS_START if self.start is not None else 0)
+            | (_HAS_FINISH if self.finish is not None else 0)
+            | (_HAS_SEED if self.seed is not None else 0)
+        )
+        generator = (self.generator or '').encode()
+        return b''.join([
+            _FIXED_HEADER.pack(MAGIC, VERSION, flags, ndim),
+            struct.pack(f'<{ndim}Q', *self.shape),
+            struct.pack(f'<{ndim}q', *(self.start or (0, ) * ndim)),
+            struct.pack(f'<{ndim}q', *(self.finish or (0, ) * ndim)),
+            struct.pack('<qH', self.seed or 0, len(generator)),
+            generator,
+        ])
+
+    @classmethod
+    def from_buffer(cls, buffer: bytes | mmap.mmap) -> tuple[Header, int]:
+        """Read a header at the beginning of the given buffer.
+
+        :return: The header, and its length in bytes.
+        """
+        try:
+            magic, version, flags, ndim = _FIXED_HEADER.unpack_from(buffer)
+            if magic != MAGIC:
+                raise PackedError('Not a packed laby file.')
+            if version != VERSION:
+                raise PackedError(f'Unsupported packed laby version: {version}.')
+
+            offset = _FIXED_HEADER.size
+            shape = struct.unpack_from(f'<{ndim}Q', buffer, offset)
+            offset += 8 * ndim
+            start = struct.unpack_from(f'<{ndim}q', buffer, offset)
+            offset += 8 * ndim
+            finish = struct.unpack_from(f'<{ndim}q', buffer, offset)
+            offset += 8 * ndim
+            seed, generator_len = struct.unpack_from('<qH', buffer, offset)
+            offset += 10
+            generator = bytes(buffer[offset:offset + generator_len]).decode()
+            offset += generator_len
+        except struct.error:
+            raise PackedError('Truncated packed laby header.') from None
+
+        header = cls(
+            shape,
+            start=start if flags & _HAS_START else None,
+            finish=finish if flags & _HAS_FINISH else None,
+            generator=generator or None,
+            seed=seed if flags & _HAS_SEED else None,
+            has_route=bool(flags & _HAS_ROUTE),
+        )
+        return header, offset
+
+
+def write_packed(file: BinaryIO, header: Header, storage: Storage):
+    """Write a packed laby to the given binary file: the header, then the dirs layer, then the route layer
+    if the header says so. Layers are packed chunk by chunk, never copying them whole. Wide layers are
+    written as they are.
+    """
+    file.write(header.to_bytes())
+    layers = [storage.dirs, storage.route_dirs] if header.has_route else [storage.dirs]
+    for layer in layers:
+        for chunk_start in range(0, storage.size, _CHUNK_LEN):
+            chunk = layer[chunk_start:chunk_start + _CHUNK_LEN].tobytes()
+            file.write(chunk if header.is_wide else pack(chunk))
+
+
+def read_packed(data: bytes) -> tuple[Header, Storage]:
+    """Get the header of a packed laby held in memory, along with a storage of its unpacked layers."""
+    header, offset = Header.from_buffer(data)
+    size = prod(header.shape)
+    layer_len = header.get_layer_len()
+    if len(data) < offset + layer_len * (2 if header.has_route else 1):
+        raise PackedError('Truncated packed laby layers.')
+
+    def read_layer(layer_offset: int) -> array:
+        """Get the layer at the given offset, unpacked."""
+        layer = data[layer_offset:layer_offset + layer_len]
+        return array('B', layer if header.is_wide else unpack(layer)[:size])
+
+    dirs = read_layer(offset)
+    route_dirs = read_layer(offset + layer_len) if header.has_route else None
+    return header, Storage(header.shape, dirs, route_dirs)
+
+
+def open_packed(path: str, *, writable: bool = False) -> tuple[Header, Storage]:
+    """Memory-map a packed laby file, and get its header along with a storage served from the mapping.
+
+    Nothing is read besides the header: nodes are unpacked on access, and the pages of the file are shared
+    through the page cache by all the processes mapping it. Without a route layer in the file, routes are
+    kept in an anonymous mapping, which only takes memory where routes are traced. Wide layers are served
+    as memoryviews of the mapping.
+
+    :param path: The path of the file.
+    :param writable: Whether modifications of the laby are written through to the file.
+    """
+    with open(path, 'r+b' if writable else 'rb') as file:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+
+    try:
+        header, offset = Header.from_buffer(buffer)
+        size = prod(header.shape)
+        layer_len = header.get_layer_len()
+        if len(buffer) < offset + layer_len * (2 if header.has_route else 1):
+            raise PackedError('Truncated packed laby layers.')
+    except BaseException:
+        buffer.close()
+        raise
+
+    def get_layer(layer_buffer: mmap.mmap, layer_offset: int) -> PackedLayer | memoryview:
+        """Get the layer at the given offset of the given buffer, served from it."""
+        if header.is_wide:
+            return memoryview(layer_buffer)[layer_offset:layer_offset + size]
+        return PackedLayer(layer_buffer, size, layer_offset)
+
+    dirs = get_layer(buffer, offset)
+    if header.has_route:
+        route_dirs = get_layer(buffer, offset + layer_len)
+    else:
+        route_dirs = get_layer(mmap.mmap(-1, max(layer_len, 1)), 0)
+    return header, Storage(header.shape, dirs, route_dirs)
+
+
+def get_packed_len(size: int) -> int:
+    """Get the number of bytes of a packed layer of the given number of nodes."""
+    return (size + 1) // 2
+
+
+def pack(masks: bytes) -> bytes:
+    """Pack the given masks, one byte per node, into 4 bits per node."""
+    if len(masks) % 2:
+        masks += b'\0'
+    low, high = masks[0::2].translate(_LOW_NIBBLES), masks[1::2].translate(_TO_HIGH_NIBBLES)
+    return (int.from_bytes(low, 'little') | int.from_bytes(high, 'little')).to_bytes(len(low), 'little')
+
+
+def unpack(packed: bytes) -> bytearray:
+    """Unpack the given masks, packed as 4 bits per node, into one byte per node."""
+    packed = bytes(packed)
+    masks = bytearray(2 * len(packed))
+    masks[0::2] = packed.translate(_LOW_NIBBLES)
+    masks[1::2] = packed.translate(_HIGH_NIBBLES)
+    return masks
+
+
+class PackedError(Exception):
+    pass
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+from array import array
+from collections.abc import Sequence
+
+from laby_api.dirs import Pos, MASK_MEMBERS, MASK_OPPOSITES
+from laby_api.laby import Laby
+from laby_api.router import Router, Route
+from laby_api.storage import get_indices
+
+
+_DEPTH_SHIFT = 32
+"""The bit shift of the depth of a node in its key, above its flat index."""
+
+_INDEX_MASK = (1 << _DEPTH_SHIFT) - 1
+"""The bit mask of the flat index of a node in its key."""
+
+_BLOCK_LEN = 32
+"""The number of nodes per block of the depth-first order, whose minimum keys are indexed by the sparse tables.
+Ranges within blocks are scanned instead."""
+
+
+class PathIndex:
+    """An index of the paths through a perfect laby, i.e. one in which any two nodes are joined by exactly one
+    path, as generated ones are. It answers queries between any two positions without searching the laby.
+
+    The laby is seen as a tree rooted at its start, of which each node only records the direction of its
+    parent. The nodes are listed in depth-first order, as keys combining their depth and flat index, so that
+    the common ancestor of two nodes is the parent of the shallowest node after the first one, up to the
+    second one, in that order. Minimum keys over ranges of the order are found from sparse tables of the
+    minimum keys of blocks of nodes, which take linear memory, and from scanning the ends of the ranges.
+
+    Building the index takes linear time. Then the common ancestor and the distance of two positions take
+    constant time, and their route takes time linear in its length. Modifying the allowed directions of the
+    laby invalidates the index.
+    """
+    def __init__(self, laby: Laby):
+        """
+        :param laby: The perfect laby to index. Its start is the root of the tree, or else its first node.
+        :raise PathIndexError: If the laby is not perfect, i.e. it has loops or unreachable nodes.
+        """
+        laby.validate()
+        storage = laby.storage
+        self.shape: tuple[int, ...] = laby.shape
+        """The shape of the indexed laby."""
+        self._storage = storage
+        """The flat storage of the indexed laby."""
+        self._dirs_version = storage.dirs_version
+        """The dirs version of the storage when indexed."""
+        self._offsets = storage.offsets
+        """The flat index offsets corresponding to a step in each simple dir, indexed by its bit mask."""
+
+        size = storage.size
+        root = storage.index(laby.start) if laby.start is not None and size else 0
+        self._up_bits = bytearray(size)
+        """The bit mask of the simple dir from each node to its parent, 0 for the root, indexed by flat index."""
+        self._orders = array('i', [-1]) * size
+        """The position of each node in the depth-first order, indexed by flat index."""
+        self._keys = array('q')
+        """The key of each node in the depth-first order: its depth, shifted, with its flat index."""
+        self._tables: list[array] = []
+        """The sparse tables of minimum keys: at each level k, the minimum over 2**k blocks from each block."""
+
+        if size:
+            self._index_tree(root)
+            self._build_tables()
+
+    def _index_tree(self, root: int):
+        """Walk the tree depth first from its root, recording the parent of each node and the order."""
+        storage = self._storage
+        dirs, inward_dirs, offsets = storage.dirs, storage.inward_dirs, self._offsets
+        up_bits, orders, keys = self._up_bits, self._orders, self._keys
+        child_depth = 1 << _DEPTH_SHIFT
+
+        stack = [root]
+        while stack:
+            key = stack.pop()
+            index = key & _INDEX_MASK
+            orders[index] = len(keys)
+            keys.append(key)
+            child_key = key - index + child_depth
+            for bit in MASK_MEMBERS[dirs[index] & inward_dirs[index] & ~up_bits[index]]:
+                child_index = index + offsets[bit]
+                if up_bits[child_index] or child_index == root:
+                    raise PathIndexError(f'The laby has loops, at {get_indices(child_index, storage.strides)}.')
+
+                up_bits[child_index] = MASK_OPPOSITES[bit]
+                stack.append(child_key | child_index)
+
+        if len(keys) != storage.size:
+            raise PathIndexError(f'The laby has {storage.size - len(keys)} nodes unreachable from its root.')
+
+    def _build_tables(self):
+        """Build the sparse tables of the minimum keys of the blocks of the depth-first order."""
+        keys = self._keys
+        table = array('q', (min(keys[start:start + _BLOCK_LEN]) for start in range(0, len(keys), _BLOCK_LEN)))
+        self._tables.append(table)
+        n_blocks = len(table)
+        span = 1
+        while 2 * span <= n_blocks:
+            table = array('q', map(min, table[:-span], table[span:]))
+            self._tables.append(table)
+            span *= 2
+
+    def get_common_ancestor(self, pos: Sequence[int], other_pos: Sequence[int]) -> Pos:
+        """Get the position where the paths from the root to both given positions part, i.e. their lowest
+        common ancestor in the tree.
+        """
+        index, other_index = self._get_flat_indices(pos, other_pos)
+        return Pos(get_indices(self._get_common_ancestor_index(index, other_index), self._storage.strides))
+
+    def get_distance(self, pos: Sequence[int], other_pos: Sequence[int]) -> int:
+        """Get the number of steps of the path between the given positions."""
+        index, other_index = self._get_flat_indices(pos, other_pos)
+        ancestor_index = self._get_common_ancestor_index(index, other_index)
+        return self._get_depth(index) + self._get_depth(other_index) - 2 * self._get_depth(ancestor_index)
+
+    def get_route(self, start: Sequence[int], finish: Sequence[int]) -> Route:
+        """Get the route from the given start to the given finish, as given by solve: its last point, from which
+        the previous ones follow. The route is built by a sparse router, in time linear in its length.
+        """
+        start_index, finish_index = self._get_flat_indices(start, finish)
+        ancestor_index = self._get_common_ancestor_index(start_index, finish_index)
+        up_bits, offsets = self._up_bits, self._offsets
+
+        router = Router(pos=get_indices(start_index, self._storage.strides), shape=self.shape, sparse=True)
+        index = start_index
+        while index != ancestor_index:
+            bit = up_bits[index]
+            router.advance_mask(bit)
+            index += offsets[bit]
+
+        down_bits = []
+        index = finish_index
+        while index != ancestor_index:
+            bit = up_bits[index]
+            down_bits.append(MASK_OPPOSITES[bit])
+            index += offsets[bit]
+        for bit in reversed(down_bits):
+            router.advance_mask(bit)
+        return router.head
+
+    def _get_flat_indices(self, pos: Sequence[int], other_pos: Sequence[int]) -> tuple[int, int]:
+        """Get the flat indices of the given positions, checking that the index is still valid."""
+        storage = self._storage
+        if storage.dirs_version != self._dirs_version:
+            raise PathIndexError('The laby was modified since it was indexed.')
+
+        return storage.index(pos), storage.index(other_pos)
+
+    def _get_common_ancestor_index(self, index: int, other_index: int) -> int:
+        """Get the flat index of the lowest common ancestor of the given nodes."""
+        if index == other_index:
+            return index
+
+        orders = self._orders
+        low, high = sorted((orders[index], orders[other_index]))
+        shallowest_index = self._get_min_key(low + 1, high) & _INDEX_MASK
+        return shallowest_index + self._offsets[self._up_bits[shallowest_index]]
+
+    def _get_min_key(self, low: int, high: int) -> int:
+        """Get the minimum key over the given range of the depth-first order, both ends included."""
+        keys = self._keys
+        low_block, high_block = low // _BLOCK_LEN, high // _BLOCK_LEN
+        if high_block - low_block <= 1:
+            return min(keys[low:high + 1])
+
+        min_key = min(min(keys[low:(low_block + 1) * _BLOCK_LEN]), min(keys[high_block * _BLOCK_LEN:high + 1]))
+        first_block, last_block = low_block + 1, high_block - 1
+        level = (last_block - first_block + 1).bit_length() - 1
+        table = self._tables[level]
+        return min(min_key, table[first_block], table[last_block - (1 << level) + 1])
+
+    def _get_depth(self, index: int) -> int:
+        """Get the depth of the given node in the tree, i.e. its distance to the root."""
+        return self._keys[self._orders[index]] >> _DEPTH_SHIFT
+
+    def __repr__(self) -> str:
+        """Get a small representation of this index for debugging."""
+        return f'{self.__class__.__name__}({self.shape})'
+
+
+class PathIndexError(Exception):
+    pass
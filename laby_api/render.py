@@ -0,0 +1,334 @@
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Iterable, Sequence, Mapping
+from itertools import chain, repeat
+from typing import TextIO
+
+from laby_api.char import Char
+from laby_api.dirs import Dirs, LETTERS
+
+
+_LEFT, _RIGHT, _UP, _DOWN = (dir_.value for dir_ in Dirs.seq())
+_ALL = Dirs.ALL.value
+
+# Allowed directions of the virtual nodes around a laby, as used for display.
+_OUTSIDE_UP = _ALL & ~_DOWN
+_OUTSIDE_DOWN = _ALL & ~_UP
+_OUTSIDE_LEFT = _ALL & ~_RIGHT
+_OUTSIDE_RIGHT = _ALL & ~_LEFT
+
+_BIAS = 0.1
+
+NODE_STR_LEN = 1 + len(Char.H_SPACE)
+"""The number of chars of each node in the strs of a row: a corner and an edge, or an edge and a center."""
+
+_WINDOW_TAIL_LEN = 3
+"""The number of strs after those of a window, when rendering it with its margin: the middle str of the
+margin's last row, and the two strs closing the laby."""
+
+
+def iter_rows_strs(
+        rows: Iterable[Sequence[int]], *,
+        route_rows: Iterable[Sequence[int]] | None = None,
+        labels: Mapping[Sequence[int], str] | None = None,
+        start: Sequence[int] | None = None,
+        finish: Sequence[int] | None = None,
+        check: bool = True,
+) -> Iterable[str]:
+    """Get the strs visually representing a laby given row by row, one per visual row.
+
+    Only three rows are held at a time, so the rows can be produced lazily, for instance by
+    generators.generate_rows. Each visual row is built from precomputed glyph tables.
+
+    :param rows: The rows of the laby, as sequences of direction masks.
+    :param route_rows: The rows of route direction masks, if any.
+    :param labels: The labels of special nodes, indexed by position.
+    :param start: The start position in the laby, if it should be displayed.
+    :param finish: The finish position in the laby, if it should be displayed.
+    :param check: Whether to check that neighboring nodes are compatible, while rendering them.
+    """
+    rows_labels: dict[int, dict[int, str]] = {}
+    for pos, label in (labels or {}).items():
+        rows_labels.setdefault(pos[0], {})[pos[1]] = label
+    for pos, label in ((start, Char.START), (finish, Char.FINISH)):
+        if pos is not None:
+            rows_labels.setdefault(pos[0], {})[pos[1]] = label
+
+    rows = iter(rows)
+    route_rows = iter(route_rows) if route_rows is not None else repeat(None)
+    try:
+        row = next(rows)
+    except StopIteration:
+        return
+
+    zeros = bytes(len(row))
+    up_row = up_route_row = None
+    route_row = next(route_rows) or zeros
+    i = 0
+    while row is not None:
+        down_row = next(rows, None)
+        down_route_row = (next(route_rows) or zeros) if down_row is not None else zeros
+        yield from get_row_strs(
+            up_row, up_route_row, row, route_row, down_route_row, rows_labels.get(i, {}), check=check,
+        )
+        up_row, up_route_row = row, route_row
+        row, route_row = down_row, down_route_row
+        i += 1
+
+    yield from get_row_strs(up_row, up_route_row, None, zeros, zeros, {}, check=check)
+
+
+def iter_window_strs(
+        rows: Iterable[Sequence[int]], *,
+        route_rows: Iterable[Sequence[int]] | None = None,
+        labels: Mapping[Sequence[int], str] | None = None,
+) -> Iterable[str]:
+    """Get the strs visually representing a window of a larger laby, one per visual row. The rows are given
+    with a margin of one node all around the window, so that its borders are drawn from the nodes just
+    outside it: walls, open passages and routes alike. The margin itself is not shown.
+
+    :param rows: The rows of the window and its margin, as sequences of direction masks.
+    :param route_rows: The rows of route direction masks of the window and its margin, if any.
+    :param labels: The labels of special nodes, indexed by position in the window with its margin.
+    """
+    rows = iter(rows)
+    try:
+        first_row = next(rows)
+    except StopIteration:
+        return
+
+    stop = NODE_STR_LEN * (len(first_row) - 1) + 1
+    strs = iter_rows_strs(chain([first_row], rows), route_rows=route_rows, labels=labels, check=False)
+    # The strs of the first row of the margin.
+    next(strs, None)
+    next(strs, None)
+    tail = deque()
+    for str_ in strs:
+        tail.append(str_)
+        if len(tail) > _WINDOW_TAIL_LEN:
+            yield tail.popleft()[NODE_STR_LEN:stop]
+
+
+def iter_window_rows(
+        layer: Sequence[int], shape: Sequence[int], rows: range, cols: range, *,
+        base: int = 0,
+        is_route: bool = False,
+) -> Iterable[bytes]:
+    """Get the rows of a window of a 2D layer of direction masks, with a margin of one node all around it, as
+    given to iter_window_strs. Only the nodes of the window and its margin are read. Where the margin is
+    outside the layer, it holds the virtual nodes around a laby, as used for display, or no route.
+
+    :param layer: The flat layer of direction masks, or of route direction masks.
+    :param shape: The shape of the 2D layer.
+    :param rows: The rows of the window, inside the layer.
+    :param cols: The columns of the window, inside the layer.
+    :param base: The index in the layer of its first node, for instance that of a 2D slice of a larger laby.
+    :param is_route: Whether the layer holds route direction masks, with no route outside of it.
+    """
+    n_rows, n_cols = shape
+    if is_route:
+        up = down = left = right = corner = 0
+    else:
+        up, down, left, right, corner = _OUTSIDE_UP, _OUTSIDE_DOWN, _OUTSIDE_LEFT, _OUTSIDE_RIGHT, _ALL
+    col_start, col_stop = max(cols.start - 1, 0), min(cols.stop + 1, n_cols)
+    n_left, n_right = col_start - cols.start + 1, cols.stop + 1 - col_stop
+    prefix, suffix = bytes([left] * n_left), bytes([right] * n_right)
+    for i in range(rows.start - 1, rows.stop + 1):
+        if 0 <= i < n_rows:
+            row_base = base + i * n_cols
+            yield prefix + layer[row_base + col_start:row_base + col_stop].tobytes() + suffix
+        else:
+            outside = up if i < 0 else down
+            yield bytes([corner] * n_left + [outside] * (col_stop - col_start) + [corner] * n_right)
+
+
+def write_rows(
+        rows: Iterable[Sequence[int]], file: TextIO, *,
+        route_rows: Iterable[Sequence[int]] | None = None,
+        labels: Mapping[Sequence[int], str] | None = None,
+        start: Sequence[int] | None = None,
+        finish: Sequence[int] | None = None,
+):
+    """Write the strs visually representing a laby given row by row, as they are produced, one line each.
+
+    :param rows: The rows of the laby, as sequences of direction masks.
+    :param file: The text file to write to.
+    :param route_rows: The rows of route direction masks, if any.
+    :param labels: The labels of special nodes, indexed by position.
+    :param start: The start position in the laby, if it should be displayed.
+    :param finish: The finish position in the laby, if it should be displayed.
+    """
+    for str_ in iter_rows_strs(rows, route_rows=route_rows, labels=labels, start=start, finish=finish):
+        file.write(str_)
+        file.write('\n')
+
+
+def get_row_strs(
+        up_row: Sequence[int] | None, up_route_row: Sequence[int],
+        row: Sequence[int] | None, route_row: Sequence[int],
+        down_route_row: Sequence[int],
+        row_labels: Mapping[int, str],
+        *, check: bool = True,
+) -> tuple[str, str]:
+    """Get the two strs visually representing a row of nodes: the one of the top corners and edges, and
+    the one of the left edges and centers. The last node of each str is a virtual one, closing the laby.
+
+    :param up_row: The direction masks of the row above, or None for the first row.
+    :param row: The direction masks of the row, or None for the virtual row closing the laby.
+    :param row_labels: The labels of the row, indexed by column.
+    :param check: Whether to check that the nodes are compatible with their left and upper neighbors.
+    """
+    cols = len(route_row)
+    if row is None:
+        dirs = [_OUTSIDE_DOWN] * cols + [_ALL]
+        left_dirs = _ALL
+    else:
+        dirs = [*row, _OUTSIDE_RIGHT]
+        left_dirs = _OUTSIDE_LEFT
+    if up_row is None:
+        up_dirs = [_OUTSIDE_UP] * cols + [_ALL]
+    else:
+        up_dirs = [*up_row, _OUTSIDE_RIGHT]
+    route_dirs = [*route_row, 0]
+    up_route_dirs = [*up_route_row, 0] if up_row is not None else [0] * (cols + 1)
+    down_route_dirs = [*down_route_row, 0]
+
+    top_strs = []
+    middle_strs = []
+    left_route_dirs = 0
+    for j in range(cols + 1):
+        node_dirs = dirs[j]
+        node_up_dirs = up_dirs[j]
+        if check and (
+                (node_dirs & _UP) >> 2 != (node_up_dirs & _DOWN) >> 3
+                or node_dirs & _LEFT != (left_dirs & _RIGHT) >> 1
+        ):
+            raise RenderError('Incompatible neighboring nodes.')
+
+        node_route_dirs = route_dirs[j]
+        node_up_route_dirs = up_route_dirs[j]
+        right_route_dirs = route_dirs[j + 1] if j < cols else 0
+
+        top_strs.append(_CORNERS[left_dirs << 4 | node_up_dirs])
+        top_strs.append(_H_EDGES[node_dirs & _UP | (node_route_dirs & _UP) << 2 | node_up_route_dirs & _DOWN])
+        middle_strs.append(_V_EDGES[node_dirs & _LEFT | (node_route_dirs & _LEFT) << 1 | (left_route_dirs & _RIGHT) << 1])
+
+        center_dirs = (
+            node_route_dirs
+            | (left_route_dirs & _RIGHT) >> 1
+            | (right_route_dirs & _LEFT) << 1
+            | (node_up_route_dirs & _DOWN) >> 1
+            | (down_route_dirs[j] & _UP) << 1
+        )
+        label = row_labels.get(j)
+        middle_strs.append(_CENTERS[center_dirs] if not label else _get_center_str(center_dirs, label))
+
+        left_dirs = node_dirs
+        left_route_dirs = node_route_dirs
+
+    return ''.join(top_strs), ''.join(middle_strs)
+
+
+def get_slice_title(leading_indices: Sequence[int]) -> str:
+    """Get the line telling the indices of a 2D slice of a laby along its leading dimensions, shown before it."""
+    return f'[{", ".join(map(str, leading_indices))}, :, :]'
+
+
+def get_through_label(dirs: int, route_dirs: int) -> str:
+    """Get the label of a node of a 2D slice, telling its directions along the dimensions before the last two,
+    as their letters, capitalized where a route goes.
+
+    :param dirs: The direction mask of the node.
+    :param route_dirs: The route direction mask of the node.
+    """
+    return _THROUGH_LABELS[dirs >> 4 | route_dirs >> 4 << 4]
+
+
+def _embedded(orig: str, label: str) -> str:
+    """Get the original str with the label embedded inside it, centered.
+
+    :param orig: Original string.
+    :param label: String to embed.
+    """
+    if len(label) > len(orig):
+        raise RenderError("Can't embed label in shorter string.")
+
+    pos = round(len(orig) / 2 - len(label) / 2 - _BIAS)
+    return f'{orig[:pos]}{label}{orig[pos+len(label):]}'
+
+
+def _get_corner_str(left_dirs: int, up_dirs: int) -> str:
+    """Get the str representing the top left corner of a node, from the directions of its left and
+    upper neighbors.
+    """
+    corner_dirs = (
+        (0 if left_dirs & _UP else _LEFT)
+        | (0 if up_dirs & _DOWN else _RIGHT)
+        | (0 if up_dirs & _LEFT else _UP)
+        | (0 if left_dirs & _RIGHT else _DOWN)
+    )
+    return Char.CORNER[Dirs(corner_dirs)].bold
+
+
+def _get_edge_str(edge_dir: Dirs, is_open: bool, is_routed: bool, is_neighbor_routed: bool) -> str:
+    """Get the str representing the top or left edge of a node.
+
+    :param edge_dir: The direction of the edge, up or left.
+    :param is_open: Whether the node is open in that direction.
+    :param is_routed: Whether the node's route goes in that direction.
+    :param is_neighbor_routed: Whether the neighbor's route comes from that direction.
+    """
+    is_h = edge_dir & Dirs.H
+    if not is_open:
+        return (Char.V_WALL if is_h else Char.H_WALL).bold
+
+    char = Char.V_SPACE if is_h else Char.H_SPACE
+    if is_routed:
+        label = Char.ARROW[edge_dir]
+    elif is_neighbor_routed:
+        label = Char.ARROW[edge_dir.opposite()]
+    else:
+        label = Char.CORNER[Dirs.NONE]
+    return _embedded(char, label)
+
+
+def _get_center_str(center_dirs: int, label: str = '') -> str:
+    """Get the str representing the center of a node, from the directions of the routes passing by."""
+    label = label if label else Char.CORNER[Dirs(center_dirs)]
+
+    char_left = Char.H_WALL if center_dirs & _LEFT else Char.H_SPACE
+    char_right = Char.H_WALL if center_dirs & _RIGHT else Char.H_SPACE
+    pos = round(len(Char.H_SPACE) / 2 - _BIAS)
+    return _embedded(f'{char_left[:pos]}{char_right[pos:]}', label)
+
+
+_CORNERS = [_get_corner_str(left_dirs, up_dirs) for left_dirs in range(16) for up_dirs in range(16)]
+"""The top left corner strs, indexed by the left neighbor's dirs << 4 | the upper neighbor's dirs."""
+
+_H_EDGES = [
+    _get_edge_str(Dirs.UP, bool(key & _UP), bool(key & _UP << 2), bool(key & _DOWN)) for key in range(32)
+]
+"""The top edge strs, indexed by dirs & UP | (route dirs & UP) << 2 | upper neighbor's route dirs & DOWN."""
+
+_V_EDGES = [
+    _get_edge_str(Dirs.LEFT, bool(key & _LEFT), bool(key & _LEFT << 1), bool(key & _RIGHT << 1)) for key in range(8)
+]
+"""The left edge strs, indexed by dirs & LEFT | (route dirs & LEFT) << 1 | (left neighbor's route dirs & RIGHT) << 1."""
+
+_CENTERS = [_get_center_str(center_dirs) for center_dirs in range(16)]
+"""The center strs without label, indexed by the directions of the routes passing by."""
+
+
+_THROUGH_LABELS = [
+    ''.join(
+        letter.upper() if key >> 4 & 1 << bit_index else letter
+        for bit_index, letter in enumerate(LETTERS[4:]) if key & 1 << bit_index
+    )
+    for key in range(256)
+]
+"""The labels of the nodes of a 2D slice, indexed by their direction mask >> 4 | their route direction mask >> 4 << 4."""
+
+
+class RenderError(Exception):
+    pass
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from collections.abc import MutableSequence, Sequence
+import random
+from typing import Any, TypeVar
+
+from laby_api.dirs import MASK_MEMBERS
+
+
+_T = TypeVar('_T')
+
+BLOCK_LEN = 1024
+"""The default number of random numbers drawn at once."""
+
+
+class RandomSource:
+    """A source of random numbers for generating and solving labys, drawing them in blocks from an
+    underlying random number generator, and mapping them to choices through precomputed tables.
+
+    Give each run its own source, seeded, to make it reproducible without touching the global state
+    of the random module.
+    """
+    def __init__(self, rng: int | random.Random | Any | None = None, *, block_len: int = BLOCK_LEN):
+        """
+        :param rng: The underlying generator: a seed for a new random.Random, a random.Random, a NumPy
+            Generator, or None for the global random module.
+        :param block_len: The number of random numbers drawn at once.
+        """
+        if rng is None:
+            rng = random
+        elif isinstance(rng, int):
+            rng = random.Random(rng)
+        self._rng = rng
+        """The underlying generator."""
+        self._block_len = block_len
+        """The number of random numbers drawn at once."""
+        self._block: list[float] = []
+        """The random numbers drawn in advance, in [0, 1)."""
+        self._index = 0
+        """The index of the next random number to use in the block."""
+
+    def random(self) -> float:
+        """Get a random number in [0, 1)."""
+        index = self._index
+        if index == len(self._block):
+            self._draw_block()
+            index = 0
+        self._index = index + 1
+        return self._block[index]
+
+    def randrange(self, stop: int) -> int:
+        """Get a random integer in [0, stop)."""
+        return int(self.random() * stop)
+
+    def coin(self) -> bool:
+        """Get a random boolean."""
+        return self.random() < 0.5
+
+    def choice(self, seq: Sequence[_T]) -> _T:
+        """Get a random item from the given non-empty sequence."""
+        return seq[int(self.random() * len(seq))]
+
+    def shuffle(self, seq: MutableSequence):
+        """Shuffle the given sequence in place."""
+        for index in range(len(seq) - 1, 0, -1):
+            other_index = int(self.random() * (index + 1))
+            seq[index], seq[other_index] = seq[other_index], seq[index]
+
+    def choice_dir(self, mask: int) -> int:
+        """Get the bit mask of a random simple dir allowed by the given direction mask, or 0 if there is none."""
+        choices = MASK_MEMBERS[mask]
+        if not choices:
+            return 0
+
+        return choices[int(self.random() * len(choices))]
+
+    def _draw_block(self):
+        """Draw the next block of random numbers from the underlying generator."""
+        rng = self._rng
+        if hasattr(rng, 'integers'):
+            self._block = rng.random(self._block_len).tolist()
+        else:
+            random_ = rng.random
+            self._block = [random_() for _ in range(self._block_len)]
+
+    def __repr__(self) -> str:
+        """Get a small representation of this source for debugging."""
+        return f'{self.__class__.__name__}({self._rng !r})'
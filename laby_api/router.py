@@ -1,48 +1,101 @@
 from __future__ import annotations
 
-from collections.abc import Iterable
-from functools import cache, cached_property
+from array import array
+from collections import defaultdict
+from collections.abc import Iterable, Sequence
+from math import prod
 
-from laby_api.dirs import Dirs, Pos
+from laby_api.dirs import Dirs, Pos, MASK_MEMBERS, get_mask_offsets
+from laby_api.stats import RouterStats, EventCallback
+from laby_api.storage import get_strides, get_flat_index, get_indices
+
+
+_NO_PREV = -1
+_FREED = -2
+_NEVER = -1
 
 
 class Route:
     """Represents a route through a laby. Each instance is a route point, connected to the previous
     one, they form the whole route.
+
+    Route points are lightweight views on the arrays of the router that created them. A point dropped
+    by its router (when backtracking from it) may be reused for another one later on.
     """
-    def __init__(self, pos: Pos):
-        self.pos: Pos = pos
+    __slots__ = ('_router', '_index')
+
+    def __init__(self, router: Router, index: int):
+        self._router = router
+        """The router holding this route point."""
+        self._index = index
+        """The index of this route point in its router's arrays."""
+
+    @property
+    def pos(self) -> Pos:
         """Current position."""
-        self.ahead_poss = set()
-        """Visited positions from there, that we have backtracked from."""
-        self.dir: Dirs = Dirs.NONE
+        return self._router._get_pos(self._router._poss[self._index])
+
+    @property
+    def flat_index(self) -> int:
+        """Current position, as a flat index in the grid of its router."""
+        return self._router._poss[self._index]
+
+    @property
+    def strides(self) -> tuple[int, ...]:
+        """The strides of the grid of its router, in which flat indices are given."""
+        return self._router._strides
+
+    @property
+    def dir_mask(self) -> int:
+        """The direction mask taken from there."""
+        return self._router._dirs[self._index]
+
+    @property
+    def dir(self) -> Dirs:
         """The directions taken from there."""
-        self.old_dirs: Dirs = Dirs.NONE
+        return Dirs(self._router._dirs[self._index])
+
+    @dir.setter
+    def dir(self, dir_: Dirs):
+        """The directions taken from there."""
+        self._router._dirs[self._index] = dir_.value
+
+    @property
+    def old_dirs(self) -> Dirs:
         """The directions taken from there that we have backtracked from."""
-        self.prev: Route | None = None
+        return Dirs(self._router._old_dirs[self._index])
+
+    @old_dirs.setter
+    def old_dirs(self, dirs: Dirs):
+        """The directions taken from there that we have backtracked from."""
+        self._router._old_dirs[self._index] = dirs.value
+
+    @property
+    def prev(self) -> Route | None:
         """The route that took us there."""
+        prev_index = self._router._prevs[self._index]
+        if prev_index == _NO_PREV:
+            return None
+
+        return self.__class__(self._router, prev_index)
 
     def copy(self):
         """Create a copy of this route point, still connected to the same previous point."""
-        new_route = self.__class__(self.pos)
-        new_route.ahead_poss = self.ahead_poss.copy()
-        new_route.dir = self.dir
-        new_route.old_dirs = self.old_dirs
-        new_route.prev = self.prev
-        return new_route
-
-    @cache
+        return self.__class__(self._router, self._router._copy_point(self._index))
+
     def __len__(self) -> int:
         """The number of points in the whole route."""
-        return len(list(iter(self)))
+        len_ = 0
+        for _ in self._iter_indices():
+            len_ += 1
+        return len_
 
-    @cached_property
+    @property
     def start(self) -> Route:
         """The start point of this route."""
-        if self.prev is None:
-            return self
-
-        return self.prev.start
+        for index in self._iter_indices():
+            start_index = index
+        return self.__class__(self._router, start_index)
 
     def __str__(self) -> str:
         """Get the visual str of this route as applied to a laby.
@@ -60,103 +113,304 @@ class Route:
         laby.write(self, do_walls=False)
         return laby
 
-    @cached_property
+    @property
     def shape(self) -> Pos:
         """Shape of this route, meaning the dimensions of the smallest laby able to contain all its positions."""
-        if not self.all_poss:
-            return Pos((0, 0))
-        rows, cols = zip(*self.all_poss)
-        return Pos((max(rows) + 1, max(cols) + 1))
+        return self._router._get_extent(self._iter_indices())
 
     def __iter__(self) -> Iterable[Route]:
         """Iterate through all the points in this route, starting by this one (a.k.a. the end)."""
-        route = self
-        while route is not None:
-            yield route
-            route = route.prev
+        for index in self._iter_indices():
+            yield self.__class__(self._router, index)
+
+    def _iter_indices(self) -> Iterable[int]:
+        """Iterate through the indices of all the points in this route, starting by this one."""
+        prevs = self._router._prevs
+        index = self._index
+        while index != _NO_PREV:
+            yield index
+            index = prevs[index]
+
+    def __eq__(self, other) -> bool:
+        """Whether the other route is the same route point."""
+        if not isinstance(other, Route):
+            return NotImplemented
+
+        return self._router is other._router and self._index == other._index
+
+    def __hash__(self) -> int:
+        """Hash of the route point's identity."""
+        return hash((id(self._router), self._index))
 
     def __repr__(self) -> str:
         """Small representation of the main attributes of this route point."""
         return f'{self.__class__.__name__}({self.pos}, {self.dir})'
 
-    @cached_property
+    @property
     def all_poss(self) -> set[Pos]:
         """All positions visited by this route until this point."""
-        all_poss = {self.pos}
-        if self.prev is None:
-            return all_poss
-
-        return all_poss.union(self.prev.all_poss)
+        poss = self._router._poss
+        return {self._router._get_pos(poss[index]) for index in self._iter_indices()}
 
 
 class Router:
     """Manager of routes. Able to advance and backtrack a head route, give the directions in which
     it can go next, and branch it into a new head. Can represent all the possible routes in a laby.
+
+    The route points of all the routes are stored in shared arrays, each point only knowing the index
+    of its previous one. Positions are stored as flat indices. Where the head cannot go back to is
+    tracked with one visit count and one backtracking time per position: a position backtracked from
+    is out of reach for the head as long as the head was created before it was backtracked from.
     """
-    def __init__(self, pos: Pos):
-        route = Route(pos)
-        self._routes: list[Route] = [route]
+    def __init__(
+            self, pos: Pos, shape: Sequence[int], *,
+            stats: RouterStats | None = None,
+            on_event: EventCallback | None = None,
+            sparse: bool = False,
+    ):
+        """Create a router with a single main route.
+
+        :param pos: Start position of the main route.
+        :param shape: Shape of the laby the routes go through.
+        :param stats: Counters to update with what this router does. Without them, nothing is counted.
+        :param on_event: Function to call after each event, with its name ('advance', 'backtrack', 'branch'
+            or 'dead_end') and this router.
+        :param sparse: Whether to track positions in dicts of the positions reached, rather than in arrays
+            covering the whole laby. This makes creating the router cheap, for routes much smaller than the laby.
+        """
+        self._stats = stats
+        """Counters to update with what this router does, if any."""
+        self._on_event = on_event
+        """Function to call after each event, if any."""
+        self._strides = get_strides(shape)
+        """The flat index offsets corresponding to a step along each dimension."""
+        self._offsets = get_mask_offsets(self._strides)
+        """The flat index offsets corresponding to a step in each simple dir, indexed by its bit mask."""
+
+        size = prod(shape)
+        self._visits: array | defaultdict[int, int] = defaultdict(int) if sparse else array('I', bytes(4 * size))
+        """The number of live route points at each position, indexed by flat index."""
+        self._backtrack_times: array | defaultdict[int, int] = (
+            defaultdict(_never) if sparse else array('q', [_NEVER]) * size
+        )
+        """The last time each position was backtracked from, indexed by flat index."""
+        self._clock = 0
+        """The current time, incremented at each new route point and each backtracking."""
+
+        self._poss = array('q')
+        """The position of each route point, as a flat index."""
+        self._dirs = array('B')
+        """The directions taken from each route point."""
+        self._old_dirs = array('B')
+        """The directions taken from each route point, that we have backtracked from."""
+        self._prevs = array('q')
+        """The index of the previous point of each route point."""
+        self._creation_times = array('q')
+        """The time at which each route point was created."""
+        self._freed: list[int] = []
+        """The indices of the dropped route points, available for reuse."""
+        self._depths = array('Q') if stats is not None else None
+        """The number of points in the route of each route point, only tracked when counting."""
+
+        self._routes: list[int] = [self._new_point(self._get_flat_index(pos), _NO_PREV)]
+        """The index of the head point of each route."""
+        if stats is not None:
+            stats.peak_depth = max(stats.peak_depth, 1)
 
     def branch_routes(self):
-        """Create a new head by copying this head's previous point."""
-        self._routes.append(self.head.prev.copy())
-        self.head.ahead_poss.clear()
+        """Create a new head by copying this head's previous point.
+
+        :raise IndexError: If this head has no previous point.
+        """
+        prev_index = self._prevs[self._routes[-1]]
+        if prev_index == _NO_PREV:
+            raise IndexError('The head has no previous point to branch from.')
+
+        self._routes.append(self._copy_point(prev_index, creation_time=self._tick()))
+        if self._stats is not None:
+            self._stats.branches += 1
+        if self._on_event is not None:
+            self._on_event('branch', self)
 
     def __iter__(self) -> Iterable[Route]:
         """Iterate through all the routes in this router."""
-        return self._routes.__iter__()
+        for index in self._routes:
+            yield Route(self, index)
+
+    def points(self) -> Iterable[Route]:
+        """Iterate through all the points of all the routes in this router, each one only once."""
+        for index, prev_index in enumerate(self._prevs):
+            if prev_index == _FREED:
+                continue
+
+            yield Route(self, index)
 
     def advance(self, dir_: Dirs):
         """Advance the head route in the given direction."""
-        current_head = self.head
-        next_head = Route(current_head.pos + dir_)
-        self.head.dir = dir_
-
-        self.head = next_head
-        self.head.prev = current_head
+        self.advance_mask(dir_.value)
+
+    def advance_mask(self, bit: int):
+        """Advance the head route in the direction of the given simple dir's bit mask."""
+        current_index = self._routes[-1]
+        self._dirs[current_index] = bit
+        next_flat_index = self._poss[current_index] + self._offsets[bit]
+        next_index = self._routes[-1] = self._new_point(next_flat_index, current_index)
+        if self._stats is not None:
+            self._stats.advances += 1
+            self._stats.peak_depth = max(self._stats.peak_depth, self._depths[next_index])
+        if self._on_event is not None:
+            self._on_event('advance', self)
 
     def backtrack(self, *, recreate: bool):
         """Backtrack head.
 
-        :param recreate: Re-instantiate the point we get to, and forget where we came from.
+        :param recreate: Re-instantiate the point we get to, and forget where we came from. This is
+            needed when that point is shared with other routes, so that they are left untouched.
         """
-        current_head = self.head
-        prev_head = current_head.prev
+        current_index = self._routes[-1]
+        prev_index = self._prevs[current_index]
         if recreate:
-            prev_head = prev_head.copy()
-            prev_head.ahead_poss.clear()
-        self.head = prev_head
-        self.head.ahead_poss.update(current_head.ahead_poss.union((current_head.pos, )))
-        self.head.old_dirs |= self.head.dir
-        self.head.dir = Dirs.NONE
+            prev_index = self._copy_point(prev_index, creation_time=self._creation_times[current_index])
+
+        self._backtrack_times[self._poss[current_index]] = self._tick()
+        self._free_point(current_index)
+
+        self._old_dirs[prev_index] |= self._dirs[prev_index]
+        self._dirs[prev_index] = 0
+        self._routes[-1] = prev_index
+        if self._stats is not None:
+            self._stats.backtracks += 1
+            self._stats.recreating_backtracks += recreate
+        if self._on_event is not None:
+            self._on_event('backtrack', self)
 
     def get_dirs_choices(self, initial_dirs_choices: Dirs) -> Dirs:
         """Get the choices we have for new directions to advance to.
 
         :param initial_dirs_choices: The direction choices dictated by the environment, to filter from.
         """
-        dirs_choices = initial_dirs_choices
-        dirs_choices &= ~(self.head.dir | self.head.old_dirs)
-        for dir_ in dirs_choices:
-            next_potential_pos = self.head.pos + dir_
-            if next_potential_pos in self.all_poss or next_potential_pos in self.head.ahead_poss:
-                dirs_choices &= ~dir_
-        return dirs_choices
+        return Dirs(self.get_mask_choices(initial_dirs_choices.value))
+
+    def get_mask_choices(self, initial_mask: int) -> int:
+        """Get the direction mask of the choices we have for new directions to advance to.
+
+        :param initial_mask: The direction mask of the choices dictated by the environment, to filter from.
+        """
+        head_index = self._routes[-1]
+        flat_index = self._poss[head_index]
+        creation_time = self._creation_times[head_index]
+        visits, backtrack_times, offsets = self._visits, self._backtrack_times, self._offsets
+
+        mask = initial_mask & ~(self._dirs[head_index] | self._old_dirs[head_index])
+        for bit in MASK_MEMBERS[mask]:
+            next_flat_index = flat_index + offsets[bit]
+            if visits[next_flat_index] or backtrack_times[next_flat_index] > creation_time:
+                mask &= ~bit
+
+        if not mask:
+            if self._stats is not None:
+                self._stats.dead_ends += 1
+            if self._on_event is not None:
+                self._on_event('dead_end', self)
+        return mask
 
     @property
     def head(self) -> Route:
         """The head route, the one being presently manipulated."""
-        return self._routes[-1]
+        return Route(self, self._routes[-1])
 
     @head.setter
     def head(self, route: Route):
         """The head route, the one being presently manipulated."""
-        self._routes[-1] = route
+        self._routes[-1] = route._index
+
+    @property
+    def head_flat_index(self) -> int:
+        """The position of the head route, as a flat index in the laby."""
+        return self._poss[self._routes[-1]]
 
     @property
     def is_head_main(self) -> bool:
         """Whether the current head route is the main (or first) route."""
-        return self.head is self._routes[0]
+        return self._routes[-1] == self._routes[0]
+
+    def _new_point(self, flat_index: int, prev_index: int, creation_time: int | None = None) -> int:
+        """Create a new route point and return its index.
+
+        :param flat_index: Position of the new point.
+        :param prev_index: Index of the point that took us there.
+        :param creation_time: Time to record as the point's creation, defaults to now.
+        """
+        if creation_time is None:
+            creation_time = self._tick()
+
+        self._visits[flat_index] += 1
+        if self._freed:
+            index = self._freed.pop()
+            self._poss[index] = flat_index
+            self._dirs[index] = 0
+            self._old_dirs[index] = 0
+            self._prevs[index] = prev_index
+            self._creation_times[index] = creation_time
+        else:
+            index = len(self._poss)
+            self._poss.append(flat_index)
+            self._dirs.append(0)
+            self._old_dirs.append(0)
+            self._prevs.append(prev_index)
+            self._creation_times.append(creation_time)
+            if self._depths is not None:
+                self._depths.append(0)
+
+        if self._depths is not None:
+            self._depths[index] = self._depths[prev_index] + 1 if prev_index != _NO_PREV else 1
+        return index
+
+    def _copy_point(self, index: int, creation_time: int | None = None) -> int:
+        """Create a copy of the given route point, still connected to the same previous point.
+
+        :param index: Index of the point to copy.
+        :param creation_time: Time to record as the copy's creation, defaults to the original's.
+        """
+        if creation_time is None:
+            creation_time = self._creation_times[index]
+
+        new_index = self._new_point(self._poss[index], self._prevs[index], creation_time)
+        self._dirs[new_index] = self._dirs[index]
+        self._old_dirs[new_index] = self._old_dirs[index]
+        return new_index
+
+    def _free_point(self, index: int):
+        """Drop the given route point, making its index available for reuse."""
+        self._visits[self._poss[index]] -= 1
+        self._prevs[index] = _FREED
+        self._freed.append(index)
+
+    def _tick(self) -> int:
+        """Get the current time and advance the clock."""
+        time = self._clock
+        self._clock += 1
+        return time
+
+    def _get_flat_index(self, pos: Pos) -> int:
+        """Get the flat index of the given position."""
+        return get_flat_index(pos, self._strides)
+
+    def _get_pos(self, flat_index: int) -> Pos:
+        """Get the position at the given flat index."""
+        return Pos(get_indices(flat_index, self._strides))
+
+    def _get_extent(self, indices: Iterable[int]) -> Pos:
+        """Get the dimensions of the smallest laby able to contain the given route points' positions."""
+        poss = self._poss
+        flat_indices = {poss[index] for index in indices}
+        if not flat_indices:
+            return Pos((0, ) * len(self._strides))
+
+        extent = [max(flat_indices) // self._strides[0] + 1]
+        for outer_stride, stride in zip(self._strides, self._strides[1:]):
+            extent.append(max(flat_index % outer_stride for flat_index in flat_indices) // stride + 1)
+        return Pos(extent)
 
     def __str__(self) -> str:
         """Get the visual str of all the routes in this router as applied to a laby.
@@ -165,16 +419,14 @@ class Router:
         """
         from laby_api.laby import Laby
         laby = Laby.ones(self.shape)
-        for route in self._routes:
+        for route in self:
             laby = route.write_on_laby(laby)
         return str(laby)
 
     @property
     def shape(self) -> Pos:
         """Shape of this router, meaning the dimensions of the smallest laby able to contain all its routes."""
-        route_shapes = [route.shape for route in self._routes]
-        rows, cols = zip(*route_shapes)
-        return Pos((max(rows), max(cols)))
+        return self._get_extent(index for route in self for index in route._iter_indices())
 
     def __len__(self) -> int:
         """The total number of points in all the routes of this router.
@@ -182,14 +434,17 @@ class Router:
         Warning: Some points may be counted more than once.
         """
         len_ = 0
-        for route in self._routes:
+        for route in self:
             len_ += len(route)
         return len_
 
     @property
     def all_poss(self) -> set[Pos]:
         """All positions visited by all this router's routes until this point."""
-        all_poss = set()
-        for route in self._routes:
-            all_poss = all_poss.union(route.all_poss)
-        return all_poss
+        visits_items = self._visits.items() if isinstance(self._visits, dict) else enumerate(self._visits)
+        return {self._get_pos(flat_index) for flat_index, visits in visits_items if visits}
+
+
+def _never() -> int:
+    """Get the backtracking time of the positions never backtracked from."""
+    return _NEVER
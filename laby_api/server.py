@@ -0,0 +1,459 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import binascii
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import aclosing, suppress
+from http import HTTPStatus
+from itertools import product
+import json
+from math import prod
+import os
+from typing import Any
+
+from laby_api.dirs import MAX_NDIM
+from laby_api.generators import GENERATORS, GeneratorError
+from laby_api.laby import Laby, LabyError
+from laby_api.packed import PackedError
+from laby_api.render import get_slice_title
+from laby_api.rng import RandomSource
+from laby_api.solvers import SOLVERS, SolverError, RouteNotFoundError
+from laby_api.storage import StorageError
+
+
+HOST = '127.0.0.1'
+PORT = 8000
+
+MAX_NODES = 2 ** 22
+"""The default largest number of nodes of the labys served, bounding the work of each request."""
+
+MAX_BODY_LEN = 2 ** 24
+"""The largest length of request bodies, in bytes."""
+
+RENDER_CHUNK_ROWS = 64
+"""The number of rows of nodes rendered per task, when streaming the text of a 2D laby."""
+
+_CLIENT_ERRORS = (GeneratorError, SolverError, LabyError, PackedError, StorageError)
+"""The errors caused by what was requested, answered with a bad request status."""
+
+
+class LabyServer:
+    """An HTTP service generating, solving and rendering labys, answering JSON requests.
+
+    Endpoints, all taking a JSON object by POST:
+
+    - /generate: {"shape", "algorithm", "seed"}, see generate. Gives the laby as JSON, packed in base64.
+    - /solve: the same, or {"laby"} packed in base64, with {"method"}, see solve. Gives the laby as JSON with
+      its route, and the positions of the route from the start to the finish.
+    - /render: the same as /generate or /solve, with {"format"}: 'text' to stream its visual representation,
+      rendered by parts, or 'packed' for the packed binary format.
+
+    Generating, solving and rendering are run in a pool of processes, so that the event loop only parses and
+    sends. Concurrent identical requests which give the same result, i.e. seeded or about a given laby, share
+    a single computation.
+
+    Errors are answered as JSON {"error"}, with a 500 status for unexpected ones. A streamed response failing
+    midway is cut short instead, by aborting its connection.
+    """
+    def __init__(self, *, workers: int | None = None, max_nodes: int = MAX_NODES):
+        """
+        :param workers: The number of worker processes. Defaults to the number of CPUs.
+        :param max_nodes: The largest number of nodes of the labys served.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        """The number of worker processes."""
+        self.max_nodes = max_nodes
+        """The largest number of nodes of the labys served."""
+        self.computations = 0
+        """The number of computations run in the pool so far."""
+        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        """The pool of worker processes."""
+        self._computing: dict[tuple, asyncio.Future] = {}
+        """The computations in progress which can be shared, by function name and arguments."""
+        self._server: asyncio.Server | None = None
+        """The underlying TCP server, once started."""
+        self._routes: dict[str, Callable[[dict[str, Any], asyncio.StreamWriter, bool], Awaitable[None]]] = {
+            '/generate': self._generate,
+            '/solve': self._solve,
+            '/render': self._render,
+        }
+        """The handler of each endpoint, by path."""
+
+    async def start(self, host: str = HOST, port: int = PORT) -> asyncio.Server:
+        """Start listening for requests. Port 0 picks a free port, see the sockets of the returned server."""
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server
+
+    async def close(self):
+        """Stop listening for requests and shut the worker processes down."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self._executor.shutdown(cancel_futures=True)
+
+    async def __aenter__(self) -> LabyServer:
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Answer the requests of a connection, as long as it is kept alive."""
+        try:
+            keep_alive = True
+            while keep_alive:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    break
+
+                try:
+                    request_line, *header_lines = head.decode('latin-1').split('\r\n')[:-2]
+                    method, target, version = request_line.split(' ')
+                    headers = {
+                        name.strip().lower(): value.strip()
+                        for name, value in (header_line.split(':', 1) for header_line in header_lines)
+                    }
+                    body_len = int(headers.get('content-length', 0))
+                except ValueError:
+                    await _send_json(writer, HTTPStatus.BAD_REQUEST, {'error': 'Malformed request.'}, False)
+                    break
+
+                if not 0 <= body_len <= MAX_BODY_LEN:
+                    await _send_json(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {'error': 'Body too large.'}, False)
+                    break
+
+                body = await reader.readexactly(body_len)
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                await self._respond(method, target, body, writer, keep_alive)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            with suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def _respond(self, method: str, target: str, body: bytes, writer: asyncio.StreamWriter, keep_alive: bool):
+        """Answer a request, with an error status if it cannot be fulfilled."""
+        handler = self._routes.get(target.split('?', 1)[0])
+        if handler is None:
+            await _send_json(writer, HTTPStatus.NOT_FOUND, {'error': f'Unknown endpoint: {target}.'}, keep_alive)
+            return
+        if method != 'POST':
+            await _send_json(
+                writer, HTTPStatus.METHOD_NOT_ALLOWED, {'error': 'Only POST is allowed.'}, keep_alive,
+                headers={'Allow': 'POST'},
+            )
+            return
+
+        try:
+            params = json.loads(body or b'{}')
+            if not isinstance(params, dict):
+                raise ServerError('Expected a JSON object.')
+
+            await handler(params, writer, keep_alive)
+        except (ServerError, ValueError, *_CLIENT_ERRORS) as error:
+            await _send_json(writer, HTTPStatus.BAD_REQUEST, {'error': str(error)}, keep_alive)
+        except RouteNotFoundError as error:
+            await _send_json(writer, HTTPStatus.UNPROCESSABLE_ENTITY, {'error': str(error)}, keep_alive)
+        except ConnectionError:
+            raise
+        except Exception as error:
+            await _send_json(
+                writer, HTTPStatus.INTERNAL_SERVER_ERROR, {'error': f'Internal error: {type(error).__name__}.'},
+                keep_alive,
+            )
+
+    async def _generate(self, params: dict[str, Any], writer: asyncio.StreamWriter, keep_alive: bool):
+        """Answer a request to generate a laby."""
+        shape, algorithm, seed = self._get_generation_params(params)
+        payload = await self._compute(_generate_payload, shape, algorithm, seed, share=seed is not None)
+        await _send_json(writer, HTTPStatus.OK, payload, keep_alive)
+
+    async def _solve(self, params: dict[str, Any], writer: asyncio.StreamWriter, keep_alive: bool):
+        """Answer a request to solve a laby."""
+        data, shape, algorithm, seed = self._get_laby_params(params)
+        method = _get_method(params, 'bfs')
+        payload = await self._compute(
+            _solve_payload, data, shape, algorithm, seed, method, self.max_nodes,
+            share=_is_deterministic(data, seed, method),
+        )
+        await _send_json(writer, HTTPStatus.OK, payload, keep_alive)
+
+    async def _render(self, params: dict[str, Any], writer: asyncio.StreamWriter, keep_alive: bool):
+        """Answer a request to render a laby, as text streamed part by part, or in the packed binary format."""
+        data, shape, algorithm, seed = self._get_laby_params(params)
+        method = _get_method(params, None)
+        format_ = params.get('format', 'text')
+        if format_ not in ('text', 'packed'):
+            raise ServerError(f"Unknown format: {format_ !r}, expected 'text' or 'packed'.")
+
+        share = _is_deterministic(data, seed, method)
+        data, shape = await self._compute(
+            _prepare_render, data, shape, algorithm, seed, method, self.max_nodes, share=share,
+        )
+        if format_ == 'packed':
+            await _send(writer, HTTPStatus.OK, data, 'application/octet-stream', keep_alive)
+            return
+
+        await _send_stream(writer, self._iter_render_parts(data, shape, share), 'text/plain; charset=utf-8', keep_alive)
+
+    async def _iter_render_parts(self, data: bytes, shape: Sequence[int], share: bool) -> AsyncIterator[bytes]:
+        """Render the parts of the text of a laby in the pool, a few at a time, and get them in order."""
+        pending = deque()
+        try:
+            for part in _get_render_parts(shape):
+                pending.append(asyncio.ensure_future(self._compute(_render_part, data, *part, share=share)))
+                if len(pending) > self.workers:
+                    yield await pending.popleft()
+            while pending:
+                yield await pending.popleft()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    async def _compute(self, function: Callable, *args, share: bool) -> Any:
+        """Run a function in the pool, and get its result.
+
+        :param share: Whether the result only depends on the arguments, so that concurrent identical
+            computations are run only once.
+        """
+        loop = asyncio.get_running_loop()
+        if not share:
+            self.computations += 1
+            return await loop.run_in_executor(self._executor, function, *args)
+
+        key = (function.__name__, *args)
+        future = self._computing.get(key)
+        if future is None:
+            self.computations += 1
+            future = self._computing[key] = loop.run_in_executor(self._executor, function, *args)
+            future.add_done_callback(lambda _: self._computing.pop(key, None))
+        return await asyncio.shield(future)
+
+    def _get_laby_params(self, params: dict[str, Any]) -> tuple[bytes | None, tuple[int, ...] | None, str, int | None]:
+        """Get the laby of a request, packed, or else the parameters to generate it."""
+        if 'laby' not in params:
+            return None, *self._get_generation_params(params)
+
+        try:
+            data = base64.b64decode(params['laby'], validate=True)
+        except (TypeError, binascii.Error):
+            raise ServerError('The laby must be given in the packed binary format, in base64.') from None
+        return data, None, 'router', _get_seed(params)
+
+    def _get_generation_params(self, params: dict[str, Any]) -> tuple[tuple[int, ...], str, int | None]:
+        """Get the shape, algorithm and seed of a laby to generate."""
+        shape = params.get('shape')
+        if (
+                not isinstance(shape, list) or not 0 < len(shape) <= MAX_NDIM
+                or not all(type(dim) is int and dim > 0 for dim in shape)
+        ):
+            raise ServerError(f'The shape must be a list of 1 to {MAX_NDIM} positive integers.')
+        if prod(shape) > self.max_nodes:
+            raise ServerError(f'Labys are limited to {self.max_nodes} nodes.')
+
+        algorithm = params.get('algorithm', 'router')
+        if algorithm not in GENERATORS:
+            raise ServerError(
+                f'Unknown generation algorithm: {algorithm !r}. Possible choices are: {list(GENERATORS)}.'
+            )
+
+        return tuple(shape), algorithm, _get_seed(params)
+
+
+def main(args: Sequence[str] | None = None):
+    """Serve labys over HTTP until interrupted."""
+    parser = argparse.ArgumentParser(prog='python -m laby_api.server', description=main.__doc__)
+    parser.add_argument('--host', default=HOST, help='Address to listen on.')
+    parser.add_argument('--port', type=int, default=PORT, help='Port to listen on.')
+    parser.add_argument('--workers', type=int, help='Number of worker processes. Defaults to the number of CPUs.')
+    parser.add_argument('--max-nodes', type=int, default=MAX_NODES, help='Largest number of nodes of the labys.')
+    parsed = parser.parse_args(args)
+
+    with suppress(KeyboardInterrupt):
+        asyncio.run(_serve(parsed.host, parsed.port, parsed.workers, parsed.max_nodes))
+
+
+async def _serve(host: str, port: int, workers: int | None, max_nodes: int):
+    """Serve labys over HTTP until cancelled."""
+    async with LabyServer(workers=workers, max_nodes=max_nodes) as laby_server:
+        server = await laby_server.start(host, port)
+        print(f'Serving labys on http://{host}:{port} with {laby_server.workers} workers.', flush=True)
+        await server.serve_forever()
+
+
+def _get_seed(params: dict[str, Any]) -> int | None:
+    """Get the seed of a request, if any."""
+    seed = params.get('seed')
+    if seed is not None and type(seed) is not int:
+        raise ServerError('The seed must be an integer.')
+    return seed
+
+
+def _get_method(params: dict[str, Any], default: str | None) -> str | None:
+    """Get the solving method of a request, if any."""
+    method = params.get('method', default)
+    if method is not None and method not in SOLVERS:
+        raise ServerError(f'Unknown solving method: {method !r}. Possible choices are: {list(SOLVERS)}.')
+    return method
+
+
+def _is_deterministic(data: bytes | None, seed: int | None, method: str | None) -> bool:
+    """Whether a request gives the same result each time, so that identical ones can share a computation."""
+    return (data is not None or seed is not None) and (method != 'dfs' or seed is not None)
+
+
+def _get_render_parts(shape: Sequence[int]) -> Iterable[tuple[tuple[int, ...], tuple[int, int] | None]]:
+    """Get the parts in which the text of a laby of the given shape is rendered: ranges of rows, the one past the
+    last row closing the laby, for 2D labys, or else whole 2D slices, by indices along the leading dimensions.
+    """
+    if len(shape) != 2:
+        yield from ((leading_indices, None) for leading_indices in product(*map(range, shape[:-2])))
+        return
+
+    for row_start in range(0, shape[0] + 1, RENDER_CHUNK_ROWS):
+        yield (), (row_start, min(row_start + RENDER_CHUNK_ROWS, shape[0] + 1))
+
+
+def _get_laby(
+        data: bytes | None, shape: Sequence[int] | None, algorithm: str, seed: int | None, max_nodes: int,
+) -> Laby:
+    """Get the laby given packed, or else generate it, in a worker process."""
+    from laby_api.__main__ import generate
+
+    if data is None:
+        return generate(shape, algorithm, seed=seed)
+
+    laby = Laby.from_bytes(data)
+    if laby.storage.size > max_nodes:
+        raise ServerError(f'Labys are limited to {max_nodes} nodes.')
+    return laby
+
+
+def _get_laby_payload(laby: Laby) -> dict[str, Any]:
+    """Get the JSON representation of a laby, packed in base64."""
+    return {
+        'shape': list(laby.shape),
+        'start': list(laby.start) if laby.start is not None else None,
+        'finish': list(laby.finish) if laby.finish is not None else None,
+        'algorithm': laby.generator,
+        'seed': laby.seed,
+        'laby': base64.b64encode(laby.to_bytes()).decode('ascii'),
+    }
+
+
+def _generate_payload(shape: Sequence[int], algorithm: str, seed: int | None) -> dict[str, Any]:
+    """Generate a laby, and get its JSON representation, in a worker process."""
+    from laby_api.__main__ import generate
+
+    return _get_laby_payload(generate(shape, algorithm, seed=seed))
+
+
+def _solve_payload(
+        data: bytes | None, shape: Sequence[int] | None, algorithm: str, seed: int | None, method: str, max_nodes: int,
+) -> dict[str, Any]:
+    """Solve a laby, and get its JSON representation with the positions of its route, in a worker process."""
+    from laby_api.__main__ import solve
+
+    laby = _get_laby(data, shape, algorithm, seed, max_nodes)
+    route = solve(laby, method, RandomSource(seed))
+    laby.write(route, do_walls=False)
+    payload = _get_laby_payload(laby)
+    payload['route'] = [list(point.pos) for point in route][::-1]
+    return payload
+
+
+def _prepare_render(
+        data: bytes | None, shape: Sequence[int] | None, algorithm: str, seed: int | None, method: str | None,
+        max_nodes: int,
+) -> tuple[bytes, tuple[int, ...]]:
+    """Get the laby to render packed, with its route if a solving method is given, and its shape, in a worker
+    process.
+    """
+    from laby_api.__main__ import solve
+
+    laby = _get_laby(data, shape, algorithm, seed, max_nodes)
+    if method is not None:
+        laby.write(solve(laby, method, RandomSource(seed)), do_walls=False)
+    laby.validate()
+    return laby.to_bytes(), laby.shape
+
+
+def _render_part(data: bytes, leading_indices: tuple[int, ...], row_range: tuple[int, int] | None) -> bytes:
+    """Render a part of the text of the given packed laby, see _get_render_parts, in a worker process."""
+    laby = Laby.from_bytes(data)
+    if row_range is not None:
+        strs = [str_ for i in range(*row_range) for str_ in laby.row_strs(i)]
+    else:
+        strs = list(laby.slice_strs(leading_indices))
+        if leading_indices:
+            strs.insert(0, get_slice_title(leading_indices))
+    return ''.join(f'{str_}\n' for str_ in strs).encode()
+
+
+async def _send(
+        writer: asyncio.StreamWriter, status: HTTPStatus, body: bytes, content_type: str, keep_alive: bool, *,
+        headers: dict[str, str] | None = None,
+):
+    """Send a response with the given body."""
+    _write_head(writer, status, content_type, keep_alive, {'Content-Length': str(len(body)), **(headers or {})})
+    writer.write(body)
+    await writer.drain()
+
+
+async def _send_json(
+        writer: asyncio.StreamWriter, status: HTTPStatus, payload: Any, keep_alive: bool, *,
+        headers: dict[str, str] | None = None,
+):
+    """Send a response with the given JSON payload."""
+    await _send(writer, status, json.dumps(payload).encode(), 'application/json', keep_alive, headers=headers)
+
+
+async def _send_stream(
+        writer: asyncio.StreamWriter, chunks: AsyncIterator[bytes], content_type: str, keep_alive: bool,
+):
+    """Send a response with a body streamed chunk by chunk, as they come.
+
+    :raise ConnectionAbortedError: If getting a chunk failed. As the response already started, the connection is
+        aborted without its last chunk, so that clients see it as incomplete.
+    """
+    _write_head(writer, HTTPStatus.OK, content_type, keep_alive, {'Transfer-Encoding': 'chunked'})
+    async with aclosing(chunks):
+        try:
+            async for chunk in chunks:
+                if chunk:
+                    writer.write(b'%x\r\n%b\r\n' % (len(chunk), chunk))
+                    await writer.drain()
+        except ConnectionError:
+            raise
+        except Exception as error:
+            writer.transport.abort()
+            raise ConnectionAbortedError('Streaming the response failed.') from error
+    writer.write(b'0\r\n\r\n')
+    await writer.drain()
+
+
+def _write_head(
+        writer: asyncio.StreamWriter, status: HTTPStatus, content_type: str, keep_alive: bool, headers: dict[str, str],
+):
+    """Write the status line and headers of a response."""
+    lines = [
+        f'HTTP/1.1 {status.value} {status.phrase}',
+        f'Content-Type: {content_type}',
+        f'Connection: {"keep-alive" if keep_alive else "close"}',
+        *(f'{name}: {value}' for name, value in headers.items()),
+    ]
+    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+
+
+class ServerError(Exception):
+    pass
+
+
+if __name__ == '__main__':
+    main()
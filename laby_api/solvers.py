@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+from array import array
+from collections.abc import Callable, Sequence
+import heapq
+
+from laby_api.dirs import MASK_MEMBERS, MASK_OPPOSITES
+from laby_api.laby import Laby
+from laby_api.rng import RandomSource
+from laby_api.router import Router, Route
+from laby_api.stats import Stats
+from laby_api.storage import Storage, get_indices
+
+
+_UNREACHED = -1
+
+
+def find_route(laby: Laby, router: Router = None, rng: RandomSource = None) -> Router:
+    """Find a route through the given laby, using the router's current head.
+
+    :param laby: Laby to use as an environment.
+    :param router: Router to use. No routes are added or removed, the head is only advanced / backtracked.
+        Defaults to a sparse router from the laby's start, only recording the nodes it reaches.
+    :param rng: The source of random numbers, defaults to one over the global random module.
+    :return: The router containing the found route.
+    """
+    if router is None:
+        router = Router(pos=laby.start, shape=laby.shape, sparse=True)
+    if rng is None:
+        rng = RandomSource()
+
+    storage = laby.storage
+    dirs = storage.dirs
+    start, finish = storage.index(laby.start), storage.index(laby.finish)
+    has_advanced = False
+    while (flat_index := router.head_flat_index) != finish:
+        mask_choices = router.get_mask_choices(dirs[flat_index])
+        if not mask_choices:
+            if flat_index == start:
+                raise RouteNotFoundError('No route could be found.')
+
+            if not router.is_head_main and has_advanced:
+                return router
+
+            router.backtrack(recreate=not has_advanced)
+            continue
+
+        has_advanced = True
+        router.advance_mask(rng.choice_dir(mask_choices))
+
+    return router
+
+
+def solve_dfs(laby: Laby, rng: RandomSource = None, stats: Stats = None) -> Route:
+    """Solve the given laby by randomly walking and backtracking through it. The route found is not
+    necessarily the shortest one.
+    """
+    router = Router(
+        pos=laby.start, shape=laby.shape,
+        stats=stats.router if stats is not None else None,
+        on_event=stats.on_event if stats is not None else None,
+    )
+    return find_route(laby, router, rng).head
+
+
+def solve_bfs(laby: Laby, rng: RandomSource = None, stats: Stats = None) -> Route:
+    """Solve the given laby with a breadth-first search, giving a shortest route."""
+    storage = laby.storage
+    start, finish = storage.index(laby.start), storage.index(laby.finish)
+    prevs = _get_prevs_array(storage, start)
+    if start != finish and not _expand_breadth_first(storage, [start], prevs, finish):
+        raise RouteNotFoundError('No route could be found.')
+
+    return _get_route(laby, _get_path(prevs, finish)[::-1])
+
+
+def solve_astar(laby: Laby, rng: RandomSource = None, stats: Stats = None) -> Route:
+    """Solve the given laby with an A* search guided by the Manhattan distance, giving a shortest route."""
+    storage = laby.storage
+    start, finish = storage.index(laby.start), storage.index(laby.finish)
+    dirs, inward_dirs, offsets, size = storage.dirs, storage.inward_dirs, storage.offsets, storage.size
+    strides = storage.strides
+    finish_indices = get_indices(finish, strides)
+
+    prevs = _get_prevs_array(storage, start)
+    costs = array('i', [0]) * size
+    frontier = [(0, start)]
+    while frontier:
+        _, index = heapq.heappop(frontier)
+        if index == finish:
+            return _get_route(laby, _get_path(prevs, finish)[::-1])
+
+        cost = costs[index] + 1
+        for bit in MASK_MEMBERS[dirs[index] & inward_dirs[index]]:
+            neighbor_index = index + offsets[bit]
+            if prevs[neighbor_index] != _UNREACHED and costs[neighbor_index] <= cost:
+                continue
+
+            prevs[neighbor_index] = index
+            costs[neighbor_index] = cost
+            heuristic = 0
+            for neighbor_axis_index, finish_axis_index in zip(get_indices(neighbor_index, strides), finish_indices):
+                heuristic += abs(finish_axis_index - neighbor_axis_index)
+            heapq.heappush(frontier, (cost + heuristic, neighbor_index))
+
+    raise RouteNotFoundError('No route could be found.')
+
+
+def solve_bidirectional(laby: Laby, rng: RandomSource = None, stats: Stats = None) -> Route:
+    """Solve the given laby with two breadth-first searches, from the start and from the finish, until
+    they meet. This gives a shortest route.
+    """
+    storage = laby.storage
+    start, finish = storage.index(laby.start), storage.index(laby.finish)
+    if start == finish:
+        return _get_route(laby, [start])
+
+    forward_prevs = _get_prevs_array(storage, start)
+    backward_prevs = _get_prevs_array(storage, finish)
+    forward_frontier, backward_frontier = [start], [finish]
+    while forward_frontier and backward_frontier:
+        if len(forward_frontier) <= len(backward_frontier):
+            forward_frontier, meeting_index = _expand_level(
+                storage, forward_frontier, forward_prevs, backward_prevs, backward=False,
+            )
+        else:
+            backward_frontier, meeting_index = _expand_level(
+                storage, backward_frontier, backward_prevs, forward_prevs, backward=True,
+            )
+
+        if meeting_index != _UNREACHED:
+            forward_path = _get_path(forward_prevs, meeting_index)[::-1]
+            backward_path = _get_path(backward_prevs, meeting_index)[1:]
+            return _get_route(laby, forward_path + backward_path)
+
+    raise RouteNotFoundError('No route could be found.')
+
+
+SOLVERS: dict[str, Callable[[Laby, RandomSource | None, Stats | None], Route]] = {
+    'dfs': solve_dfs,
+    'bfs': solve_bfs,
+    'astar': solve_astar,
+    'bidirectional': solve_bidirectional,
+}
+"""The available solving methods, by name. Each one takes the laby to solve, a source of random numbers, which
+the deterministic ones ignore, and stats, in which those working with routers count what they do."""
+
+
+def get_solver(method: str) -> Callable[[Laby, RandomSource | None, Stats | None], Route]:
+    """Get the solver function for the given method name."""
+    try:
+        return SOLVERS[method]
+    except KeyError:
+        raise SolverError(f'Unknown solving method: {method !r}. '
+                          f'Possible choices are: {list(SOLVERS.keys())}.') from None
+
+
+def _get_prevs_array(storage: Storage, root: int) -> array:
+    """Get an array to record the previous node of each node reached by a search from the given root."""
+    prevs = array('i', [_UNREACHED]) * storage.size
+    prevs[root] = root
+    return prevs
+
+
+def _expand_breadth_first(storage: Storage, frontier: Sequence[int], prevs: array, target: int) -> bool:
+    """Expand the frontier level by level, recording previous nodes, until the target is reached.
+
+    :return: Whether the target was reached.
+    """
+    dirs, inward_dirs, offsets = storage.dirs, storage.inward_dirs, storage.offsets
+    while frontier:
+        next_frontier = array('i')
+        for index in frontier:
+            for bit in MASK_MEMBERS[dirs[index] & inward_dirs[index]]:
+                neighbor_index = index + offsets[bit]
+                if prevs[neighbor_index] != _UNREACHED:
+                    continue
+
+                prevs[neighbor_index] = index
+                if neighbor_index == target:
+                    return True
+
+                next_frontier.append(neighbor_index)
+        frontier = next_frontier
+    return False
+
+
+def _expand_level(
+        storage: Storage, frontier: Sequence[int], prevs: array, other_prevs: array, *, backward: bool,
+) -> tuple[array, int]:
+    """Expand the frontier by one level, stopping if it meets the nodes reached by the other search.
+
+    :param backward: Whether the search goes against the allowed directions (from the finish).
+    :return: The next frontier, and the node where both searches met, if any.
+    """
+    dirs, inward_dirs, offsets = storage.dirs, storage.inward_dirs, storage.offsets
+    next_frontier = array('i')
+    for index in frontier:
+        mask = dirs[index]
+        for bit in MASK_MEMBERS[inward_dirs[index]]:
+            neighbor_index = index + offsets[bit]
+            if prevs[neighbor_index] != _UNREACHED:
+                continue
+            if not (dirs[neighbor_index] & MASK_OPPOSITES[bit] if backward else mask & bit):
+                continue
+
+            prevs[neighbor_index] = index
+            if other_prevs[neighbor_index] != _UNREACHED:
+                return next_frontier, neighbor_index
+
+            next_frontier.append(neighbor_index)
+    return next_frontier, _UNREACHED
+
+
+def _get_path(prevs: array, end: int) -> list[int]:
+    """Get the path from the given end back to the root of the search that recorded the previous nodes."""
+    path = [end]
+    index = end
+    while prevs[index] != index:
+        index = prevs[index]
+        path.append(index)
+    return path
+
+
+def _get_route(laby: Laby, path: Sequence[int]) -> Route:
+    """Get the route following the given path of flat indices, from the laby's start. The path being known,
+    the router is sparse, only recording the nodes along it.
+    """
+    storage = laby.storage
+    inward_dirs, offsets = storage.inward_dirs, storage.offsets
+    router = Router(pos=laby.start, shape=laby.shape, sparse=True)
+    for index, next_index in zip(path, path[1:]):
+        for bit in MASK_MEMBERS[inward_dirs[index]]:
+            if index + offsets[bit] == next_index:
+                router.advance_mask(bit)
+                break
+    return router.head
+
+
+class RouteNotFoundError(Exception):
+    """Exception raised when the whole environment was explored and no further route could be found."""
+    pass
+
+
+class SolverError(Exception):
+    pass
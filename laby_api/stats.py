@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from contextlib import contextmanager, nullcontext, AbstractContextManager
+import time
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from laby_api.router import Router
+
+
+EventCallback = Callable[[str, 'Router'], None]
+"""A function called by a router after each event, with the name of the event ('advance', 'backtrack', 'branch'
+or 'dead_end') and the router itself."""
+
+
+class RouterStats:
+    """Counters of what a router did. Routers only update them when given some."""
+    __slots__ = ('advances', 'backtracks', 'recreating_backtracks', 'branches', 'dead_ends', 'peak_depth')
+
+    def __init__(self):
+        self.advances = 0
+        """The number of times the head advanced."""
+        self.backtracks = 0
+        """The number of times the head backtracked."""
+        self.recreating_backtracks = 0
+        """Among the backtracks, the number of those re-instantiating the point they got to."""
+        self.branches = 0
+        """The number of new heads branched off."""
+        self.dead_ends = 0
+        """The number of times the head had no direction left to advance to."""
+        self.peak_depth = 0
+        """The largest number of points in a head route."""
+
+    def as_dict(self) -> dict[str, int]:
+        """Get the counters by name, for export."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        """Get a representation of the counters for debugging."""
+        counters = ', '.join(f'{name}={value}' for name, value in self.as_dict().items())
+        return f'{self.__class__.__name__}({counters})'
+
+
+class Stats:
+    """Instrumentation of runs of generate or solve: the time spent in each phase, and the counters of the
+    routers involved. Giving the same stats to several runs accumulates them.
+    """
+    def __init__(self, on_event: EventCallback | None = None):
+        """
+        :param on_event: Function called by the routers involved after each of their events.
+        """
+        self.phases: dict[str, float] = {}
+        """The time spent in each phase, in seconds."""
+        self.router = RouterStats()
+        """The counters of the routers involved."""
+        self.on_event = on_event
+        """Function called by the routers involved after each of their events."""
+
+    @contextmanager
+    def phase(self, name: str):
+        """Context manager to time a phase, adding to the time of previous phases of the same name."""
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start_time
+
+    def as_dict(self) -> dict[str, dict[str, float | int]]:
+        """Get the phase timings and the router counters, for export."""
+        return {'phases': dict(self.phases), 'router': self.router.as_dict()}
+
+    def __repr__(self) -> str:
+        """Get a representation of the stats for debugging."""
+        return f'{self.__class__.__name__}({self.as_dict()})'
+
+
+def phase(stats: Stats | None, name: str) -> AbstractContextManager:
+    """Get a context manager timing a phase in the given stats, or doing nothing without stats."""
+    return stats.phase(name) if stats is not None else nullcontext()
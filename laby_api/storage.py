@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+from array import array
+from collections.abc import Sequence
+from functools import cached_property
+from math import prod
+
+from laby_api.dirs import MAX_NDIM, ALL_MASKS, get_mask_offsets
+
+
+class Storage:
+    """Flat storage for the nodes of a laby. Allowed directions and route directions are kept as packed
+    bit masks, one byte per node and per layer, in row-major order. Labels are kept in a sparse dict.
+
+    Neighbors are found through stride offsets: the neighbor of a node in a simple dir is at its flat
+    index plus the offset of the dir, provided the dir is among the inward dirs of the node.
+    """
+    def __init__(self, shape: Sequence[int], dirs: array | None = None, route_dirs: array | None = None):
+        if not 0 < len(shape) <= MAX_NDIM:
+            raise StorageError(f'Unsupported number of dimensions: {len(shape)}, expected 1 to {MAX_NDIM}.')
+
+        self.shape: tuple[int, ...] = tuple(shape)
+        """The dimensions of the stored grid of nodes."""
+        self.size: int = prod(self.shape)
+        """The total number of nodes."""
+        self.strides: tuple[int, ...] = get_strides(self.shape)
+        """The flat index offsets corresponding to a step along each dimension."""
+        self.dirs: array = dirs if dirs is not None else array('B', bytes(self.size))
+        """The allowed directions of each node, as bit masks."""
+        self.route_dirs: array = route_dirs if route_dirs is not None else array('B', bytes(self.size))
+        """The directions in which a route is traced from each node, as bit masks."""
+        self.labels: dict[int, str] = {}
+        """The labels of the special nodes, indexed by flat index."""
+        self.dirs_version: int = 0
+        """Incremented at each modification of the allowed directions, to invalidate what is derived from
+        them. Code writing directly into the dirs buffer is responsible for incrementing it."""
+        self.route_version: int = 0
+        """Incremented at each modification of the route directions or labels, to invalidate what is rendered
+        from them. Code writing directly into the route dirs buffer or the labels is responsible for incrementing
+        it."""
+
+        if len(self.dirs) != self.size or len(self.route_dirs) != self.size:
+            raise StorageError(f'Buffers of the wrong size for shape {self.shape}.')
+
+    @classmethod
+    def full(cls, shape: Sequence[int], dirs: int = 0, route_dirs: int = 0) -> Storage:
+        """Get a storage of the requested shape, where all nodes have the same direction masks."""
+        size = prod(shape)
+        return cls(shape, array('B', (dirs, )) * size, array('B', (route_dirs, )) * size)
+
+    def index(self, indices: Sequence[int, ...]) -> int:
+        """Get the flat index of the node at the given position. Negative indices count from the end.
+
+        :param indices: One index per dimension.
+        """
+        if len(indices) != len(self.shape):
+            raise IndexError(f'Expected {len(self.shape)} indices, got {len(indices)}.')
+
+        flat_index = 0
+        for index, dim, stride in zip(indices, self.shape, self.strides):
+            if index < 0:
+                index += dim
+            if not 0 <= index < dim:
+                raise IndexError(f'Index out of range: {tuple(indices)} for shape {self.shape}.')
+            flat_index += index * stride
+        return flat_index
+
+    def indices(self, flat_index: int) -> tuple[int, ...]:
+        """Get the position of the node at the given flat index."""
+        return get_indices(flat_index, self.strides)
+
+    @cached_property
+    def offsets(self) -> tuple[int, ...]:
+        """The flat index offset of a step in each simple dir, indexed by its bit mask."""
+        return get_mask_offsets(self.strides)
+
+    @cached_property
+    def inward_dirs(self) -> bytearray:
+        """The simple dirs in which each node has a neighbor, i.e. all of them but those leading out of the
+        grid, as bit masks.
+        """
+        return get_inward_dirs(self.shape)
+
+    def __repr__(self) -> str:
+        """Get a small representation of this storage for debugging."""
+        return f'{self.__class__.__name__}({self.shape})'
+
+
+def get_inward_dirs(shape: Sequence[int]) -> bytearray:
+    """Get the simple dirs in which each node of a grid of the given shape has a neighbor, as bit masks,
+    in row-major order. Only the nodes on the faces of the grid are visited.
+    """
+    ndim = len(shape)
+    masks = bytearray([ALL_MASKS[ndim]]) * prod(shape)
+    for axis, dim in enumerate(shape):
+        backward_bit = 1 << 2 * (ndim - 1 - axis)
+        for index, bit in ((0, backward_bit), (dim - 1, backward_bit << 1)):
+            table = bytes(mask & ~bit for mask in range(256))
+            for slab in get_slab_slices(shape, axis, index):
+                masks[slab] = masks[slab].translate(table)
+    return masks
+
+
+def get_slab_slices(shape: Sequence[int], axis: int, index: int) -> list[slice]:
+    """Get the slices of flat indices covering the nodes at the given index along the given axis.
+
+    The slab is split in as few slices as possible: either one contiguous slice per block of the dimensions
+    before the axis, or one strided slice per position in the dimensions after it.
+    """
+    size = prod(shape)
+    if not size:
+        return []
+
+    stride = get_strides(shape)[axis]
+    block_len = stride * shape[axis]
+    slab_start = index * stride
+    if stride <= size // block_len:
+        return [slice(slab_start + offset, size, block_len) for offset in range(stride)]
+    return [slice(block_start + slab_start, block_start + slab_start + stride)
+            for block_start in range(0, size, block_len)]
+
+
+def get_flat_index(indices: Sequence[int], strides: Sequence[int]) -> int:
+    """Get the flat index of the given position, in a grid of the given strides, without any bounds check."""
+    return sum(index * stride for index, stride in zip(indices, strides))
+
+
+def get_indices(flat_index: int, strides: Sequence[int]) -> tuple[int, ...]:
+    """Get the position at the given flat index, in a grid of the given strides."""
+    indices = []
+    for stride in strides:
+        index, flat_index = divmod(flat_index, stride)
+        indices.append(index)
+    return tuple(indices)
+
+
+def get_strides(shape: Sequence[int]) -> tuple[int, ...]:
+    """Get the row-major strides for the given shape."""
+    strides = []
+    stride = 1
+    for dim in reversed(shape):
+        strides.append(stride)
+        stride *= dim
+    return tuple(reversed(strides))
+
+
+class StorageError(Exception):
+    pass
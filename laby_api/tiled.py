@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+from array import array
+from collections import OrderedDict
+from collections.abc import Iterable, Sequence
+import hashlib
+from itertools import product
+from math import prod
+
+from laby_api.dirs import Pos
+from laby_api.laby import Laby
+from laby_api.node import Node
+from laby_api.render import iter_window_strs
+from laby_api.rng import RandomSource
+from laby_api.storage import Storage, get_flat_index, get_indices, get_strides
+
+
+CACHE_BYTES = 64 * 2 ** 20
+"""The default memory budget of the tiles kept in cache, in bytes."""
+
+_TILE_LAYERS = 3
+"""The number of bytes per node of a cached tile: its dirs, route dirs and inward dirs."""
+
+
+class TiledLaby:
+    """An endless laby, made of tiles of a fixed shape, generated on demand.
+
+    Each tile is a perfect laby generated from a seed derived from the world seed and the tile's indices,
+    so that any tile can be regenerated identically at any time. Each pair of neighboring tiles is joined
+    by one passage through their shared face, at a position derived likewise. Only the tiles touched are
+    generated, and the most recently used ones are kept in a cache within a memory budget.
+
+    Tiles evicted from the cache are regenerated as they were, so modifications made to them are lost.
+    """
+    def __init__(
+            self, tile_shape: Sequence[int], *,
+            seed: int = 0,
+            algorithm: str = 'router',
+            cache_bytes: int = CACHE_BYTES,
+    ):
+        """
+        :param tile_shape: The shape of each tile.
+        :param seed: The world seed, from which all the tiles derive.
+        :param algorithm: The generation algorithm of the tiles, see generate.
+        :param cache_bytes: The memory budget of the tiles kept in cache, in bytes. At least one tile is kept.
+        """
+        self.tile_shape: tuple[int, ...] = tuple(tile_shape)
+        """The shape of each tile."""
+        if not all(self.tile_shape):
+            raise TiledError(f'Tiles cannot be empty, got shape {self.tile_shape}.')
+
+        self.seed = seed
+        """The world seed, from which all the tiles derive."""
+        self.algorithm = algorithm
+        """The generation algorithm of the tiles."""
+        self.max_tiles: int = max(1, cache_bytes // (_TILE_LAYERS * prod(self.tile_shape)))
+        """The maximum number of tiles kept in cache."""
+        self._tiles: OrderedDict[tuple[int, ...], Laby] = OrderedDict()
+        """The tiles kept in cache, by tile indices, from the least to the most recently used."""
+        self._tile_strides = get_strides(self.tile_shape)
+        """The strides of the storage of each tile."""
+
+    @property
+    def cached_tiles(self) -> list[tuple[int, ...]]:
+        """The indices of the tiles kept in cache, from the least to the most recently used."""
+        return list(self._tiles)
+
+    def get_tile(self, tile_indices: Sequence[int]) -> Laby:
+        """Get the tile of the given indices, from the cache or else generated.
+
+        :param tile_indices: The indices of the tile, one per dimension, possibly negative.
+        """
+        tile_indices = tuple(tile_indices)
+        tile = self._tiles.get(tile_indices)
+        if tile is not None:
+            self._tiles.move_to_end(tile_indices)
+            return tile
+
+        tile = self._generate_tile(tile_indices)
+        self._tiles[tile_indices] = tile
+        while len(self._tiles) > self.max_tiles:
+            self._tiles.popitem(last=False)
+        return tile
+
+    def get_tile_seed(self, tile_indices: Sequence[int]) -> int:
+        """Get the seed the tile of the given indices is generated from."""
+        return _get_hash('tile', self.seed, *tile_indices)
+
+    def _generate_tile(self, tile_indices: tuple[int, ...]) -> Laby:
+        """Generate the tile of the given indices, with the passages through its faces."""
+        from laby_api.__main__ import generate
+
+        tile = generate(self.tile_shape, self.algorithm, seed=self.get_tile_seed(tile_indices))
+        storage = tile.storage
+        storage.labels.clear()
+        storage.route_version += 1
+
+        ndim = len(self.tile_shape)
+        for axis, dim in enumerate(self.tile_shape):
+            backward_bit = 1 << 2 * (ndim - 1 - axis)
+            previous_tile_indices = (*tile_indices[:axis], tile_indices[axis] - 1, *tile_indices[axis + 1:])
+            backward_pos = self._get_passage_pos(previous_tile_indices, axis, 0)
+            forward_pos = self._get_passage_pos(tile_indices, axis, dim - 1)
+            storage.dirs[get_flat_index(backward_pos, self._tile_strides)] |= backward_bit
+            storage.dirs[get_flat_index(forward_pos, self._tile_strides)] |= backward_bit << 1
+        storage.dirs_version += 1
+        return tile
+
+    def _get_passage_pos(self, tile_indices: Sequence[int], axis: int, axis_index: int) -> tuple[int, ...]:
+        """Get the position, in a tile, of the passage joining the given tile to its next neighbor along the
+        given axis.
+
+        :param tile_indices: The indices of the tile before the passage.
+        :param axis: The axis the passage goes along.
+        :param axis_index: The index of the position along the axis: 0 on the side of the next tile, the last
+            one on the side of the given tile.
+        """
+        face_shape = (*self.tile_shape[:axis], *self.tile_shape[axis + 1:])
+        face_index = _get_hash('passage', self.seed, axis, *tile_indices) % prod(face_shape)
+        face_pos = get_indices(face_index, get_strides(face_shape))
+        return (*face_pos[:axis], axis_index, *face_pos[axis:])
+
+    def get_tile_indices(self, pos: Sequence[int]) -> tuple[tuple[int, ...], tuple[int, ...]]:
+        """Get the indices of the tile holding the given position, and the position inside that tile."""
+        tile_indices, local_pos = zip(*(divmod(index, dim) for index, dim in zip(pos, self.tile_shape)))
+        return tile_indices, local_pos
+
+    def __getitem__(self, pos: Sequence[int]) -> Node:
+        """Get a node from its position, possibly negative. The node views the storage of its tile."""
+        if len(pos) != len(self.tile_shape):
+            raise IndexError(f'Expected {len(self.tile_shape)} indices, got {len(pos)}.')
+
+        tile_indices, local_pos = self.get_tile_indices(pos)
+        storage = self.get_tile(tile_indices).storage
+        return Node.view(storage, get_flat_index(local_pos, self._tile_strides))
+
+    def window(self, origin: Sequence[int], shape: Sequence[int], *, enforce_walls: bool = True) -> Laby:
+        """Get a laby copying a window of this endless laby. Only the tiles overlapping the window are
+        generated, each one only once, and copied line by line.
+
+        :param origin: The position of the first node of the window.
+        :param shape: The shape of the window.
+        :param enforce_walls: Whether to close the window's outermost nodes, making it a standalone laby.
+            Else, they keep the passages leading out of the window.
+        """
+        origin, shape = tuple(origin), tuple(shape)
+        if len(origin) != len(self.tile_shape) or len(shape) != len(self.tile_shape):
+            raise TiledError(f'Expected windows of {len(self.tile_shape)} dimensions.')
+
+        strides = get_strides(shape)
+        dirs = array('B', bytes(prod(shape)))
+        tiles_ranges = [
+            range(start // dim, (start + len_ - 1) // dim + 1) if len_ else range(0)
+            for start, len_, dim in zip(origin, shape, self.tile_shape)
+        ]
+        for tile_indices in product(*tiles_ranges):
+            tile_dirs = self.get_tile(tile_indices).storage.dirs
+            tile_origin = [tile_index * dim for tile_index, dim in zip(tile_indices, self.tile_shape)]
+            lows = [max(start, tile_start) for start, tile_start in zip(origin, tile_origin)]
+            highs = [
+                min(start + len_, tile_start + dim)
+                for start, len_, tile_start, dim in zip(origin, shape, tile_origin, self.tile_shape)
+            ]
+            line_len = highs[-1] - lows[-1]
+            for leading_pos in product(*(range(low, high) for low, high in zip(lows[:-1], highs[:-1]))):
+                line_pos = (*leading_pos, lows[-1])
+                tile_index = get_flat_index(
+                    [index - tile_start for index, tile_start in zip(line_pos, tile_origin)], self._tile_strides,
+                )
+                index = get_flat_index([index - start for index, start in zip(line_pos, origin)], strides)
+                dirs[index:index + line_len] = tile_dirs[tile_index:tile_index + line_len]
+
+        return Laby(Storage(shape, dirs), enforce_walls=enforce_walls)
+
+    def window_strs(self, origin: Sequence[int], shape: Sequence[int]) -> Iterable[str]:
+        """Get the strs visually representing a 2D window of this endless laby, one per visual row. The
+        borders are drawn from the nodes just outside the window.
+
+        :param origin: The position of the first node of the window.
+        :param shape: The shape of the window.
+        """
+        if len(self.tile_shape) != 2:
+            raise TiledError('Only windows of 2D tiled labys can be rendered.')
+
+        rows, cols = shape[0] + 2, shape[1] + 2
+        dirs = self.window([index - 1 for index in origin], (rows, cols), enforce_walls=False).storage.dirs
+        return iter_window_strs(dirs[i * cols:(i + 1) * cols] for i in range(rows))
+
+    def solve(
+            self, start: Sequence[int], finish: Sequence[int], *,
+            method: str = 'bfs',
+            rng: RandomSource | None = None,
+            region: tuple[Sequence[int], Sequence[int]] | None = None,
+    ) -> list[Pos]:
+        """Solve this endless laby between two positions, inside a bounded region.
+
+        :param start: The start position.
+        :param finish: The finish position.
+        :param method: The solving method, see solve.
+        :param rng: The source of random numbers for the 'dfs' method.
+        :param region: The origin and shape of the region the route stays in. Defaults to the block of tiles
+            holding both positions, in which a route always exists.
+        :return: The positions of the route, from the start to the finish.
+        """
+        from laby_api.__main__ import solve
+
+        if region is None:
+            start_tile_indices, _ = self.get_tile_indices(start)
+            finish_tile_indices, _ = self.get_tile_indices(finish)
+            low_tile_indices = [min(indices) for indices in zip(start_tile_indices, finish_tile_indices)]
+            high_tile_indices = [max(indices) for indices in zip(start_tile_indices, finish_tile_indices)]
+            origin = [index * dim for index, dim in zip(low_tile_indices, self.tile_shape)]
+            shape = [
+                (high - low + 1) * dim for low, high, dim in zip(low_tile_indices, high_tile_indices, self.tile_shape)
+            ]
+        else:
+            origin, shape = region
+
+        local_start = [index - window_start for index, window_start in zip(start, origin)]
+        local_finish = [index - window_start for index, window_start in zip(finish, origin)]
+        if not all(0 <= index < dim for pos in (local_start, local_finish) for index, dim in zip(pos, shape)):
+            raise TiledError('The start and finish must be inside the region.')
+
+        window = self.window(origin, shape)
+        window.start = local_start
+        window.finish = local_finish
+
+        route = solve(window, method, rng)
+        return [Pos(index + window_start for index, window_start in zip(point.pos, origin)) for point in route][::-1]
+
+    def __repr__(self) -> str:
+        """Get a small representation of this laby for debugging."""
+        return f'{self.__class__.__name__}({self.tile_shape}, seed={self.seed})'
+
+
+def _get_hash(*values: str | int) -> int:
+    """Get a 64-bit hash of the given values, stable across runs and platforms."""
+    return int.from_bytes(hashlib.blake2b(repr(values).encode(), digest_size=8).digest(), 'little')
+
+
+class TiledError(Exception):
+    pass
@@ -0,0 +1,31 @@
+import pytest
+
+from laby_api import generate, generate_many, get_metrics, measure_many
+from laby_api.generators import GeneratorError
+
+
+class TestGenerateMany:
+    def test_matches_generate(self):
+        labys = sorted(generate_many((6, 7), 10, algorithm='kruskal', workers=2), key=lambda laby: laby.seed)
+        assert [laby.seed for laby in labys] == list(range(10))
+        for laby in labys:
+            assert str(laby) == str(generate((6, 7), 'kruskal', seed=laby.seed))
+
+    def test_seeds(self):
+        labys = list(generate_many((4, 4), seeds=[7, 3], workers=1))
+        assert sorted(laby.seed for laby in labys) == [3, 7]
+
+    def test_solved(self):
+        for laby in generate_many((5, 5), 3, method='bfs', workers=2):
+            assert laby.storage.route_dirs.tobytes().count(0) != laby.storage.size
+
+    def test_not_enough_seeds(self):
+        with pytest.raises(GeneratorError):
+            list(generate_many((4, 4), 3, seeds=[1]))
+
+
+class TestMeasureMany:
+    def test_matches_get_metrics(self):
+        labys = [generate((6, 7), 'kruskal', seed=seed) for seed in range(5)]
+        metrics = list(measure_many(iter(labys), workers=2))
+        assert [measures.as_dict() for measures in metrics] == [get_metrics(laby).as_dict() for laby in labys]
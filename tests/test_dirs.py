@@ -0,0 +1,54 @@
+import pytest
+
+from laby_api.dirs import (
+    Dirs, DirsError, Pos, MASK_MEMBERS, MASK_POPCOUNTS, MASK_OPPOSITES, BIT_INDICES, get_mask_offsets,
+)
+
+
+class TestDirs:
+    def test_iter(self):
+        assert list(Dirs.LEFT | Dirs.DOWN) == [Dirs.LEFT, Dirs.DOWN]
+        assert list(Dirs.NONE) == []
+
+    def test_opposite(self):
+        assert Dirs.UP.opposite() == Dirs.DOWN
+        with pytest.raises(DirsError):
+            Dirs.H.opposite()
+
+    def test_delta(self):
+        assert Pos((1, 1)) + Dirs.LEFT == (1, 0)
+        assert isinstance(Pos((1, 1)) + Dirs.UP, Pos)
+        with pytest.raises(DirsError):
+            Pos((1, 1)) + Dirs.V
+        with pytest.raises(DirsError):
+            Dirs.ALL.delta()
+
+    def test_more_dimensions(self):
+        assert Dirs.seq(3)[4:] == (Dirs.BACK, Dirs.FRONT)
+        assert Dirs.all(3) == Dirs.ALL | Dirs.BACK | Dirs.FRONT
+        assert Dirs.ANA.opposite() == Dirs.KATA
+        assert Dirs.FRONT.delta(3) == (1, 0, 0)
+        assert Pos((1, 1, 1)) + Dirs.BACK == (0, 1, 1)
+        assert Pos((1, 1, 1)) + Dirs.RIGHT == (1, 1, 2)
+        with pytest.raises(DirsError):
+            Pos((1, 1)) + Dirs.FRONT
+        assert Dirs.from_letters('bf') == Dirs.BACK | Dirs.FRONT
+
+
+class TestMaskTables:
+    @pytest.mark.parametrize('dirs', [Dirs(mask) for mask in range(256)])
+    def test_consistent_with_dirs(self, dirs):
+        assert MASK_MEMBERS[dirs.value] == tuple(dir_.value for dir_ in dirs)
+        assert MASK_POPCOUNTS[dirs.value] == len(list(dirs))
+        assert MASK_OPPOSITES[dirs.value] == sum(dir_.opposite().value for dir_ in dirs)
+
+    def test_bit_indices(self):
+        assert [BIT_INDICES[dir_.value] for dir_ in Dirs.seq()] == [0, 1, 2, 3]
+        assert BIT_INDICES[Dirs.V.value] == -1
+
+    def test_offsets(self):
+        offsets = get_mask_offsets((5, 1))
+        assert [offsets[dir_.value] for dir_ in Dirs.seq()] == [-1, 1, -5, 5]
+        assert offsets[Dirs.FRONT.value] == 0
+        offsets = get_mask_offsets((20, 5, 1))
+        assert [offsets[dir_.value] for dir_ in Dirs.seq(3)] == [-1, 1, -5, 5, -20, 20]
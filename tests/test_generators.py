@@ -0,0 +1,103 @@
+from itertools import product
+from math import prod
+
+import pytest
+
+from laby_api import generate, generate_empty
+from laby_api.dirs import Dirs
+from laby_api.generators import GENERATORS, GeneratorError, generate_rows
+from laby_api.laby import Laby
+from laby_api.rng import RandomSource
+
+
+def get_reached_and_passages(laby):
+    """Walk through the laby from its start, and count the passages between nodes."""
+    reached = {laby.start}
+    to_visit = [laby.start]
+    while to_visit:
+        pos = to_visit.pop()
+        for dir_ in laby[pos].dirs:
+            next_pos = pos + dir_
+            assert laby[next_pos].dirs & dir_.opposite()
+            if next_pos not in reached:
+                reached.add(next_pos)
+                to_visit.append(next_pos)
+
+    passages = sum(len(list(laby[pos].dirs)) for pos in product(*map(range, laby.shape))) // 2
+    return reached, passages
+
+
+class TestGenerators:
+    @pytest.mark.parametrize('algorithm', list(GENERATORS))
+    @pytest.mark.parametrize('shape', [(9, 13), (1, 7), (6, 1)])
+    def test_perfect_laby(self, algorithm, shape):
+        laby = generate(shape, algorithm)
+        reached, passages = get_reached_and_passages(laby)
+        assert len(reached) == shape[0] * shape[1]
+        assert passages == shape[0] * shape[1] - 1
+
+    @pytest.mark.parametrize('algorithm', list(GENERATORS))
+    @pytest.mark.parametrize('shape', [(1, ), (1, 1), (1, 1, 1)])
+    def test_single_node(self, algorithm, shape):
+        if algorithm == 'eller' and len(shape) != 2:
+            with pytest.raises(GeneratorError):
+                generate(shape, algorithm)
+            return
+
+        laby = generate(shape, algorithm)
+        laby.validate()
+        assert not any(laby.storage.dirs)
+
+    @pytest.mark.parametrize('algorithm', [algorithm for algorithm in GENERATORS if algorithm != 'eller'])
+    @pytest.mark.parametrize('shape', [(3, 4, 5), (2, 3, 1, 4), (5, )])
+    def test_perfect_laby_nd(self, algorithm, shape):
+        laby = generate(shape, algorithm)
+        laby.validate()
+        reached, passages = get_reached_and_passages(laby)
+        assert len(reached) == prod(shape)
+        assert passages == prod(shape) - 1
+
+    def test_eller_2d_only(self):
+        with pytest.raises(GeneratorError):
+            generate((3, 3, 3), 'eller')
+
+    @pytest.mark.parametrize('algorithm', list(GENERATORS))
+    def test_labels(self, algorithm):
+        laby = generate((4, 5), algorithm)
+        assert laby.start == (0, 0)
+        assert laby.finish == (3, 4)
+        assert laby[0, 0].label and laby[3, 4].label
+
+    @pytest.mark.parametrize('algorithm', list(GENERATORS))
+    def test_dirs_version(self, algorithm):
+        laby = generate_empty((4, 5))
+        write_all_nodes = laby.write_all_nodes
+        # The version once all the nodes are cleared, after which the generators carve directly into the dirs.
+        versions = [laby.storage.dirs_version]
+
+        def record_version(*args, **kwargs):
+            write_all_nodes(*args, **kwargs)
+            versions.append(laby.storage.dirs_version)
+
+        laby.write_all_nodes = record_version
+        GENERATORS[algorithm](laby, RandomSource(0), None)
+        assert laby.storage.dirs_version > versions[-1]
+
+    def test_unknown_algorithm(self):
+        with pytest.raises(GeneratorError):
+            generate((3, 3), 'unknown')
+
+
+class TestGenerateRows:
+    def test_endless(self):
+        rows = generate_rows((None, 5))
+        for _ in range(100):
+            assert len(next(rows)) == 5
+
+    def test_rows_match_laby(self):
+        rows = list(generate_rows((6, 4)))
+        laby = Laby.from_dirs([[Dirs(mask) for mask in row] for row in rows])
+        laby.start = (0, 0)
+        reached, passages = get_reached_and_passages(laby)
+        assert len(reached) == 6 * 4
+        assert passages == 6 * 4 - 1
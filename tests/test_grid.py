@@ -1,6 +1,6 @@
 import pytest
 
-from laby_api.grid import Grid
+from laby_api.grid import Grid, GridError
 
 
 class TestGrid:
@@ -48,3 +48,36 @@ class TestGrid:
     def test_set_item_list_type(self, grid):
         grid[1] = [20, 30]
         assert isinstance(grid[1], Grid)
+
+    def test_slice_is_view(self, grid):
+        view = grid[:, 1]
+        grid[0, 1] = 10
+        assert view == [10, 3]
+        view[1] = 30
+        assert grid == [[0, 10], [2, 30]]
+
+    def test_strided_slice(self, grid):
+        assert grid[::-1, ::-1] == [[3, 2], [1, 0]]
+
+    def test_shape(self, grid):
+        assert grid.shape == (2, 2)
+        assert grid[0, :1].shape == (1, )
+
+    def test_append(self, grid):
+        grid.append([4, 5])
+        assert grid == [[0, 1], [2, 3], [4, 5]]
+        with pytest.raises(GridError):
+            grid[:1].append([6, 7])
+
+    def test_from_buffer(self):
+        buffer = list(range(6))
+        grid = Grid.from_buffer(buffer, (2, 3))
+        grid[1, 2] = 50
+        assert buffer[5] == 50
+        assert grid[1] == [3, 4, 50]
+
+    def test_inconsistent_value(self):
+        with pytest.raises(TypeError):
+            Grid([0, 'a'])
+        with pytest.raises(GridError):
+            Grid([[0, 1], [2]])
@@ -0,0 +1,180 @@
+import io
+from types import SimpleNamespace
+
+import pytest
+
+from laby_api import generate
+from laby_api.dirs import Dirs, DirsError
+from laby_api.laby import Laby, LabyError, IncompatibleNeighborsError
+from laby_api.router import Router
+from laby_api.storage import Storage, StorageError
+
+
+class TestLaby:
+    @pytest.fixture
+    def laby(self):
+        return Laby.from_letters('r, lrd, l\nr, lu, ')
+
+    def test_shape(self, laby):
+        assert laby.shape == (2, 3)
+
+    def test_get_item_dirs(self, laby):
+        assert laby[0, 1].dirs == Dirs.LEFT | Dirs.RIGHT | Dirs.DOWN
+        assert laby[1, 2].dirs == Dirs.NONE
+
+    def test_get_item_raises_index_error(self, laby):
+        with pytest.raises(IndexError):
+            laby[0]
+        with pytest.raises(IndexError):
+            laby[2, 0]
+
+    def test_node_view_writes_through(self, laby):
+        laby[1, 0].route_dirs = Dirs.RIGHT
+        assert laby[1, 0].route_dirs == Dirs.RIGHT
+        assert laby[1, 1].route_dirs == Dirs.NONE
+
+    def test_ones_enforces_walls(self):
+        laby = Laby.ones((2, 2))
+        assert laby[0, 0].dirs == Dirs.RIGHT | Dirs.DOWN
+        assert laby[1, 1].dirs == Dirs.LEFT | Dirs.UP
+
+    def test_write_out_of_grid(self):
+        laby = Laby.zeros((3, 3))
+        router = Router(pos=(0, 0), shape=(3, 3))
+        router.advance(Dirs.LEFT)
+        laby.write(router.head)
+        assert laby[0, 0].dirs == Dirs.LEFT
+        assert sum(laby.storage.dirs) == Dirs.LEFT.value
+
+    @pytest.mark.parametrize('pos, dir_', [((1, 2), Dirs.RIGHT), ((2, 1), Dirs.DOWN), ((1, 1), Dirs.LEFT | Dirs.UP)])
+    def test_write_no_wraparound(self, pos, dir_):
+        laby = Laby.zeros((3, 3))
+        laby.write([SimpleNamespace(pos=pos, dir=dir_)])
+        assert laby[pos].dirs == dir_
+        assert sum(laby.storage.dirs) == dir_.value
+
+    def test_labels(self, laby):
+        laby.start = (0, 0)
+        laby.finish = (1, 2)
+        assert laby[0, 0].label
+        assert laby[1, 2].label
+        assert not laby[0, 1].label
+
+
+class TestLetters:
+    def test_to_letters(self):
+        assert Laby.from_letters('r, lrd, l\nr, lu, ').to_letters() == 'r, lrd, l\nr, lu, \n'
+
+    def test_any_order_and_case(self):
+        laby = Laby.from_letters('R , DLR,l\nr,UL ,')
+        assert laby[0, 1].dirs == Dirs.LEFT | Dirs.RIGHT | Dirs.DOWN
+        assert laby[1, 1].dirs == Dirs.LEFT | Dirs.UP
+
+    def test_whitespace(self):
+        laby = Laby.from_letters('r,\tl\n r\t, L ')
+        assert laby.to_letters() == 'r, l\nr, l\n'
+        with pytest.raises(DirsError):
+            Laby.from_letters('l r, l')
+
+    def test_file_round_trip(self):
+        laby = generate((7, 9))
+        file = io.StringIO()
+        laby.to_letters(file)
+        file.seek(0)
+        assert Laby.from_letters(file).storage.dirs == laby.storage.dirs
+
+    def test_errors(self):
+        with pytest.raises(DirsError):
+            Laby.from_letters('r, x')
+        with pytest.raises(LabyError):
+            Laby.from_letters('r, l\nr')
+
+
+class TestValidate:
+    @pytest.fixture
+    def laby(self):
+        return Laby.from_letters('r, lrd, l\nr, lu, ')
+
+    def test_valid(self, laby):
+        laby.validate()
+        Laby.ones((4, 5)).validate()
+        Laby.zeros((0, 0)).validate()
+
+    def test_positions(self, laby):
+        laby[0, 2].dirs = Dirs.NONE
+        laby[1, 1].dirs = Dirs.LEFT | Dirs.RIGHT
+        with pytest.raises(IncompatibleNeighborsError) as exc_info:
+            laby.validate()
+        assert exc_info.value.positions == [(0, 1), (1, 1)]
+
+    def test_open_outwards(self):
+        laby = Laby.ones((2, 2))
+        laby[0, 0].dirs = Dirs.ALL
+        laby[1, 1].dirs = Dirs.ALL
+        with pytest.raises(IncompatibleNeighborsError) as exc_info:
+            laby.validate()
+        assert exc_info.value.positions == [(0, 0), (1, 1)]
+
+    def test_cached_until_modified(self, laby):
+        laby.validate()
+        laby.storage.dirs[0] = Dirs.NONE.value
+        laby.validate()
+        laby.storage.dirs_version += 1
+        with pytest.raises(IncompatibleNeighborsError):
+            laby.validate()
+
+    def test_invalidated_by_write(self, laby):
+        laby[1, 0].dirs = Dirs.NONE
+        with pytest.raises(IncompatibleNeighborsError):
+            laby.validate()
+        laby.write_all_nodes(Dirs.NONE)
+        laby.validate()
+
+
+class TestMoreDimensions:
+    @pytest.fixture
+    def laby(self):
+        laby = Laby.ones((2, 3, 4))
+        laby.start = (0, 0, 0)
+        laby.finish = (1, 2, 3)
+        return laby
+
+    def test_ones_enforces_walls(self, laby):
+        assert laby[0, 0, 0].dirs == Dirs.RIGHT | Dirs.DOWN | Dirs.FRONT
+        assert laby[1, 1, 1].dirs == Dirs.ALL | Dirs.BACK
+        laby.validate()
+
+    def test_validate_positions(self, laby):
+        laby[0, 1, 2].dirs &= ~Dirs.FRONT
+        laby[1, 2, 3].dirs |= Dirs.FRONT
+        with pytest.raises(IncompatibleNeighborsError) as exc_info:
+            laby.validate()
+        assert exc_info.value.positions == [(0, 1, 2), (1, 2, 3)]
+
+    def test_strs(self, laby):
+        strs = list(laby.strs)
+        assert strs[0] == '[0, :, :]'
+        assert strs[1:9] == list(laby.slice_strs((0, )))
+        assert strs[9] == '[1, :, :]'
+        assert ' f ' in strs[4] and ' b ' in strs[13]
+
+    def test_render_window(self, laby):
+        slice_strs = list(laby.slice_strs((1, )))
+        window_strs = list(laby.render_window(slice(1, 3), slice(0, 2), (1, )))
+        assert window_strs == [str_[:13] for str_ in slice_strs[2:7]]
+        with pytest.raises(IndexError):
+            laby.render_window(slice(None), slice(None))
+
+    def test_2d_only(self, laby):
+        with pytest.raises(LabyError):
+            laby.to_letters()
+        with pytest.raises(LabyError):
+            list(laby.row_strs(0))
+        with pytest.raises(LabyError):
+            laby.render_changes()
+        with pytest.raises(IndexError):
+            laby.slice_strs(())
+
+    def test_too_many_dimensions(self):
+        with pytest.raises(StorageError):
+            Storage((2, ) * 5)
@@ -0,0 +1,62 @@
+import pytest
+
+from laby_api import generate, solve
+from laby_api.laby import Laby
+from laby_api.metrics import UNREACHED, get_distances, get_metrics
+
+
+class TestDistances:
+    def test_corridor(self):
+        laby = Laby.from_letters('r, lr, lr, l')
+        laby.start = (0, 1)
+        assert list(get_distances(laby)) == [1, 0, 1, 2]
+        assert list(get_distances(laby, (0, 3))) == [3, 2, 1, 0]
+
+    def test_unreached(self):
+        laby = Laby.from_letters('r, l, \nr, l, ')
+        assert list(get_distances(laby)) == [0, 1, UNREACHED, UNREACHED, UNREACHED, UNREACHED]
+
+
+class TestMetrics:
+    @pytest.fixture(params=[(1, 1), (1, 8), (7, 9), (4, 4, 4), (2, 3, 2, 3)])
+    def laby(self, request):
+        return generate(request.param, 'kruskal', seed=3)
+
+    def test_solution_len(self, laby):
+        assert get_metrics(laby).solution_len == len(solve(laby, 'bfs')) - 1
+
+    def test_diameter(self, laby):
+        storage = laby.storage
+        diameter = max(max(get_distances(laby, storage.indices(index))) for index in range(storage.size))
+        assert get_metrics(laby).diameter == diameter
+
+    def test_counts(self, laby):
+        metrics = get_metrics(laby)
+        size = laby.storage.size
+        assert metrics.reachable == size
+        assert sum(metrics.branching) == size
+        assert metrics.branching[1] == metrics.dead_ends
+        # In a perfect laby, each passage belongs to exactly one corridor.
+        assert round(metrics.corridors * metrics.corridor_len_mean) == size - 1
+
+    def test_distances_given(self, laby):
+        assert get_metrics(laby, get_distances(laby)).as_dict() == get_metrics(laby).as_dict()
+
+    def test_corridors(self):
+        laby = Laby.from_letters('rd, lr, l\nu, , ')
+        laby.start = (1, 0)
+        laby.finish = (0, 2)
+        metrics = get_metrics(laby)
+        assert metrics.reachable == 4
+        assert metrics.solution_len == 3
+        assert metrics.diameter == 3
+        assert metrics.dead_ends == 2
+        assert metrics.branching == [2, 2, 2, 0, 0]
+        assert (metrics.corridors, metrics.corridor_len_mean, metrics.corridor_len_max) == (1, 3.0, 3)
+
+    def test_unsolvable(self):
+        laby = Laby.from_letters('r, l, ')
+        laby.finish = (0, 2)
+        metrics = get_metrics(laby)
+        assert metrics.solution_len is None
+        assert metrics.reachable == 2
@@ -0,0 +1,112 @@
+import mmap
+
+import pytest
+
+from laby_api import generate, solve
+from laby_api.dirs import Dirs
+from laby_api.laby import Laby
+from laby_api.packed import PackedLayer, PackedError, pack, unpack
+
+
+class TestPackedLayer:
+    @pytest.fixture
+    def layer(self):
+        return PackedLayer(bytearray(pack(bytes(range(7)))), 7)
+
+    def test_pack_unpack(self):
+        assert unpack(pack(bytes([1, 2, 15]))) == bytearray([1, 2, 15, 0])
+
+    def test_get_item(self, layer):
+        assert [layer[index] for index in range(7)] == list(range(7))
+        assert layer[-1] == 6
+        with pytest.raises(IndexError):
+            layer[7]
+
+    def test_slices(self, layer):
+        assert list(layer[1:6]) == [1, 2, 3, 4, 5]
+        assert list(layer[::3]) == [0, 3, 6]
+        assert layer.tobytes() == bytes(range(7))
+
+    def test_set_item(self, layer):
+        layer[3] = 9
+        layer[1:6] = [15, 14, 13, 12, 11]
+        assert list(layer) == [0, 15, 14, 13, 12, 11, 6]
+
+    def test_buffer_too_short(self):
+        with pytest.raises(PackedError):
+            PackedLayer(bytearray(3), 7)
+
+
+class TestSaveOpen:
+    @pytest.fixture
+    def path(self, tmp_path):
+        return str(tmp_path / 'laby.bin')
+
+    def test_round_trip(self, path):
+        laby = generate((9, 11), 'kruskal')
+        laby.save(path)
+        opened = Laby.open(path)
+        assert opened.shape == laby.shape
+        assert opened.start == laby.start and opened.finish == laby.finish
+        assert opened.generator == 'kruskal'
+        assert opened.storage.dirs.tobytes() == laby.storage.dirs.tobytes()
+        assert str(opened) == str(laby)
+
+    def test_route_layer(self, path):
+        laby = generate((5, 6))
+        laby.write(solve(laby, 'bfs'), do_walls=False)
+        laby.save(path)
+        assert str(Laby.open(path)) == str(laby)
+
+    def test_solve_from_mapping(self, path):
+        laby = generate((8, 8), 'wilson')
+        laby.save(path)
+        assert len(solve(Laby.open(path), 'bfs')) == len(solve(laby, 'bfs'))
+
+    def test_read_only(self, path):
+        Laby.ones((2, 2)).save(path)
+        with pytest.raises(TypeError):
+            Laby.open(path)[0, 0].dirs = Dirs.NONE
+
+    def test_writable(self, path):
+        Laby.ones((2, 3)).save(path)
+        Laby.open(path, writable=True)[0, 1].dirs = Dirs.DOWN
+        assert Laby.open(path)[0, 1].dirs == Dirs.DOWN
+
+    def test_wide_layers(self, path):
+        laby = generate((3, 4, 5), 'kruskal')
+        laby.write(solve(laby, 'bfs'), do_walls=False)
+        laby.save(path)
+        opened = Laby.open(path)
+        assert opened.storage.dirs.tobytes() == laby.storage.dirs.tobytes()
+        assert str(opened) == str(laby)
+        assert Laby.from_bytes(laby.to_bytes()).storage.route_dirs == laby.storage.route_dirs
+
+    def test_not_a_laby(self, path):
+        with open(path, 'wb') as file:
+            file.write(b'nothing to see here')
+        with pytest.raises(PackedError):
+            Laby.open(path)
+
+    @pytest.mark.parametrize('data', [b'nothing to see here', generate((9, 11)).to_bytes()[:-4]])
+    def test_invalid_closes_mapping(self, path, data, monkeypatch):
+        with open(path, 'wb') as file:
+            file.write(data)
+        mappings = []
+
+        def record_mapping(*args, **kwargs):
+            mappings.append(mmap_type(*args, **kwargs))
+            return mappings[-1]
+
+        mmap_type = mmap.mmap
+        monkeypatch.setattr(mmap, 'mmap', record_mapping)
+        with pytest.raises(PackedError):
+            Laby.open(path)
+        assert len(mappings) == 1 and mappings[0].closed
+
+    def test_seed_out_of_range(self, path):
+        laby = generate((3, 3), seed=2 ** 63)
+        with pytest.raises(PackedError):
+            laby.save(path)
+        laby.seed = -2 ** 63
+        assert Laby.from_bytes(laby.to_bytes()).seed == -2 ** 63
@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+from laby_api import generate, solve
+from laby_api.dirs import Dirs
+from laby_api.laby import Laby
+from laby_api.paths import PathIndex, PathIndexError
+
+
+class TestPathIndex:
+    @pytest.fixture(params=[(1, 1), (1, 9), (9, 13), (40, 70), (4, 5, 6), (3, 3, 3, 3)])
+    def laby(self, request):
+        return generate(request.param, 'kruskal', seed=2)
+
+    @pytest.fixture
+    def queries(self, laby):
+        rng = random.Random(0)
+        return [
+            (tuple(rng.randrange(dim) for dim in laby.shape), tuple(rng.randrange(dim) for dim in laby.shape))
+            for _ in range(50)
+        ]
+
+    def test_same_as_bfs(self, laby, queries):
+        index = PathIndex(laby)
+        for start, finish in queries:
+            laby.start, laby.finish = start, finish
+            route = solve(laby, 'bfs')
+            assert index.get_distance(start, finish) == len(route) - 1
+            assert [point.pos for point in index.get_route(start, finish)] == [point.pos for point in route]
+
+    def test_common_ancestor(self, laby, queries):
+        index = PathIndex(laby)
+        for pos, other_pos in queries:
+            ancestor = index.get_common_ancestor(pos, other_pos)
+            assert index.get_distance(pos, other_pos) == (
+                index.get_distance(pos, ancestor) + index.get_distance(ancestor, other_pos)
+            )
+            assert index.get_distance(laby.start, pos) == (
+                index.get_distance(laby.start, ancestor) + index.get_distance(ancestor, pos)
+            )
+
+    def test_same_pos(self):
+        laby = generate((5, 5), seed=0)
+        index = PathIndex(laby)
+        assert index.get_distance((2, 3), (2, 3)) == 0
+        assert [point.pos for point in index.get_route((2, 3), (2, 3))] == [(2, 3)]
+
+    def test_loops(self):
+        with pytest.raises(PathIndexError):
+            PathIndex(Laby.ones((3, 3)))
+
+    def test_unreachable(self):
+        with pytest.raises(PathIndexError):
+            PathIndex(Laby.zeros((2, 2)))
+
+    def test_modified(self):
+        laby = generate((5, 5), seed=0)
+        index = PathIndex(laby)
+        laby[0, 0].dirs = Dirs.NONE
+        with pytest.raises(PathIndexError):
+            index.get_distance((0, 0), (4, 4))
@@ -0,0 +1,158 @@
+import io
+
+import pytest
+
+from laby_api import generate, solve
+from laby_api.dirs import Dirs
+from laby_api.laby import Laby, LabyError, IncompatibleNeighborsError
+from laby_api.render import RenderError, iter_rows_strs, iter_window_strs, write_rows
+
+
+class TestRenderRows:
+    @pytest.fixture
+    def laby(self):
+        return generate((5, 7), 'backtracker')
+
+    @pytest.fixture
+    def rows(self, laby):
+        return [[laby[i, j].dirs.value for j in range(laby.shape[1])] for i in range(laby.shape[0])]
+
+    def test_same_as_laby(self, laby, rows):
+        assert '\n'.join(iter_rows_strs(rows, start=laby.start, finish=laby.finish)) == str(laby)
+
+    def test_write_rows(self, laby, rows):
+        file = io.StringIO()
+        write_rows(iter(rows), file, start=laby.start, finish=laby.finish)
+        assert file.getvalue() == f'{laby}\n'
+
+    def test_no_rows(self):
+        assert list(iter_rows_strs([])) == []
+
+    def test_window(self, rows):
+        margin_rows = [[0] * 9, *([0, *row, 0] for row in rows), [0] * 9]
+        window_strs = list(iter_window_strs(margin_rows))
+        laby_strs = list(iter_rows_strs(rows))
+        assert len(window_strs) == len(laby_strs) - 1
+        assert window_strs[1:-1:2] == [str_[:len(window_strs[1])] for str_ in laby_strs[1:-1:2]]
+        assert list(iter_window_strs([])) == []
+
+    def test_incompatible_rows(self, rows):
+        rows[0][0] = Dirs.NONE.value
+        with pytest.raises(RenderError):
+            list(iter_rows_strs(rows))
+
+
+class TestRenderLaby:
+    @pytest.fixture
+    def laby(self):
+        laby = Laby.from_letters('r, lrd, l\nr, lru, l')
+        laby.start = (0, 0)
+        laby.finish = (1, 2)
+        laby[0, 0].route_dirs = Dirs.RIGHT
+        laby[0, 1].route_dirs = Dirs.DOWN
+        laby[1, 1].route_dirs = Dirs.RIGHT
+        return laby
+
+    def test_str(self, laby):
+        assert str(laby) == (
+            '┏━━━━━━━━━━━━━━━━━┓     \n'
+            '┃ ←┼→─→──┐        ┃     \n'
+            '┣━━━━━╸  ↓  ╺━━━━━┫     \n'
+            '┃        └──→─→┼← ┃     \n'
+            '┗━━━━━━━━━━━━━━━━━┛     \n'
+            '                        '
+        )
+
+    def test_render_to(self, laby):
+        file = io.StringIO()
+        laby.render_to(file)
+        assert file.getvalue() == f'{laby}\n'
+
+    def test_row_strs(self, laby):
+        strs = str(laby).splitlines()
+        for i in range(3):
+            assert list(laby.row_strs(i)) == strs[2 * i:2 * i + 2]
+
+    def test_render_window_whole(self, laby):
+        strs = str(laby).splitlines()
+        window_strs = list(laby.render_window(slice(None), slice(None)))
+        assert window_strs == [str_[:len(window_strs[0])] for str_ in strs[:-1]]
+
+    def test_render_window_borders(self, laby):
+        strs = str(laby).splitlines()
+        # The route goes through the borders of this window, on the right and below.
+        assert list(laby.render_window(range(0, 1), range(1, 2))) == [str_[6:13] for str_ in strs[:3]]
+        assert list(laby.render_window(slice(1, 2), slice(1, 3))) == [str_[6:19] for str_ in strs[2:5]]
+
+    def test_render_window_large(self):
+        laby = generate((40, 60), 'kruskal', seed=0)
+        laby.write(solve(laby, 'bfs'), do_walls=False)
+        strs = str(laby).splitlines()
+        # The route crosses the borders of this window, whose arrows are drawn from the nodes outside it.
+        window_strs = list(laby.render_window(range(10, 25), range(20, 45)))
+        assert any(arrow in str_ for str_ in window_strs for arrow in '←→↑↓')
+        assert window_strs == [str_[20 * 6:45 * 6 + 1] for str_ in strs[2 * 10:2 * 25 + 1]]
+
+    def test_render_window_out_of_range(self, laby):
+        with pytest.raises(IndexError):
+            list(laby.render_window(range(0, 3), range(0, 4)))
+        with pytest.raises(LabyError):
+            list(laby.render_window(range(0, 2, 2), range(0, 3)))
+
+    def test_render_changes(self, laby):
+        strs = str(laby).splitlines()
+        assert laby.render_changes() == list(enumerate(strs))
+        assert laby.render_changes() == []
+
+    def test_render_changes_after_write(self):
+        laby = generate((12, 16), 'kruskal', seed=0)
+        laby.render_changes()
+        strs = str(laby).splitlines()
+        route = solve(laby, 'bfs')
+        laby.write(route, do_walls=False)
+        changes = laby.render_changes()
+        assert len(changes) < len(strs)
+        for visual_i, str_ in changes:
+            strs[visual_i] = str_
+        other = generate((12, 16), 'kruskal', seed=0)
+        other.write(solve(other, 'bfs'), do_walls=False)
+        assert strs == str(other).splitlines() == str(laby).splitlines()
+
+    def test_render_changes_labels(self, laby):
+        laby.render_changes()
+        laby.start = (1, 0)
+        changes = laby.render_changes()
+        assert [visual_i for visual_i, _ in changes] == [3]
+        assert changes[0][1] == str(laby).splitlines()[3]
+
+    def test_render_changes_untracked_dirs(self, laby):
+        laby.render_changes()
+        laby[0, 1].dirs &= ~Dirs.DOWN
+        laby[1, 1].dirs &= ~Dirs.UP
+        changes = laby.render_changes()
+        assert [visual_i for visual_i, _ in changes] == [2]
+        assert changes[0][1] == str(laby).splitlines()[2]
+
+    def test_render_changes_untracked_route(self, laby):
+        laby.render_changes()
+        laby[1, 1].label = 'X'
+        laby[0, 0].route_dirs = Dirs.NONE
+        strs = str(laby).splitlines()
+        assert 'X' in strs[3]
+        changes = laby.render_changes()
+        assert {1, 3} <= {visual_i for visual_i, _ in changes}
+        assert all(str_ == strs[visual_i] for visual_i, str_ in changes)
+
+    def test_render_changes_after_str(self, laby):
+        laby.render_changes()
+        laby.write_all_nodes(Dirs.NONE)
+        strs = str(laby).splitlines()
+        changes = laby.render_changes()
+        assert changes
+        assert all(str_ == strs[visual_i] for visual_i, str_ in changes)
+        assert laby.render_changes() == []
+
+    def test_incompatible_neighbors(self, laby):
+        laby[0, 0].dirs = Dirs.NONE
+        with pytest.raises(IncompatibleNeighborsError):
+            str(laby)
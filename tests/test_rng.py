@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+from laby_api import generate, solve
+from laby_api.dirs import Dirs
+from laby_api.generators import GENERATORS
+from laby_api.laby import Laby
+from laby_api.rng import RandomSource
+
+
+class TestRandomSource:
+    def test_reproducible(self):
+        first, second = RandomSource(3, block_len=7), RandomSource(random.Random(3), block_len=5)
+        assert [first.random() for _ in range(20)] == [second.random() for _ in range(20)]
+
+    def test_ranges(self):
+        rng = RandomSource(0)
+        assert {rng.randrange(3) for _ in range(100)} == {0, 1, 2}
+        assert {rng.coin() for _ in range(100)} == {False, True}
+
+    def test_choice_dir(self):
+        rng = RandomSource(0)
+        dirs = Dirs.LEFT | Dirs.DOWN
+        assert {Dirs(rng.choice_dir(dirs.value)) for _ in range(100)} == {Dirs.LEFT, Dirs.DOWN}
+        assert rng.choice_dir(Dirs.NONE.value) == 0
+        assert Dirs.UP.choice(rng) == Dirs.UP
+
+    def test_shuffle(self):
+        items = list(range(10))
+        RandomSource(0).shuffle(items)
+        assert sorted(items) == list(range(10))
+
+    def test_numpy_generator(self):
+        np = pytest.importorskip('numpy')
+        rng = RandomSource(np.random.default_rng(0))
+        assert 0 <= rng.random() < 1
+
+
+class TestReproducibleRuns:
+    @pytest.mark.parametrize('algorithm', list(GENERATORS))
+    def test_generate(self, algorithm):
+        assert str(generate((7, 8), algorithm, rng=RandomSource(5))) == str(generate((7, 8), algorithm, seed=5))
+
+    def test_solve(self):
+        laby = Laby.ones((9, 9))
+        laby.start = (0, 0)
+        laby.finish = (8, 8)
+        routes = [solve(laby, 'dfs', RandomSource(2)) for _ in range(2)]
+        assert [route.pos for route in routes[0]] == [route.pos for route in routes[1]]
@@ -0,0 +1,110 @@
+import pytest
+
+from laby_api import generate, solve
+from laby_api.dirs import Dirs, Pos
+from laby_api.router import Router
+from laby_api.stats import RouterStats, Stats
+
+
+class TestRouter:
+    @pytest.fixture(params=[False, True], ids=['dense', 'sparse'])
+    def router(self, request):
+        return Router(pos=Pos((0, 0)), shape=(3, 3), sparse=request.param)
+
+    def test_advance(self, router):
+        router.advance(Dirs.RIGHT)
+        router.advance(Dirs.DOWN)
+        assert [point.pos for point in router.head] == [(1, 1), (0, 1), (0, 0)]
+        assert [point.dir for point in router.head] == [Dirs.NONE, Dirs.DOWN, Dirs.RIGHT]
+
+    def test_dirs_choices_exclude_visited(self, router):
+        router.advance(Dirs.RIGHT)
+        router.advance(Dirs.DOWN)
+        assert router.get_dirs_choices(Dirs.ALL) == Dirs.LEFT | Dirs.RIGHT | Dirs.DOWN
+        router.advance(Dirs.LEFT)
+        assert router.get_dirs_choices(Dirs.RIGHT | Dirs.UP | Dirs.DOWN) == Dirs.DOWN
+
+    def test_dirs_choices_exclude_backtracked(self, router):
+        router.advance(Dirs.RIGHT)
+        router.advance(Dirs.DOWN)
+        router.backtrack(recreate=False)
+        assert router.head.pos == (0, 1)
+        assert router.get_dirs_choices(Dirs.LEFT | Dirs.RIGHT | Dirs.DOWN) == Dirs.RIGHT
+
+    def test_backtracked_reachable_from_new_point(self, router):
+        router.advance(Dirs.DOWN)
+        router.backtrack(recreate=False)
+        router.advance(Dirs.RIGHT)
+        assert router.get_dirs_choices(Dirs.ALL) & Dirs.LEFT == Dirs.NONE
+        router.advance(Dirs.DOWN)
+        assert router.get_dirs_choices(Dirs.ALL) & Dirs.LEFT == Dirs.LEFT
+
+    def test_branch_routes_leaves_route_untouched(self, router):
+        router.advance(Dirs.RIGHT)
+        router.advance(Dirs.RIGHT)
+        router.branch_routes()
+        router.advance(Dirs.DOWN)
+        main_route, branch = router
+        assert [point.pos for point in main_route] == [(0, 2), (0, 1), (0, 0)]
+        assert [point.pos for point in branch] == [(1, 1), (0, 1), (0, 0)]
+        assert len(list(router.points())) == 5
+
+    def test_branch_routes_without_prev(self, router):
+        with pytest.raises(IndexError):
+            router.branch_routes()
+        assert len(list(router)) == 1
+
+    def test_shape(self, router):
+        router.advance(Dirs.DOWN)
+        router.branch_routes()
+        router.advance(Dirs.RIGHT)
+        router.advance(Dirs.RIGHT)
+        main_route, branch = router
+        assert main_route.shape == (2, 1)
+        assert branch.shape == (1, 3)
+        assert router.shape == (2, 3)
+
+    def test_long_route(self):
+        router = Router(pos=Pos((0, 0)), shape=(1, 100_000))
+        for _ in range(99_999):
+            router.advance(Dirs.RIGHT)
+        assert len(router.head) == 100_000
+        assert router.head.start.pos == (0, 0)
+
+
+class TestRouterStats:
+    @pytest.fixture
+    def stats(self):
+        return RouterStats()
+
+    def test_counters(self, stats):
+        router = Router(pos=Pos((0, 0)), shape=(3, 3), stats=stats)
+        router.advance(Dirs.RIGHT)
+        router.advance(Dirs.RIGHT)
+        router.backtrack(recreate=False)
+        router.branch_routes()
+        router.advance(Dirs.DOWN)
+        router.backtrack(recreate=True)
+        assert router.get_dirs_choices(Dirs.NONE) == Dirs.NONE
+        assert stats.as_dict() == {
+            'advances': 3, 'backtracks': 2, 'recreating_backtracks': 1, 'branches': 1, 'dead_ends': 1,
+            'peak_depth': 3,
+        }
+
+    def test_events(self):
+        events = []
+        router = Router(pos=Pos((0, 0)), shape=(3, 3), on_event=lambda event, router_: events.append(event))
+        router.advance(Dirs.DOWN)
+        router.backtrack(recreate=False)
+        router.advance(Dirs.RIGHT)
+        router.branch_routes()
+        assert events == ['advance', 'backtrack', 'advance', 'branch']
+
+    def test_generate_and_solve(self):
+        stats = Stats()
+        laby = generate((8, 8), seed=0, stats=stats)
+        solve(laby, 'dfs', stats=stats)
+        solve(laby, 'bfs', stats=stats)
+        assert set(stats.phases) == {'empty', 'carve', 'search'}
+        assert stats.router.advances and stats.router.branches and stats.router.dead_ends
+        assert stats.router.peak_depth <= 64
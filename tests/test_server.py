@@ -0,0 +1,144 @@
+import asyncio
+import base64
+from concurrent.futures import ThreadPoolExecutor
+import json
+import socket
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from laby_api import generate, solve
+from laby_api import server as server_module
+from laby_api.laby import Laby
+from laby_api.server import LabyServer
+
+
+class ServerThread:
+    """A laby server running in a thread with its own event loop, on a free port."""
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.laby_server = LabyServer(workers=2)
+        tcp_server = self.loop.run_until_complete(self.laby_server.start(port=0))
+        self.port = tcp_server.sockets[0].getsockname()[1]
+        self.url = f'http://127.0.0.1:{self.port}'
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self._thread.start()
+
+    def post(self, path, params=None, *, method='POST'):
+        """Send a request to the server, and get the status and body of the response."""
+        data = json.dumps(params).encode() if params is not None else None
+        request = urllib.request.Request(self.url + path, data=data, method=method)
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as error:
+            return error.code, error.read()
+
+    def post_raw(self, path, params):
+        """Send a request to the server, and get all the bytes received until the connection is closed."""
+        body = json.dumps(params).encode()
+        with socket.create_connection(('127.0.0.1', self.port)) as sock:
+            sock.sendall(
+                f'POST {path} HTTP/1.1\r\nConnection: close\r\nContent-Length: {len(body)}\r\n\r\n'.encode() + body
+            )
+            received = b''
+            while data := sock.recv(65536):
+                received += data
+        return received
+
+    def close(self):
+        """Stop the server and its thread."""
+        asyncio.run_coroutine_threadsafe(self.laby_server.close(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+
+@pytest.fixture(scope='module')
+def server():
+    server_thread = ServerThread()
+    yield server_thread
+    server_thread.close()
+
+
+class TestEndpoints:
+    def test_generate(self, server):
+        status, body = server.post('/generate', {'shape': [6, 7], 'algorithm': 'kruskal', 'seed': 3})
+        assert status == 200
+        payload = json.loads(body)
+        laby = Laby.from_bytes(base64.b64decode(payload['laby']))
+        assert str(laby) == str(generate((6, 7), 'kruskal', seed=3))
+        assert payload['start'] == [0, 0] and payload['finish'] == [5, 6]
+
+    def test_solve(self, server):
+        laby = generate((6, 7), seed=4)
+        params = {'laby': base64.b64encode(laby.to_bytes()).decode(), 'method': 'bfs'}
+        status, body = server.post('/solve', params)
+        assert status == 200
+        route = solve(laby, 'bfs')
+        assert json.loads(body)['route'] == [list(point.pos) for point in route][::-1]
+
+    @pytest.mark.parametrize('shape', [(5, ), (150, 9), (2, 3, 4)])
+    def test_render_text(self, server, shape):
+        status, body = server.post('/render', {'shape': list(shape), 'seed': 5, 'method': 'bfs'})
+        assert status == 200
+        laby = generate(shape, seed=5)
+        laby.write(solve(laby, 'bfs'), do_walls=False)
+        assert body.decode() == f'{laby}\n'
+
+    def test_render_packed(self, server):
+        status, body = server.post('/render', {'shape': [4, 5], 'seed': 6, 'format': 'packed'})
+        assert status == 200
+        assert str(Laby.from_bytes(body)) == str(generate((4, 5), seed=6))
+
+    def test_coalesced(self, server):
+        computations = server.laby_server.computations
+        params = {'shape': [300, 300], 'algorithm': 'kruskal', 'seed': 7}
+        with ThreadPoolExecutor(4) as executor:
+            responses = list(executor.map(lambda _: server.post('/generate', params), range(4)))
+        assert len({body for _, body in responses}) == 1
+        assert server.laby_server.computations - computations == 1
+
+
+class TestErrors:
+    @pytest.mark.parametrize('path, params, method, expected_status', [
+        ('/nowhere', {}, 'POST', 404),
+        ('/generate', None, 'GET', 405),
+        ('/generate', {'shape': [0, 3]}, 'POST', 400),
+        ('/generate', {'shape': [3, 3], 'algorithm': 'nope'}, 'POST', 400),
+        ('/generate', {'shape': [4096, 4096]}, 'POST', 400),
+        ('/solve', {'laby': 'not base64!'}, 'POST', 400),
+        ('/solve', {'laby': base64.b64encode(b'LABY garbage').decode()}, 'POST', 400),
+        ('/render', {'shape': [3, 3], 'format': 'svg'}, 'POST', 400),
+    ])
+    def test_client_errors(self, server, path, params, method, expected_status):
+        status, body = server.post(path, params, method=method)
+        assert status == expected_status
+        assert 'error' in json.loads(body)
+
+    def test_route_not_found(self, server):
+        laby = Laby.zeros((3, 3))
+        laby.start, laby.finish = (0, 0), (2, 2)
+        status, _ = server.post('/solve', {'laby': base64.b64encode(laby.to_bytes()).decode(), 'method': 'bfs'})
+        assert status == 422
+
+    def test_internal_error(self, server, monkeypatch):
+        def fail(params):
+            raise RuntimeError('Unexpected.')
+
+        monkeypatch.setattr(server_module, '_get_seed', fail)
+        status, body = server.post('/generate', {'shape': [3, 3]})
+        assert status == 500
+        assert json.loads(body) == {'error': 'Internal error: RuntimeError.'}
+
+    def test_failing_part_aborts_stream(self, server, monkeypatch):
+        get_render_parts = server_module._get_render_parts
+        # A slice of too many dimensions fails to render, after the first part was sent.
+        monkeypatch.setattr(server_module, '_get_render_parts', lambda shape: [*get_render_parts(shape), ((0, ), None)])
+        received = server.post_raw('/render', {'shape': [3, 3], 'seed': 8})
+        assert received.startswith(b'HTTP/1.1 200 OK\r\n')
+        assert received.count(b'HTTP/1.1') == 1
+        assert str(generate((3, 3), seed=8)).encode() in received
+        assert not received.endswith(b'0\r\n\r\n')
@@ -0,0 +1,67 @@
+import pytest
+
+from laby_api import generate, solve
+from laby_api.laby import Laby
+from laby_api.solvers import SOLVERS, RouteNotFoundError, SolverError
+
+
+SHORTEST_METHODS = ['bfs', 'astar', 'bidirectional']
+
+
+class TestSolvers:
+    @pytest.fixture
+    def laby(self):
+        laby = Laby.ones((6, 8))
+        laby.start = (0, 0)
+        laby.finish = (5, 7)
+        return laby
+
+    @pytest.mark.parametrize('method', SHORTEST_METHODS)
+    def test_shortest(self, laby, method):
+        route = solve(laby, method)
+        assert len(route) == 6 + 8 - 1
+        assert route.pos == laby.finish
+        assert route.start.pos == laby.start
+
+    @pytest.mark.parametrize('method', list(SOLVERS))
+    def test_generated(self, method):
+        laby = generate((10, 12))
+        route = solve(laby, method)
+        assert route.pos == laby.finish
+        assert route.start.pos == laby.start
+        laby.write(route, do_walls=False)
+        str(laby)
+
+    @pytest.mark.parametrize('method', list(SOLVERS))
+    @pytest.mark.parametrize('shape', [(4, 5, 6), (2, 3, 3, 2)])
+    def test_generated_nd(self, method, shape):
+        laby = generate(shape, 'kruskal')
+        route = solve(laby, method)
+        assert route.pos == laby.finish
+        assert route.start.pos == laby.start
+        if method in SHORTEST_METHODS:
+            assert len(route) == len(solve(laby, 'bfs'))
+
+    @pytest.mark.parametrize('method', SHORTEST_METHODS)
+    def test_shortest_nd(self, method):
+        laby = Laby.ones((3, 4, 5))
+        laby.start = (0, 0, 0)
+        laby.finish = (2, 3, 4)
+        assert len(solve(laby, method)) == 3 + 4 + 5 - 2
+
+    @pytest.mark.parametrize('method', SHORTEST_METHODS)
+    def test_same_length(self, method):
+        laby = generate((10, 12))
+        assert len(solve(laby, method)) == len(solve(laby, 'bfs'))
+
+    @pytest.mark.parametrize('method', SHORTEST_METHODS)
+    def test_no_route(self, method):
+        laby = Laby.zeros((3, 3))
+        laby.start = (0, 0)
+        laby.finish = (2, 2)
+        with pytest.raises(RouteNotFoundError):
+            solve(laby, method)
+
+    def test_unknown_method(self, laby):
+        with pytest.raises(SolverError):
+            solve(laby, 'unknown')
@@ -0,0 +1,81 @@
+import pytest
+
+from laby_api.dirs import Dirs
+from laby_api.tiled import TiledLaby, TiledError
+
+
+class TestTiledLaby:
+    @pytest.fixture
+    def tiled(self):
+        return TiledLaby((6, 8), seed=3, algorithm='kruskal')
+
+    def test_deterministic(self, tiled):
+        other = TiledLaby((6, 8), seed=3, algorithm='kruskal')
+        assert str(tiled.window((-6, -8), (12, 16))) == str(other.window((-6, -8), (12, 16)))
+        assert tiled.get_tile((1, -2)).storage.dirs == other.get_tile((1, -2)).storage.dirs
+        assert tiled.get_tile_seed((1, 2)) != tiled.get_tile_seed((2, 1))
+
+    def test_regenerated_identically(self, tiled):
+        dirs = bytes(tiled.get_tile((0, 0)).storage.dirs)
+        small = TiledLaby((6, 8), seed=3, algorithm='kruskal', cache_bytes=1)
+        small.get_tile((0, 0))
+        small.get_tile((0, 1))
+        assert small.cached_tiles == [(0, 1)]
+        assert bytes(small.get_tile((0, 0)).storage.dirs) == dirs
+
+    def test_window_passages(self, tiled):
+        window = tiled.window((-6, -8), (18, 24))
+        window.validate()
+        # Each of the 9 tiles is a perfect laby, and each of the 12 pairs of neighboring tiles is joined once.
+        n_passages = sum(bin(dirs).count('1') for dirs in window.storage.dirs) // 2
+        assert n_passages == 18 * 24 - 9 + 12
+
+    def test_window_matches_nodes(self, tiled):
+        window = tiled.window((-3, -4), (12, 16), enforce_walls=False)
+        for i in range(12):
+            for j in range(16):
+                assert window[i, j].dirs == tiled[i - 3, j - 4].dirs
+
+    def test_passages_match(self, tiled):
+        for i in range(-6, 6):
+            assert bool(tiled[i, -1].dirs & Dirs.RIGHT) == bool(tiled[i, 0].dirs & Dirs.LEFT)
+        for j in range(-8, 8):
+            assert bool(tiled[-1, j].dirs & Dirs.DOWN) == bool(tiled[0, j].dirs & Dirs.UP)
+
+    def test_only_touched_tiles(self, tiled):
+        tiled.window((5, 7), (2, 2))
+        assert sorted(tiled.cached_tiles) == [(0, 0), (0, 1), (1, 0), (1, 1)]
+
+    def test_cache_bound(self):
+        tiled = TiledLaby((4, 4), cache_bytes=3 * 16 * 5)
+        assert tiled.max_tiles == 5
+        tiled.window((0, 0), (12, 12))
+        assert len(tiled.cached_tiles) == 5
+
+    def test_window_strs(self, tiled):
+        strs = list(tiled.window_strs((-3, -4), (6, 8)))
+        assert len(strs) == 2 * 6 + 1
+        assert all(len(str_) == 6 * 8 + 1 for str_ in strs)
+        larger_strs = list(tiled.window_strs((-3, -4), (12, 16)))
+        assert all(larger_str.startswith(str_) for str_, larger_str in zip(strs, larger_strs))
+
+    def test_solve(self, tiled):
+        route = tiled.solve((-5, -7), (10, 20))
+        assert route[0] == (-5, -7)
+        assert route[-1] == (10, 20)
+        for pos, next_pos in zip(route, route[1:]):
+            assert sum(abs(a - b) for a, b in zip(pos, next_pos)) == 1
+
+    def test_solve_outside_region(self, tiled):
+        with pytest.raises(TiledError):
+            tiled.solve((0, 0), (10, 20), region=((0, 0), (6, 8)))
+
+    def test_more_dimensions(self):
+        tiled = TiledLaby((3, 4, 5), seed=1, algorithm='backtracker')
+        tiled.window((-2, -2, -2), (6, 8, 10)).validate()
+        route = tiled.solve((-1, -1, -1), (2, 3, 4))
+        assert route[-1] == (2, 3, 4)
+
+    def test_empty_tiles(self):
+        with pytest.raises(TiledError):
+            TiledLaby((0, 4))